@@ -32,14 +32,37 @@ import os
 import Fem
 import FreeCAD
 import Part
+import BOPTools.SplitAPI
 import BOPTools.SplitFeatures
 import ObjectsFem
 import femmesh.gmshtools
-import math
-import itertools
 import subprocess
-
+import bisect
+import collections
+import contextlib
+import importlib.util
+import multiprocessing
+
+import gmshprocess
+import meshcache
 import meshutils
+import referencecache
+import shapeindex
+import shapematching
+import tracing
+# matching functions are implemented without FreeCAD in shapematching
+from shapematching import (isclose, vectors_are_same, faces_with_vertices_in_symmetry_plane,
+                          faces_same_center_of_masses, faces_are_same, get_face_signature, get_solid_signature,
+                          create_face_index, find_faces_in_face_index, is_face_in_list,
+                          remove_compare_face_from_list, remove_compare_faces_from_list, faces_have_same_vertices,
+                          is_point_inside_face, is_point_inside_solid, is_point_inside_solid_with_round,
+                          is_same_vertices, is_same_edge, get_edge_signature, is_edge_in_solid,
+                          is_point_on_face_edges, get_point_from_face_close_to_edge, get_face_uv_sample_points,
+                          find_face_uv_point_in_domain, get_point_from_face, is_face_in_face, is_face_in_solid,
+                          solids_are_the_same, create_compound_filter_edge_index, find_compound_filter_edge,
+                          find_compound_filter_boundary, create_compound_filter_solid_index,
+                          find_compound_filter_solid, create_compound_filter_face_index,
+                          find_compound_filter_boundaries)
 
 
 def fit_view():
@@ -51,290 +74,239 @@ def fit_view():
         FreeCADGui.ActiveDocument.activeView().viewAxonometric()
         FreeCADGui.SendMsgToActiveView("ViewFit")
 
-def isclose(a, b, rel_tol=1e-4, abs_tol=1e-4):
-    """
-    Returns True if a and b are close to each other (within absolute or relative tolerance).
+# Documents with deferred recompute (see deferred_recompute)
+_recompute_state = {'depth': 0, 'pending_docs': collections.OrderedDict()}
 
-    :param a: float
-    :param b: float
-    :param rel_tol: float
-    :param abs_tol: float
-    :return: bool
+@contextlib.contextmanager
+def deferred_recompute(doc):
     """
-    return abs(a-b) <= max(rel_tol * max(abs(a), abs(b)), abs_tol)
+    Context manager that defers document recomputes. Inside the scope :meth:`recompute` only marks
+    the document pending and objects stay touched. Functions reading shapes call :meth:`ensure_recomputed`,
+    which recomputes only the read objects and their dependencies. Pending documents are recomputed
+    once when the outermost scope exits. Scopes can be nested.
 
-def vectors_are_same(vec1,vec2,tol=1e-4):
-    """
-    Compares vectors vec1 and vec2. If they are same within a tolerance returns
-    True if not returns false.
+    Example::
 
-    :param vec1: Vector 1 
-    :param vec2: Vector 2 to be compared with Vector 1
-    :return: Boolean
-    """
-    vec3 = vec1.sub(vec2)
-    return isclose(vec3.Length, 0., abs_tol=tol)
+        with deferred_recompute(doc):
+            parts = create_parts(doc)
+            air = create_xor_object(parts, doc)
 
-def faces_with_vertices_in_symmetry_plane(face_object_list, plane=None, abs_tol=1e-4):
+    :param doc: FreeCAD document.
     """
-    Returns faces from a list of FreeCAD face objects. The returned faces have to 
-    be in a defined symmetry plane. The face is in symmetry plane if all of its points
-    and the center of mass are in the plane.
-
-    :param face_object_list: list of FreeCAD face objects
-    :param plane: symmetry plane.
+    _recompute_state['depth'] += 1
+    _recompute_state['pending_docs'][id(doc)] = doc
+    try:
+        yield doc
+    finally:
+        _recompute_state['depth'] -= 1
+        pending_docs = []
+        if _recompute_state['depth'] == 0:
+            pending_docs = list(_recompute_state['pending_docs'].values())
+            _recompute_state['pending_docs'].clear()
+    # not reached if an exception was raised inside the scope
+    for pending_doc in pending_docs:
+        pending_doc.recompute()
 
-    :return: list of FreeCAD face objects that are in the given symmetry plane
+def recompute(doc):
     """
-    if plane is None: return None
-    face_object_list_out = []
-    for face_object in face_object_list:
-        vertices = face_object.Vertexes
-        center_of_mass = face_object.CenterOfMass
-        if plane in ['zx', 'xz']: center_compare_value = center_of_mass.y
-        elif plane in ['xy', 'yx']: center_compare_value = center_of_mass.z
-        elif plane in ['yz', 'zy']: center_compare_value = center_of_mass.x
-        else: raise ValueError("Wrong keyword for plane variable, should be: zx, xy, yz, xz, yx or zy!")
-        for i, vertex in enumerate(vertices):
-            if plane in ['zx', 'xz']: compare_value = vertex.Y
-            elif plane in ['xy', 'yx']: compare_value = vertex.Z
-            elif plane in ['yz', 'zy']: compare_value = vertex.X
-            else: raise ValueError("Wrong keyword for plane variable, should be: zx, xy, yz, xz, yx or zy!")
-            if not isclose(compare_value, 0., abs_tol=abs_tol): break
-        if i==len(vertices)-1 and isclose(center_compare_value, 0., abs_tol=abs_tol): face_object_list_out.append(face_object)
-    return face_object_list_out
+    Recomputes document. Inside :meth:`deferred_recompute` the recompute is postponed.
 
-def reduce_half_symmetry(solid, name, App, doc, planes=None, reversed_direction = False):
-    doc.recompute()
-    if planes==None: return solid
-    plane = planes.pop()
-    doc.recompute()
-    reduced_name = name + '_' + plane
-    tool_box = doc.addObject("Part::Box","CutBox"+reduced_name)
-    x = 10. * solid.Shape.BoundBox.XLength
-    y = 10. * solid.Shape.BoundBox.YLength
-    z = 10. * solid.Shape.BoundBox.ZLength
-    if isinstance(solid, Part.Feature):
-        center=solid.Shape.Solids[0].CenterOfMass
-    else:
-        center=solid.Shape.CenterOfMass
-    
-    tool_box.Length = x
-    tool_box.Width = y 
-    tool_box.Height = z
-    if plane == 'zx':
-        tool_box.Placement = App.Placement(App.Vector(center.x-x/2.,0,center.z-z/2.),App.Rotation(App.Vector(0,0,1),0))
-    elif plane == 'xy':
-        tool_box.Placement = App.Placement(App.Vector(center.x-x/2.,center.y-y/2.,0),App.Rotation(App.Vector(0,0,1),0))
-    elif plane == 'yz':
-        tool_box.Placement = App.Placement(App.Vector(0,center.y-y/2.,center.z-z/2.),App.Rotation(App.Vector(0,0,1),0))
-    else:
-        raise ValueError("Wrong keyword for plane variable, should be: zx, xy or yz!")
-    
-    if reversed_direction:
-        half_symmetry = doc.addObject("Part::MultiCommon",reduced_name)
-        half_symmetry.Shapes = [solid, tool_box]
+    :param doc: FreeCAD document.
+    """
+    if _recompute_state['depth'] > 0:
+        _recompute_state['pending_docs'][id(doc)] = doc
     else:
-        half_symmetry = doc.addObject("Part::Cut", reduced_name)
-        half_symmetry.Base = solid
-        half_symmetry.Tool = tool_box
+        doc.recompute()
 
-    if len(planes) > 0:
-        return reduce_half_symmetry(half_symmetry, reduced_name, App, doc, planes, reversed_direction)
-
-    return half_symmetry
-
-def faces_same_center_of_masses(face1, face2, tolerance=0.0001):    
+def _object_needs_recompute(obj):
     """
-    Compare two faces by comparing if they have same centers of mass with the tolerance.
+    Returns True if FreeCAD document object is touched or invalid.
 
-    :param face1: FreeCAD face object
-    :param face2: FreeCAD face object
-    :param tolerance: float
+    :param obj: FreeCAD document object.
 
+    :return: Boolean.
     """
-    return vectors_are_same(face1.CenterOfMass, face2.CenterOfMass, tolerance)
+    state = obj.State
+    return 'Touched' in state or 'Invalid' in state
 
-def faces_are_same(face1, face2, tolerance=1e-4):
+def ensure_recomputed(objects):
     """
-    Return true if face1 is same as face2. The faces are same if they have
-    the same center of masses and same vertices.
+    Recomputes touched objects before their shapes are read. Only objects in documents
+    with deferred recompute (see :meth:`deferred_recompute`) are checked. Touched dependencies
+    of the objects are recomputed as well.
 
-    :param face1: FreeCAD face object
-    :param face2: FreeCAD face object
-
-    :return: bool
+    :param objects: list of FreeCAD document objects.
     """
-    return faces_same_center_of_masses(face1, face2, tolerance) and faces_have_same_vertices(face1, face2, tolerance)
+    if _recompute_state['depth'] == 0:
+        return
+    objects_by_doc = collections.OrderedDict()
+    for obj in objects:
+        doc = getattr(obj, 'Document', None)
+        if doc is None or id(doc) not in _recompute_state['pending_docs']:
+            continue
+        doc_objects = objects_by_doc.setdefault(id(doc), (doc, collections.OrderedDict()))[1]
+        for dependency in [obj] + obj.OutListRecursive:
+            if dependency.Name not in doc_objects and _object_needs_recompute(dependency):
+                doc_objects[dependency.Name] = dependency
+    for doc, doc_objects in objects_by_doc.values():
+        if doc_objects:
+            doc.recompute(list(doc_objects.values()))
+
+# Module-wide defaults for boolean operations (see set_boolean_options)
+boolean_options = {'parallel': False, 'fuzzy_value': 0.0}
 
-def is_face_in_list(search_face, face_object_list, tolerance=1e-4):
+def set_boolean_options(parallel=None, fuzzy_value=None):
     """
-    Returns true if search_face is in the face_object_list. Compares faces with 
-    face_compare method.
+    Sets module-wide defaults for :meth:`create_boolean_compound`, :meth:`create_xor_object` and
+    :meth:`reduce_half_symmetry`. Arguments that are None are not changed.
 
-    :param search_face: FreeCAD face object
-    :param face_object_list: list of FreeCAD face objects
+    :param parallel: None or Boolean. If True, booleans are computed with TopoShape API that runs
+                     OCC boolean algorithm in parallel mode.
+    :param fuzzy_value: None or float. Fuzzy value (extra tolerance) of boolean operations.
     """
-    for face_object in face_object_list:
-        if faces_are_same(search_face, face_object): return True
-    return False
+    if parallel is not None:
+        boolean_options['parallel'] = bool(parallel)
+    if fuzzy_value is not None:
+        boolean_options['fuzzy_value'] = float(fuzzy_value)
 
-def remove_compare_face_from_list(cface, face_object_list, tolerance=1e-4):
+def _get_boolean_options(parallel=None, fuzzy_value=None):
     """
-    Removes the first FreeCAD face object that matches in the FreeCAD face object list. 
-    Uses face_compare to determine if the face is to be removed. 
+    Returns given boolean options. Module-wide defaults are used for arguments that are None.
 
-    :param cface: a FreeCAD face object to be compared
-    :param face_object_list: the list of FreeCAD face objects where the face 
-                             is to be removed in case of a match
+    :param parallel: None or Boolean.
+    :param fuzzy_value: None or float.
 
-    :return: list of FreeCAD face objects that are removed from the original list of 
-             FreeCAD face objects.
+    :return: tuple (parallel, fuzzy_value)
     """
- 
-    for i, face_object in enumerate(face_object_list):
-        if faces_are_same(cface, face_object): 
-            return face_object_list.pop(i)
-    return None
+    if parallel is None:
+        parallel = boolean_options['parallel']
+    if fuzzy_value is None:
+        fuzzy_value = boolean_options['fuzzy_value']
+    return parallel, fuzzy_value
 
-def remove_compare_faces_from_list(compare_face_object_list, face_object_list):
+def _add_shape_object(doc, name, shape):
     """
-    Removes all the face objects in compare_face_object_list that match to the face objects in 
-    the face_object_list. Uses face_compare to determine if the face is to be removed. 
+    Adds a non-parametric FreeCAD Part::Feature object with given shape to document.
 
-    :param compare_face_object_list: list of FreeCAD face objects to be compared
-    :param face_object_list: original list of FreeCAD face objects
+    :param doc: FreeCAD document.
+    :param name: String.
+    :param shape: FreeCAD shape.
 
-    :return: list of FreeCAD face objects that are removed from the original list of 
-             FreeCAD face objects.
+    :return: FreeCAD Part::Feature object
     """
-    removed = []
-    for face_object in compare_face_object_list:
-        removed.append(remove_compare_face_from_list(face_object, face_object_list))
-    return removed 
+    shape_object = doc.addObject('Part::Feature', name)
+    shape_object.Shape = shape
+    return shape_object
 
-def faces_have_same_vertices(face1, face2, tolerance=0.0001):
+def reduce_half_symmetry(solid, name, App, doc, planes=None, reversed_direction = False, parallel=None,
+                         fuzzy_value=None):
     """
-    Compare two faces by comparing that they have same number of vertices and 
-    the vertices are in identical coordinates with the tolerance. Return 
-    truth value to the faces are the same in this regard.
+    Cuts solid with symmetry planes. If parallel is True or fuzzy value is non-zero, the cut is
+    computed with TopoShape API and the result is a non-parametric Part::Feature object.
 
-    :param face1: FreeCAD face object
-    :param face2: FreeCAD face object
-    :return: bool
-    """
-    face_vertices_found = []
-    for vertex in face2.Vertexes:
-        for cvertex in face1.Vertexes:
-            if vectors_are_same(vertex.Point,cvertex.Point, tolerance):                   
-                face_vertices_found.append(1)
-    return len(face_vertices_found) == len(face2.Vertexes) and len(face_vertices_found) == len(face1.Vertexes)
+    :param solid: FreeCAD solid geometry object.
+    :param name: String.
+    :param App: FreeCAD application module.
+    :param doc: FreeCAD document.
+    :param planes: None or list containing 'zx', 'xy' and/or 'yz'.
+    :param reversed_direction: Boolean (keep the other half).
+    :param parallel: None or Boolean (see :meth:`set_boolean_options`).
+    :param fuzzy_value: None or float (see :meth:`set_boolean_options`).
 
-def is_point_inside_face(face, vector, tolerance=0.0001):
+    :return: FreeCAD geometry object.
     """
-    Returns True if point is inside face.
-
-    WARNING: This function calls function face.isInside which does NOT respect tolerance
-             https://forum.freecadweb.org/viewtopic.php?t=31524
-
-    :param face: FreeCAD face object
-    :param vector: Vector
-    :param tolerance: float
+    recompute(doc)
+    if planes==None: return solid
+    ensure_recomputed([solid])
+    plane = planes.pop()
+    parallel, fuzzy_value = _get_boolean_options(parallel, fuzzy_value)
+    use_shape_api = parallel or fuzzy_value > 0
+    reduced_name = name + '_' + plane
+    x = 10. * solid.Shape.BoundBox.XLength
+    y = 10. * solid.Shape.BoundBox.YLength
+    z = 10. * solid.Shape.BoundBox.ZLength
+    if isinstance(solid, Part.Feature):
+        center=solid.Shape.Solids[0].CenterOfMass
+    else:
+        center=solid.Shape.CenterOfMass
+    
+    if plane == 'zx':
+        tool_box_placement = App.Placement(App.Vector(center.x-x/2.,0,center.z-z/2.),App.Rotation(App.Vector(0,0,1),0))
+    elif plane == 'xy':
+        tool_box_placement = App.Placement(App.Vector(center.x-x/2.,center.y-y/2.,0),App.Rotation(App.Vector(0,0,1),0))
+    elif plane == 'yz':
+        tool_box_placement = App.Placement(App.Vector(0,center.y-y/2.,center.z-z/2.),App.Rotation(App.Vector(0,0,1),0))
+    else:
+        raise ValueError("Wrong keyword for plane variable, should be: zx, xy or yz!")
 
-    :return: bool
-    """
-    return face.isInside(vector, tolerance, True)
+    if use_shape_api:
+        tool_box_shape = Part.makeBox(x, y, z)
+        tool_box_shape.Placement = tool_box_placement
+        # list argument selects the multi-argument boolean which supports fuzzy value and parallel mode
+        if reversed_direction:
+            tracing.count('common')
+            half_symmetry_shape = solid.Shape.common([tool_box_shape], fuzzy_value)
+        else:
+            tracing.count('cut')
+            half_symmetry_shape = solid.Shape.cut([tool_box_shape], fuzzy_value)
+        half_symmetry = _add_shape_object(doc, reduced_name, half_symmetry_shape)
+    else:
+        tool_box = doc.addObject("Part::Box","CutBox"+reduced_name)
+        tool_box.Length = x
+        tool_box.Width = y
+        tool_box.Height = z
+        tool_box.Placement = tool_box_placement
+        if reversed_direction:
+            half_symmetry = doc.addObject("Part::MultiCommon",reduced_name)
+            half_symmetry.Shapes = [solid, tool_box]
+        else:
+            half_symmetry = doc.addObject("Part::Cut", reduced_name)
+            half_symmetry.Base = solid
+            half_symmetry.Tool = tool_box
 
-def is_point_inside_solid(solid, vector, tolerance=0.0001, include_faces=True):
-    """
-    Returns True if point is inside solid.
+    if len(planes) > 0:
+        return reduce_half_symmetry(half_symmetry, reduced_name, App, doc, planes, reversed_direction, parallel,
+                                    fuzzy_value)
 
-    :param solid: FreeCAD solid object
-    :param vector: Vector
-    :param tolerance: float
-    :param include_faces: bool
+    return half_symmetry
 
-    :return: bool
-    """
-    return solid.isInside(vector, tolerance, include_faces)
+# Interior points found by get_point_from_solid, keys are shape hash codes
+_solid_point_cache = {}
 
-def is_point_inside_solid_with_round(solid, vector, tolerance=0.0001, round_digits=6):
+def clear_point_caches():
     """
-    Returns True if point is inside solid (faces included) with
-    additional tolerance (8 points checked).
-    Tries upper and lower rounding of coordinates with precision round_digits.
-
-    :param solid: FreeCAD solid object
-    :param vector: Vector
-    :param tolerance: float
-    :param round_digits: integer
-
-    :return: bool
+    Clears cached interior points of shapes (see :meth:`get_point_from_solid` and :meth:`get_point_from_face`).
     """
-    rounding = 10**round_digits
-    x_floor, x_ceil = math.floor(rounding*vector.x)/rounding, math.ceil(rounding*vector.x)/rounding
-    y_floor, y_ceil = math.floor(rounding*vector.y)/rounding, math.ceil(rounding*vector.y)/rounding
-    z_floor, z_ceil = math.floor(rounding*vector.z)/rounding, math.ceil(rounding*vector.z)/rounding
-    for coordinates in itertools.product([x_floor, x_ceil], [y_floor, y_ceil], [z_floor, z_ceil]):
-        vector.x = coordinates[0]
-        vector.y = coordinates[1]
-        vector.z = coordinates[2]
-        if is_point_inside_solid(solid, vector, tolerance):
-            return True
-    return False
+    _solid_point_cache.clear()
+    shapematching.clear_face_point_cache()
 
-def is_same_vertices(vertex1, vertex2, tolerance=0.0001):
+def _make_edges_compound(edges):
     """
-    Checks if given vertices are same.
+    Returns FreeCAD compound of edges (geometry backend function, see shapematching.set_geometry_backend).
 
-    :param vertex1: FreeCAD vertex
-    :param vertex2: FreeCAD vertex
-    :param tolerance: float
+    :param edges: list of FreeCAD edges
 
-    :return: bool
+    :return: FreeCAD compound
     """
-    if abs(vertex1.X - vertex2.X) < tolerance:
-        if abs(vertex1.Y - vertex2.Y) < tolerance:
-            if abs(vertex1.Z - vertex2.Z) < tolerance:
-                return True
-    return False
+    return Part.Compound(edges)
 
-def is_same_edge(edge1, edge2, tolerance=0.0001):
+def _point_to_shape_distance(point, shape):
     """
-    Checks if given edges are in same place by comparing end points.
+    Returns distance from point to shape (geometry backend function, see shapematching.set_geometry_backend).
 
-    :param edge1: FreeCAD edge
-    :param edge2: FreeCAD edge
-    :param tolerance: float
+    :param point: FreeCAD Vector object
+    :param shape: FreeCAD shape
 
-    :return: bool
+    :return: float
     """
-    if is_same_vertices(edge1.Vertexes[0], edge2.Vertexes[0], tolerance):
-        if is_same_vertices(edge1.Vertexes[1], edge2.Vertexes[1], tolerance):
-            return True
-    elif is_same_vertices(edge1.Vertexes[0], edge2.Vertexes[1], tolerance):
-        if is_same_vertices(edge1.Vertexes[1], edge2.Vertexes[0], tolerance):
-            return True
-    return False
+    tracing.count('distToShape')
+    return Part.Vertex(point).distToShape(shape)[0]
 
-def is_edge_in_solid(solid, edge, tolerance=0.0001):
-    """
-    Returns True if edge inside solid by comparing is edge vertices inside solid.
+shapematching.set_geometry_backend('FreeCAD', _make_edges_compound, _point_to_shape_distance)
 
-    :param solid: FreeCAD solid object
-    :param edge: FreeCAD edge object
-    :param tolerance: float
-
-    :return: bool
+def _get_point_from_solid_with_grid(solid, tolerance=0.0001):
     """
-    for vertex in edge.Vertexes:
-        if not is_point_inside_solid(solid, vertex.Point, tolerance):
-            return False
-    return True
-
-def get_point_from_solid(solid, tolerance=0.0001):
-    """
-    Returns point from given solid.
+    Returns point from given solid by checking points from grids inside bounding box of the solid.
 
     :param solid: FreeCAD solid object
     :param tolerance: float
@@ -359,124 +331,69 @@ def get_point_from_solid(solid, tolerance=0.0001):
                         return test_point
     return None
 
-def is_point_on_face_edges(face, p2, tol=0.0001):
+def _get_point_from_solid_with_rays(solid, tolerance=0.0001, max_faces=6):
     """
-    Checks if given point is on same edge of given face.
-
-    :param face: FreeCAD face object
-    :param p2: FreeCAD Vector object
-    :param tol: float
-
-    :return: bool
-    """
-    vertex = Part.Vertex(p2)
-    for edge in face.Edges:
-        if vertex.distToShape(edge)[0] < tol:
-            return True
-    return False
-
-def get_point_from_face_close_to_edge(face):
-    """
-    Increases parameter range minimum values of face by one until at least
-    two of the x, y and z coordinates of the corresponding point has moved at least 1 unit.
-    If point is not found None is returned.
-
-    :param face: FreeCAD face object.
-
-    :return: None or FreeCAD vector object.
-    """
-    u_min, u_max, v_min, v_max = face.ParameterRange
-    p1 = face.valueAt(u_min, v_min)
-    u_test, v_test = u_min+1, v_min+1
-    while u_test < u_max and v_test < v_max:
-        p2 = face.valueAt(u_test, v_test)
-        # Check at least two coordinates moved 1 unit
-        if (abs(p1.x - p2.x) >= 1) + (abs(p1.y - p2.y) >= 1) + (abs(p1.z - p2.z) >= 1) > 1:
-            if is_point_on_face_edges(face, p2):
-                v_test += 0.5
-                continue  # go back at the beginning of while
-            if face.isPartOfDomain(u_test, v_test):
-                return p2
-            return None
-        u_test, v_test = u_test+1, v_test+1
-    return None
+    Returns point from given solid by casting rays from face points along the face normals.
+    The midpoint of the chord starting from the face point is returned if it is inside the solid.
+    Faces are tried in decreasing order of area.
 
-def get_point_from_face(face):
-    """
-    Returns point from given face.
-
-    :param face: FreeCAD face object.
+    :param solid: FreeCAD solid object
+    :param tolerance: float
+    :param max_faces: integer (number of faces tried)
 
     :return: None or FreeCAD vector object
     """
-    point = get_point_from_face_close_to_edge(face)
-    if point is not None:
-        return point
-    u_min, u_max, v_min, v_max = face.ParameterRange
-    u_len, v_len = u_max-u_min, v_max-v_min
-    # use primes so same points are not checked multiple times
-    for split_count in [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97,
-                        101, 103, 107, 109, 113, 127, 131, 137, 139, 149, 151, 157, 163, 167, 173, 179, 181, 191, 193,
-                        197, 199, 211, 223, 227, 229, 233, 239, 241, 251, 257, 263, 269, 271, 277, 281, 283, 293, 307,
-                        311, 313, 317, 331, 337, 347, 349, 353, 359, 367, 373, 379, 383, 389, 397, 401, 409, 419, 421,
-                        431, 433, 439, 443, 449, 457, 461, 463, 467, 479, 487, 491, 499, 503, 509, 521, 523, 541]:
-        u_split_len, v_split_len = u_len/float(split_count), v_len/float(split_count)
-        for i in range(1, split_count):
-            u_test = u_min + i*u_split_len
-            for j in range(1, split_count):
-                v_test = v_min + j*v_split_len
-                if face.isPartOfDomain(u_test, v_test):
-                    return face.valueAt(u_test, v_test)
+    ray_length = 2. * solid.BoundBox.DiagonalLength
+    faces = sorted(solid.Faces, key=lambda face: face.Area, reverse=True)
+    for face in faces[:max_faces]:
+        face_point = get_point_from_face(face)
+        if face_point is None:
+            continue
+        u, v = face.Surface.parameter(face_point)
+        normal = face.normalAt(u, v)
+        for sign in [-1., 1.]:  # normal of a solid face points usually outwards
+            ray_end = FreeCAD.Vector(face_point.x + sign*ray_length*normal.x,
+                                     face_point.y + sign*ray_length*normal.y,
+                                     face_point.z + sign*ray_length*normal.z)
+            ray = Part.LineSegment(face_point, ray_end).toShape()
+            tracing.count('common')
+            chords = solid.common(ray).Edges
+            if not chords:
+                continue
+            # the first chord starts from the face point
+            chord = min(chords, key=lambda c: min((vertex.Point - face_point).Length for vertex in c.Vertexes))
+            if len(chord.Vertexes) != 2:
+                continue
+            p1, p2 = chord.Vertexes[0].Point, chord.Vertexes[1].Point
+            test_point = FreeCAD.Vector((p1.x+p2.x)/2., (p1.y+p2.y)/2., (p1.z+p2.z)/2.)
+            if is_point_inside_solid(solid, test_point, tolerance, include_faces=False):
+                return test_point
     return None
 
-def is_face_in_face(face1, face2, tolerance=0.0001):
-    """
-    Returns True if all vertices and point in face1 also belongs to face2
-
-    :param face1: FreeCAD face object
-    :param face2: FreeCAD face object
-    :param tolerance: float
-
-    :return: bool
+def get_point_from_solid(solid, tolerance=0.0001):
     """
-    for vertex in face1.Vertexes:
-        if not is_point_inside_face(face2, vertex.Point, tolerance):
-            return False
-    point_in_face1 = get_point_from_face(face1)
-    if point_in_face1 is not None:
-        if not is_point_inside_face(face2, point_in_face1, tolerance):
-            return False
-    else:
-        raise ValueError('Face point not found')
-    return True
+    Returns point from given solid.
 
-def is_face_in_solid(solid, face, tolerance=0.0001, use_round=True):
-    """
-    Checks if all face vertices and one additional point from face are inside solid.
-    If use_round is True calls function meth:`is_point_inside_solid_with_round` to check
-    if point inside solid.
+    The point is searched first with rays cast from the faces of the solid
+    (:meth:`_get_point_from_solid_with_rays`). If that fails points from grids inside the bounding box
+    are checked (:meth:`_get_point_from_solid_with_grid`). Found points are cached by the shape hash code
+    and a cached point is returned if it is still inside the solid.
 
     :param solid: FreeCAD solid object
-    :param face: FreeCAD face object
     :param tolerance: float
-    :param use_round: bool
 
-    :return: bool
+    :return: None or FreeCAD vector object
     """
-    if use_round:
-        is_point_in_solid_func = is_point_inside_solid_with_round
-    else:
-        is_point_in_solid_func = is_point_inside_solid
-    for vertex in face.Vertexes:
-        if not is_point_in_solid_func(solid, vertex.Point, tolerance):
-            return False
-    point_in_face = get_point_from_face(face)
-    if point_in_face is not None:
-        if not is_point_in_solid_func(solid, point_in_face, tolerance):
-            return False
-    else:
-        raise ValueError('Face point not found')
-    return True
+    shape_hash = solid.hashCode()
+    cached_point = _solid_point_cache.get(shape_hash)
+    if cached_point is not None and is_point_inside_solid(solid, cached_point, tolerance, include_faces=False):
+        return FreeCAD.Vector(cached_point)
+    point = _get_point_from_solid_with_rays(solid, tolerance)
+    if point is None:
+        point = _get_point_from_solid_with_grid(solid, tolerance)
+    if point is not None:
+        _solid_point_cache[shape_hash] = FreeCAD.Vector(point)
+    return point
 
 def is_compound_filter_solid_in_solid(compound_filter_solid, solid, tolerance=0.0001, point_search=True):
     """
@@ -497,38 +414,93 @@ def is_compound_filter_solid_in_solid(compound_filter_solid, solid, tolerance=0.
         if point_in_solid is None:
             raise ValueError('Solid point not found')
         return is_point_inside_solid(solid, point_in_solid, tolerance)
+    tracing.count('common')
     return compound_filter_solid.common(solid).Volume > 0
 
-def solids_are_the_same(solid1, solid2):
+def _boolean_fragments_worker(task):
     """
-    Compare two solids by comparing have they same number of faces and the faces are identical. 
-    Return truth value to the solids are the same in this regard.
-    
-    :param solid1: FreeCAD solid object
-    :param solid2: FreeCAD solid object
-    :return: bool
+    Worker function for :meth:`create_boolean_compound`.
+
+    :param task: tuple (list of BREP strings of the solids, fuzzy_value)
+
+    :return: BREP string of the boolean fragments shape
     """
-    solid_faces_found = []
-    for face in solid2.Faces:
-        for cface in solid1.Faces:
-            if faces_same_center_of_masses(cface, face) and faces_have_same_vertices(cface, face):                   
-                solid_faces_found.append(1)
-    return len(solid_faces_found) == len(solid2.Faces) and len(solid_faces_found) == len(solid1.Faces)
+    brep_strings, fuzzy_value = task
+    shapes = [_import_shape_from_brep_string(brep_string) for brep_string in brep_strings]
+    return BOPTools.SplitAPI.booleanFragments(shapes, 'CompSolid', fuzzy_value).exportBrepToString()
 
-def create_boolean_compound(solid_objects, doc):
+def create_boolean_compound(solid_objects, doc, clustered=False, tolerance=0.0001, parallel=None, fuzzy_value=None,
+                            name='Compsolid'):
     """
     Creates a FreeCAD boolean compound for the list of FreeCAD solid objects.
     This is needed when mesh is computed for the whole geometry. Note that
     there is also a create_mesh_object_and_compound_filter for meshing purpose.
 
+    If clustered is True, the solids are divided into clusters of solids whose bounding boxes
+    (enlarged with tolerance) overlap or touch. Boolean fragments are computed separately for each
+    cluster and the clusters are collected to a compound. Solids in different clusters can not
+    share faces, so the result has the same topology as a single boolean fragments operation.
+    Note that the result is then a Part::Compound (see :meth:`create_compound`) linking the cluster
+    objects named '<name>Cluster<number>', not a single CompSolid shape.
+
+    If parallel is True, boolean fragments are computed with TopoShape API (OCC parallel mode) and
+    the result is a non-parametric Part::Feature object. With clustered the clusters are also
+    computed in a process pool.
+
     :param solid_objects: list of FreeCAD solid geometry objects.
     :param doc: FreeCAD document.
+    :param clustered: Boolean.
+    :param tolerance: float (only used with clustered)
+    :param parallel: None or Boolean (see :meth:`set_boolean_options`).
+    :param fuzzy_value: None or float (see :meth:`set_boolean_options`).
+    :param name: String (name of the returned object).
     :return: FreeCAD compound object.
     """
-    doc.recompute()
-    comp_obj = BOPTools.SplitFeatures.makeBooleanFragments(name='Compsolid')
+    recompute(doc)
+    ensure_recomputed(solid_objects)
+    parallel, fuzzy_value = _get_boolean_options(parallel, fuzzy_value)
+    if clustered:
+        limits_list = [shapeindex.get_bound_box_limits(solid_object.Shape.BoundBox, tolerance)
+                       for solid_object in solid_objects]
+        clusters = shapeindex.find_bound_box_clusters(limits_list)
+        if len(clusters) > 1:
+            cluster_objects = [None] * len(clusters)
+            pool_clusters = []
+            for num, cluster in enumerate(clusters):
+                if len(cluster) == 1:
+                    cluster_objects[num] = solid_objects[cluster[0]]
+                elif parallel:
+                    pool_clusters.append(num)
+                else:
+                    cluster_objects[num] = create_boolean_compound([solid_objects[i] for i in cluster], doc,
+                                                                   parallel=parallel, fuzzy_value=fuzzy_value,
+                                                                   name='{}Cluster{}'.format(name, num))
+            if pool_clusters:
+                tasks = [([solid_objects[i].Shape.exportBrepToString() for i in clusters[num]], fuzzy_value)
+                         for num in pool_clusters]
+                try:
+                    context = multiprocessing.get_context('fork')  # workers inherit already imported FreeCAD modules
+                except (AttributeError, ValueError):
+                    context = multiprocessing
+                pool = context.Pool(min(len(tasks), multiprocessing.cpu_count()))
+                try:
+                    brep_strings = pool.map(_boolean_fragments_worker, tasks, chunksize=1)
+                finally:
+                    pool.close()
+                    pool.join()
+                for num, brep_string in zip(pool_clusters, brep_strings):
+                    shape = Part.Shape()
+                    shape.importBrepFromString(brep_string)
+                    cluster_objects[num] = _add_shape_object(doc, '{}Cluster{}'.format(name, num), shape)
+            return create_compound(cluster_objects, doc, name)
+    if parallel:
+        shape = BOPTools.SplitAPI.booleanFragments([solid_object.Shape for solid_object in solid_objects],
+                                                   'CompSolid', fuzzy_value)
+        return _add_shape_object(doc, name, shape)
+    comp_obj = BOPTools.SplitFeatures.makeBooleanFragments(name=name)
     comp_obj.Objects = solid_objects 
     comp_obj.Mode = "CompSolid"
+    comp_obj.Tolerance = fuzzy_value
     comp_obj.Proxy.execute(comp_obj)
     comp_obj.purgeTouched()
     return comp_obj
@@ -536,6 +508,9 @@ def create_boolean_compound(solid_objects, doc):
 def create_compound(solid_objects, doc, name='Compsolid'):
     """
     Creates a FreeCAD compound for the list of FreeCAD solid objects.
+    The result is a Part::Compound object linking the given objects, its shape is a Compound
+    (not a CompSolid even if the linked objects are boolean fragments of clustered solids,
+    see :meth:`create_boolean_compound`).
 
     :param solid_objects: list of FreeCAD solid geometry objects.
     :param doc: FreeCAD document.
@@ -544,20 +519,31 @@ def create_compound(solid_objects, doc, name='Compsolid'):
     """
     compound = doc.addObject('Part::Compound', name)
     compound.Links = solid_objects
-    doc.recompute()
+    recompute(doc)
     return compound
 
-def create_xor_object(solid_objects, doc):
+def create_xor_object(solid_objects, doc, parallel=None, fuzzy_value=None):
     """
     Creates a FreeCAD xor object for the list of FreeCAD solid objects.
 
+    If parallel is True, xor is computed with TopoShape API (OCC parallel mode) and
+    the result is a non-parametric Part::Feature object.
+
     :param solid_objects: list of FreeCAD solid geometry objects.
     :param doc: FreeCAD document.
+    :param parallel: None or Boolean (see :meth:`set_boolean_options`).
+    :param fuzzy_value: None or float (see :meth:`set_boolean_options`).
     :return: FreeCAD xor object
     """
-    doc.recompute()
+    recompute(doc)
+    ensure_recomputed(solid_objects)
+    parallel, fuzzy_value = _get_boolean_options(parallel, fuzzy_value)
+    if parallel:
+        shape = BOPTools.SplitAPI.xor([solid_object.Shape for solid_object in solid_objects], fuzzy_value)
+        return _add_shape_object(doc, 'XOR', shape)
     xor_object = BOPTools.SplitFeatures.makeXOR(name='XOR')
     xor_object.Objects = solid_objects
+    xor_object.Tolerance = fuzzy_value
     xor_object.Proxy.execute(xor_object)
     xor_object.purgeTouched()
     return xor_object
@@ -573,6 +559,7 @@ def create_compound_filter(compsolid):
     import CompoundTools.CompoundFilter
     compound_filter = CompoundTools.CompoundFilter.makeCompoundFilter(name='CompoundFilter')
     compound_filter.Base = compsolid
+    ensure_recomputed([compsolid])
     compound_filter.FilterType = 'window-volume' #???
     compound_filter.Proxy.execute(compound_filter) #???
     return compound_filter
@@ -596,6 +583,7 @@ def create_mesh_object(compound_filter, CharacteristicLength, doc, algorithm2d='
     mesh_object.Algorithm2D = algorithm2d
     mesh_object.Algorithm3D = algorithm3d
     mesh_object.ElementOrder = u"1st"
+    clear_mesh_size_fields(mesh_object)  # fields of an earlier mesh object with the same name
     return mesh_object
 
 def set_mesh_group_elements(gmsh_mesh):
@@ -610,57 +598,49 @@ def set_mesh_group_elements(gmsh_mesh):
     if gmsh_mesh.group_elements:
         FreeCAD.Console.PrintMessage('  {}\n'.format(gmsh_mesh.group_elements))
 
-def _remove_ansi_color_escape_codes(message):
+@tracing.trace_stage('run_gmsh')
+def run_gmsh(gmsh_mesh, gmsh_log_file=None, progress_callback=None, time_limit=None, element_limit=None,
+             abort_patterns=None, node_limit=None):
     """
-    Replace color code escape codes from message with empty string.
-
-    :param message: A string.
-
-    :return: A string.
-    """
-    return message.replace('\x1b[1m', '').replace('\x1b[31m', '').replace('\x1b[35m', '').replace('\x1b[0m', '')
-
-def run_gmsh(gmsh_mesh, gmsh_log_file=None):
-    """
-    Runs gmsh. Writes gmsh output to gmsh_log_file if given.
+    Runs gmsh. Output is read line by line while gmsh is running and written to gmsh_log_file
+    immediately if given (see gmshprocess.run_gmsh).
 
     :param gmsh_mesh: Instance of gmshtools.GmshTools.
     :param gmsh_log_file: None or path to gmsh_log.
+    :param progress_callback: None or a function called with progress dictionary {'stage': str, 'nodes': int,
+                              'elements': int, 'wall time': float}.
+    :param time_limit: None or wall time limit in seconds (gmsh is terminated if exceeded).
+    :param element_limit: None or an integer (gmsh is terminated if exceeded). Checked only when gmsh
+                          reports element count after each meshing step.
+    :param abort_patterns: None or a dictionary {regular expression: number of matches} e.g.
+                           {'Invalid boundary mesh': 3} (gmsh is terminated after given number of matches).
+    :param node_limit: None or an integer (gmsh is terminated if exceeded, checked also during 3D meshing).
 
     :return: Gmsh stderr, None or error string.
     """
-    if gmsh_log_file is None:
-        error = gmsh_mesh.run_gmsh_with_geo()
-    else:
-        try:
-            with open(gmsh_log_file, 'w') as f:
-                p = subprocess.Popen([gmsh_mesh.gmsh_bin, '-', gmsh_mesh.temp_file_geo],
-                                     stdout=f, stderr=subprocess.PIPE, universal_newlines=True)
-                no_value, error = p.communicate()
-                if error:
-                    error = _remove_ansi_color_escape_codes(error)
-                    f.write(error)
-                    f.flush()
-        except Exception:
-            error = 'Error executing gmsh'
-    return error
-
-def create_mesh(mesh_object, directory=False, gmsh_log_file=None, transfinite_param_list=None):
-    """
-    Create mesh mesh with Gmsh.
-    Value of directory determines location gmsh temporary files::
+    command = [gmsh_mesh.gmsh_bin, '-', gmsh_mesh.temp_file_geo]
+    log = open(gmsh_log_file, 'w') if gmsh_log_file is not None else None
+    try:
+        result = gmshprocess.run_gmsh(command, log, progress_callback, time_limit, element_limit, abort_patterns,
+                                      node_limit)
+    except OSError as e:
+        return 'Error executing: {} ({})\n'.format(' '.join(command), e)
+    finally:
+        if log is not None:
+            log.close()
+    return result['error']
 
-        - False: Use current working directory
-        - None: Let GmshTools decide (temp directory)
-        - something else: try to use given value
+def write_gmsh_input_files(mesh_object, directory=False, transfinite_param_list=None):
+    """
+    Writes gmsh input files (BREP and geo file) of mesh object without running gmsh.
+    Value of directory determines location of files (see :meth:`create_mesh`).
 
     :param mesh_object: FreeCAD mesh object
     :param directory: Gmsh temp file location.
-    :param gmsh_log_file: None or path to gmsh_log.
     :param transfinite_param_list: None or a list containing dictionaries {'volume': 'name',
                                                                            'surface_list': [s_name, sname2]}.
 
-    :return: None or gmsh error text.
+    :return: Instance of gmshtools.GmshTools (geo file path in attribute temp_file_geo).
     """
     if directory is False:
         directory = os.getcwd()
@@ -677,15 +657,187 @@ def create_mesh(mesh_object, directory=False, gmsh_log_file=None, transfinite_pa
     gmsh_mesh.get_gmsh_command()
     gmsh_mesh.write_gmsh_input_files()
     if transfinite_param_list:
-        meshutils.add_transfinite_lines_to_geo_file(directory, transfinite_param_list)
-    error = run_gmsh(gmsh_mesh, gmsh_log_file)
-    if error:
-        FreeCAD.Console.PrintError('{}\n'.format(error))
-        return error
+        meshutils.add_transfinite_lines_to_geo_file(os.path.dirname(gmsh_mesh.temp_file_geo), transfinite_param_list)
+    size_field_params = get_mesh_size_field_params(mesh_object, gmsh_mesh.group_elements)
+    if size_field_params:
+        meshutils.add_size_fields_to_geo_file(os.path.dirname(gmsh_mesh.temp_file_geo), size_field_params)
+    return gmsh_mesh
+
+def submit_mesh_object(scheduler, mesh_object, directory, out_dir=None, transfinite_param_list=None, gmsh_threads=1,
+                       log_file=None):
+    """
+    Writes gmsh input files of mesh object and queues gmsh and ElmerGrid run to scheduler
+    (see meshscheduler.py). Returns immediately so that the next geometry variant can be created
+    while this one is meshed. Each mesh object needs its own directory.
+
+    Example::
+
+        scheduler = meshscheduler.create_mesh_scheduler(max_workers=2)
+        for k, params in enumerate(variants):
+            mesh_object = create_variant(params)
+            submit_mesh_object(scheduler, mesh_object, 'variant{}'.format(k), 'variant{}/mesh'.format(k))
+        results = meshscheduler.wait_mesh_jobs(scheduler)
+
+    :param scheduler: A dictionary (see meshscheduler.create_mesh_scheduler).
+    :param mesh_object: FreeCAD mesh object
+    :param directory: Gmsh file location (created if it does not exist).
+    :param out_dir: None or ElmerGrid output directory. If None, ElmerGrid is not run.
+    :param transfinite_param_list: None or a list (see :meth:`create_mesh`).
+    :param gmsh_threads: An integer (gmsh option -nt).
+    :param log_file: None or path to job log (gmsh and ElmerGrid output).
+
+    :return: A future (see meshscheduler.submit_mesh_job).
+    """
+    import meshscheduler
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    gmsh_mesh = write_gmsh_input_files(mesh_object, directory, transfinite_param_list)
+    return meshscheduler.submit_mesh_job(scheduler, gmsh_mesh.temp_file_geo, out_dir, gmsh_threads, log_file,
+                                         gmsh_bin=gmsh_mesh.gmsh_bin)
+
+def _get_gmsh_api_options(gmsh_mesh):
+    """
+    Returns gmsh options of mesh object (same as written to geo file by GmshTools).
+
+    :param gmsh_mesh: Instance of gmshtools.GmshTools.
+
+    :return: A dictionary {gmsh option name: value}.
+    """
+    mesh_obj = gmsh_mesh.mesh_obj
+    return {'Mesh.CharacteristicLengthExtendFromBoundary': 1 if mesh_obj.CharacteristicLengthExtendFromBoundary else 0,
+            'Mesh.CharacteristicLengthFromPoints': 1,
+            'Mesh.CharacteristicLengthMax': float(gmsh_mesh.clmax),
+            'Mesh.CharacteristicLengthMin': float(gmsh_mesh.clmin),
+            'Mesh.ElementOrder': int(gmsh_mesh.order),
+            'Mesh.Optimize': 1 if mesh_obj.OptimizeStd else 0,
+            'Mesh.OptimizeNetgen': 1 if mesh_obj.OptimizeNetgen else 0,
+            'Mesh.Algorithm': int(gmsh_mesh.algorithm2D),
+            'Mesh.Algorithm3D': int(gmsh_mesh.algorithm3D)}
+
+@tracing.trace_stage('create_mesh_with_gmsh_api')
+def create_mesh_with_gmsh_api(mesh_object, directory=False, gmsh_log_file=None, transfinite_param_list=None,
+                              set_fem_mesh=False):
+    """
+    Create mesh with gmsh Python API in-process (see gmshapi.py). Only the BREP file of the
+    mesh object shape is written, physical groups, mesh sizes and transfinite constraints are set
+    directly from mesh groups, mesh regions and transfinite_param_list.
+    Value of directory determines location of temporary files (see :meth:`create_mesh`).
+
+    Supported GmshTools settings are mesh groups, mesh regions (point sizes), size fields
+    (see :meth:`add_mesh_size_field`), characteristic length limits, element order, optimization
+    and 2D/3D algorithms (see :meth:`_get_gmsh_api_options`). Other settings written to geo file by
+    GmshTools are not supported, e.g. boundary layers, RecombineAll, SecondOrderLinear, HighOrderOptimize
+    and Coherence. Use engine 'file' of :meth:`create_mesh` for those.
+
+    :param mesh_object: FreeCAD mesh object
+    :param directory: Gmsh temp file location.
+    :param gmsh_log_file: None or path to gmsh_log.
+    :param transfinite_param_list: None or a list containing dictionaries {'volume': 'name',
+                                                                           'surface_list': [s_name, sname2]}.
+    :param set_fem_mesh: Boolean. If True, mesh is also written to file and read back to mesh_object.FemMesh
+                         (needed by :meth:`export_unv` and :meth:`run_elmergrid`). Not needed when Elmer mesh
+                         is written from the returned arrays with :meth:`export_elmer_mesh`.
+
+    :return: A dictionary containing node and element arrays (see gmshapi.create_mesh).
+    """
+    import gmshapi
+    if directory is False:
+        directory = os.getcwd()
+    gmsh_mesh = femmesh.gmshtools.GmshTools(mesh_object)
+    gmsh_mesh.start_logs()
+    gmsh_mesh.get_dimension()
+    set_mesh_group_elements(gmsh_mesh)
+    gmsh_mesh.get_region_data()
+    gmsh_mesh.get_tmp_file_paths(param_working_dir=directory)
+    gmsh_mesh.write_part_file()
+    point_sizes = {}
+    for element, length in gmsh_mesh.ele_length_map.items():
+        for node in gmsh_mesh.ele_node_map[element]:
+            point_sizes[int(node) + 1] = length  # FreeCAD vertex indices start from zero
+    mesh_file = gmsh_mesh.temp_file_mesh if set_fem_mesh else None
+    mesh_data = gmshapi.create_mesh(gmsh_mesh.temp_file_geometry, gmsh_mesh.group_elements, point_sizes,
+                                    transfinite_param_list, _get_gmsh_api_options(gmsh_mesh),
+                                    int(gmsh_mesh.dimension), mesh_file, gmsh_log_file,
+                                    size_field_params=get_mesh_size_field_params(mesh_object,
+                                                                                 gmsh_mesh.group_elements))
+    if set_fem_mesh:
+        mesh_object.FemMesh = Fem.read(mesh_file)
+    return mesh_data
+
+@tracing.trace_stage('create_mesh')
+def create_mesh(mesh_object, directory=False, gmsh_log_file=None, transfinite_param_list=None, engine='file',
+                elmer_dir=None, set_fem_mesh=False, **gmsh_run_options):
+    """
+    Create mesh mesh with Gmsh.
+    Value of directory determines location gmsh temporary files::
+
+        - False: Use current working directory
+        - None: Let GmshTools decide (temp directory)
+        - something else: try to use given value
+
+    Value of engine determines how Gmsh is run::
+
+        - 'file': Write geo file and run gmsh executable
+        - 'api': Use gmsh Python API in-process (see :meth:`create_mesh_with_gmsh_api` for supported settings),
+                 falls back to 'file' if gmsh module is not available. Node and element arrays are
+                 written to elmer_dir (see :meth:`export_elmer_mesh`) without mesh file, UNV and ElmerGrid.
+
+    :param mesh_object: FreeCAD mesh object
+    :param directory: Gmsh temp file location.
+    :param gmsh_log_file: None or path to gmsh_log.
+    :param transfinite_param_list: None or a list containing dictionaries {'volume': 'name',
+                                                                           'surface_list': [s_name, sname2]}.
+    :param engine: String 'file' or 'api'.
+    :param elmer_dir: None or directory where Elmer mesh is written. With engine 'file' mesh is exported
+                      to UNV file elmer_dir.unv and converted with ElmerGrid (see :meth:`run_elmergrid`).
+    :param set_fem_mesh: Boolean (engine 'api'). If True, mesh is also set to mesh_object.FemMesh
+                         (see :meth:`create_mesh_with_gmsh_api`). Always set with engine 'file'.
+    :param gmsh_run_options: Keyword arguments progress_callback, time_limit, element_limit, node_limit and
+                             abort_patterns of :meth:`run_gmsh` (engine 'file').
+
+    If mesh cache is enabled (see meshcache.set_mesh_cache_directory), mesh is restored from cache
+    when geo file, merged geometry and gmsh version match an earlier run.
+
+    :return: None or gmsh error text.
+    """
+    if engine == 'api':
+        meshcache.set_object_key(mesh_object.Name, None)
+        if importlib.util.find_spec('gmsh') is not None:
+            try:
+                mesh_data = create_mesh_with_gmsh_api(mesh_object, directory, gmsh_log_file, transfinite_param_list,
+                                                      set_fem_mesh)
+                if elmer_dir is not None:
+                    export_elmer_mesh(mesh_data, elmer_dir)
+                return None
+            except Exception as e:
+                FreeCAD.Console.PrintError('{}\n'.format(e))
+                return str(e)
+        FreeCAD.Console.PrintWarning('gmsh Python module not available, using gmsh executable\n')
+    elif engine != 'file':
+        raise ValueError('Unknown meshing engine {}'.format(engine))
+    gmsh_mesh = write_gmsh_input_files(mesh_object, directory, transfinite_param_list)
+    key = None
+    if meshcache.get_mesh_cache_directory() is not None:
+        key = meshcache.get_geo_file_key(gmsh_mesh.temp_file_geo, gmsh_mesh.gmsh_bin)
+    meshcache.set_object_key(mesh_object.Name, key)
+    if meshcache.restore_mesh(key, gmsh_mesh.temp_file_mesh):
+        FreeCAD.Console.PrintMessage('Mesh restored from cache {}\n'.format(key))
+    else:
+        meshcache.release_mesh(gmsh_mesh.temp_file_mesh)
+        error = run_gmsh(gmsh_mesh, gmsh_log_file, **gmsh_run_options)
+        if error:
+            FreeCAD.Console.PrintError('{}\n'.format(error))
+            return error
+        meshcache.store_mesh(key, gmsh_mesh.temp_file_mesh)
     gmsh_mesh.read_and_set_new_mesh()
+    if elmer_dir is not None:
+        elmer_dir = os.path.normpath(elmer_dir)
+        run_elmergrid(elmer_dir + '.unv', mesh_object, elmer_dir, elmer_dir + '_elmergrid.log')
 
+@tracing.trace_stage('create_mesh_object_and_compound_filter')
 def create_mesh_object_and_compound_filter(solid_objects, CharacteristicLength, doc, separate_boundaries=False,
-                                           algorithm2d='Automatic', algorithm3d='New Delaunay'):
+                                           algorithm2d='Automatic', algorithm3d='New Delaunay', clustered=False,
+                                           parallel=None, fuzzy_value=None):
     """
     Creates FreeCAD mesh and compound filter objects. Uses create_boolean_compound/create_compound and
     create_compound_filter, create_mesh_object methods.
@@ -697,15 +849,20 @@ def create_mesh_object_and_compound_filter(solid_objects, CharacteristicLength,
     :param algorithm2d: String 'MeshAdapt', 'Automatic', 'Delaunay', 'Frontal', 'BAMG', 'DelQuad'.
     :param algorithm3d: String 'Delaunay', 'New Delaunay', 'Frontal', 'Frontal Delaunay', 'Frontal Hex',
                         'MMG3D', 'R-tree'.
+    :param clustered: Boolean (see :meth:`create_boolean_compound`).
+    :param parallel: None or Boolean (see :meth:`set_boolean_options`).
+    :param fuzzy_value: None or float (see :meth:`set_boolean_options`).
     """
     if len(solid_objects) == 1 or separate_boundaries:  # boolean compound can not be created with only one solid
         boolean_compound = create_compound(solid_objects, doc)
     else:
-        boolean_compound = create_boolean_compound(solid_objects, doc)
+        boolean_compound = create_boolean_compound(solid_objects, doc, clustered=clustered, parallel=parallel,
+                                                   fuzzy_value=fuzzy_value)
     compound_filter = create_compound_filter(boolean_compound)
     mesh_object = create_mesh_object(compound_filter, CharacteristicLength, doc, algorithm2d, algorithm3d)
     return mesh_object, compound_filter
 
+@tracing.trace_stage('run_elmergrid')
 def run_elmergrid(export_path, mesh_object, out_dir=None, log_file=None):
     """
     Run ElmerGrid as an external process if it found in the operating system.
@@ -713,8 +870,15 @@ def run_elmergrid(export_path, mesh_object, out_dir=None, log_file=None):
     :param export_path: path where the result is written
     :param mesh_object: FreeCAD mesh object that is to be exported
     :param out_dir: directory where to write mesh files (if not given unv file name is used)
-    :param log_file: None or a string.
-    """
+    :param log_file: None or a string. Elmer mesh is stored to mesh cache (see meshcache.py) only if
+                     log_file is given (otherwise ElmerGrid is not waited).
+    """
+    elmer_dir = out_dir if out_dir is not None else os.path.splitext(export_path)[0]
+    key = meshcache.get_object_key(mesh_object.Name)
+    if meshcache.restore_mesh(key, elmer_dir=elmer_dir):
+        FreeCAD.Console.PrintMessage('Elmer mesh restored from cache {}\n'.format(key))
+        return
+    meshcache.release_mesh(elmer_dir=elmer_dir)
     # Export to UNV file for Elmer
     export_objects = [mesh_object]
     Fem.export(export_objects, export_path)
@@ -727,6 +891,8 @@ def run_elmergrid(export_path, mesh_object, out_dir=None, log_file=None):
         with open(log_file, 'w') as f:
             p = subprocess.Popen(elmerGrid_command.split(), stdout=f, stderr=subprocess.STDOUT)
             p.communicate()
+        if p.returncode == 0:
+            meshcache.store_mesh(key, elmer_dir=elmer_dir)
     else:
         from PySide import QtCore, QtGui
         try:
@@ -737,6 +903,20 @@ def run_elmergrid(export_path, mesh_object, out_dir=None, log_file=None):
             QtGui.QMessageBox.critical(None, 'Error', 'Error!!', QtGui.QMessageBox.Abort)
     FreeCAD.Console.PrintMessage('Finished ElmerGrid\n')
 
+def export_elmer_mesh(mesh, out_dir):
+    """
+    Writes Elmer mesh files directly from gmsh mesh without UNV export and ElmerGrid
+    (see elmermeshwriter.write_elmer_mesh).
+
+    :param mesh: A dictionary returned by :meth:`create_mesh_with_gmsh_api` or path to gmsh mesh file (e.g. .msh).
+    :param out_dir: directory where to write mesh files
+    """
+    import elmermeshwriter
+    if not isinstance(mesh, dict):
+        import gmshapi
+        mesh = gmshapi.read_mesh(mesh)
+    elmermeshwriter.write_elmer_mesh(mesh, out_dir)
+
 def export_unv(export_path, mesh_object):
     """
     Exports UNV file for Elmer.
@@ -746,106 +926,155 @@ def export_unv(export_path, mesh_object):
     """
     Fem.export([mesh_object], export_path)
 
-def find_compound_filter_edge(compound_filter, edge):
+def find_compound_filter_solids(compound_filter, solid, point_search=True):
     """
-    Find which edge in the compound filter object is the edge as the one given in second argument.
-    Returns the name of the edge in compound filter.
-
-    :param compound_filter: FreeCAD compound filter.
-    :param edge: FreeCAD edge.
+    Finds all solids in the compound filter object which are inside given solid.
+    Returns a tuple containing all names of the solids in compound filter.
 
-    :return: A string.
+    :param compound_filter: FreeCAD compound filter
+    :param solid: FreeCAD solid object
+    :param point_search: bool
+    :return: tuple
     """
-    for num, c_edge in enumerate(compound_filter.Shape.Edges):
-        if is_same_edge(c_edge, edge):
-            return str(num+1)
-    raise ValueError('Edge not found')
+    solid_name_list = []
+    for num, csolid in enumerate(compound_filter.Shape.Solids):
+        if is_compound_filter_solid_in_solid(csolid, solid, point_search=point_search):
+            solid_name_list.append("Solid" + str(num+1))
+    if len(solid_name_list) == 0:
+        raise ValueError("Solids not found")
+    return tuple(solid_name_list)
 
-def find_compound_filter_boundary(compound_filter, face):
+# Stand-in for compound filter in worker processes (functions only use attribute Shape)
+_CompoundFilterShape = collections.namedtuple('_CompoundFilterShape', ['Shape'])
+# Compound filter and face index of a worker process (see _init_parallel_matching_worker)
+_parallel_matching_data = {}
+
+def _import_shape_from_brep_string(brep_string):
     """
-    Find which face in the compound filter object is the face as the one given in second argument.
-    Returns the name of the face in compound filter.
+    Creates FreeCAD shape from BREP string. Single faces and solids are returned as
+    FreeCAD face and solid objects.
 
-    :param compound_filter: FreeCAD compound filter
-    :param face: FreeCAD face object
-    :return: string
+    :param brep_string: string from shape.exportBrepToString()
+
+    :return: FreeCAD shape object
     """
-    faces = compound_filter.Shape.Faces
-    face_found = None
-    for num, cface in enumerate(faces):
-        if faces_have_same_vertices(cface, face):
-            face_found = num
-    if face_found is None: return None
-    string = "Face" + str(face_found+1)
-    return string
+    shape = Part.Shape()
+    shape.importBrepFromString(brep_string)
+    if shape.ShapeType == 'Face':
+        return shape.Faces[0]
+    if shape.ShapeType == 'Solid':
+        return shape.Solids[0]
+    return shape
 
-def find_compound_filter_solid(compound_filter, solid):
+def _init_parallel_matching_worker(compound_brep_string, search_type):
     """
-    Find which solid in the compound filter object is the solid as the one given in second argument.
-    Returns the name of the solid in compound filter.
+    Initializes worker process for :meth:`find_compound_filter_names`. The compound filter shape
+    is imported only once per worker.
 
-    :param compound_filter: FreeCAD compound filter
-    :param solid: FreeCAD solid object
-    :return: string
+    :param compound_brep_string: BREP string of the compound filter shape
+    :param search_type: 'solids' or 'boundaries'
     """
-    solids = compound_filter.Shape.Solids
-    solid_found = None
-    for num, csolid in enumerate(solids):
-        if solids_are_the_same(csolid, solid):
-            solid_found = num
-    if solid_found is None: return None
-    string = "Solid" + str(solid_found+1)
-    return string
+    compound_filter = _CompoundFilterShape(_import_shape_from_brep_string(compound_brep_string))
+    _parallel_matching_data['compound_filter'] = compound_filter
+    if search_type == 'boundaries':
+        _parallel_matching_data['face_index'] = create_compound_filter_face_index(compound_filter)
 
-def find_compound_filter_boundaries(compound_filter, face, used_compound_face_names=None):
+def _find_compound_filter_names_worker(task):
     """
-    Finds all faces in the compound filter object which are inside given face.
-    Returns a tuple containing all names of the faces in compound filter.
-    If list used_compound_face_names is given checks that found face is not already used and
-    face is not already found here (relates to argument 'separate_boundaries' in other functions).
+    Worker function for :meth:`find_compound_filter_names`.
 
-    :param compound_filter: FreeCAD compound filter
-    :param face: FreeCAD face object
-    :param used_compound_face_names: None or a list.
-    :return: tuple
+    :param task: tuple (search_type, BREP string of the shape, point_search)
+
+    :return: tuple containing compound filter names
     """
-    face_name_list, already_found_cfaces = [], []
-    for num, cface in enumerate(compound_filter.Shape.Faces):
-        if is_face_in_face(cface, face):
-            f_name = "Face" + str(num+1)
-            if used_compound_face_names is not None:
-                if f_name in used_compound_face_names:
-                    continue
-                face_already_found = False
-                for found_cface in already_found_cfaces:
-                    if is_face_in_face(cface, found_cface):
-                        face_already_found = True
-                        break
-                if face_already_found:
-                    continue
-                already_found_cfaces.append(cface)
-            face_name_list.append(f_name)
-    if len(face_name_list) == 0:
-        raise ValueError("Faces not found")
-    return tuple(face_name_list)
+    search_type, brep_string, point_search = task
+    shape = _import_shape_from_brep_string(brep_string)
+    compound_filter = _parallel_matching_data['compound_filter']
+    if search_type == 'solids':
+        return find_compound_filter_solids(compound_filter, shape, point_search)
+    return find_compound_filter_boundaries(compound_filter, shape, face_index=_parallel_matching_data['face_index'])
 
-def find_compound_filter_solids(compound_filter, solid, point_search=True):
+def _find_separate_compound_filter_boundaries(compound_filter, faces, face_index=None):
     """
-    Finds all solids in the compound filter object which are inside given solid.
-    Returns a tuple containing all names of the solids in compound filter.
+    Finds compound filter boundaries for faces so that each compound filter face is found only
+    once (see used_compound_face_names in :meth:`find_compound_filter_boundaries`).
 
     :param compound_filter: FreeCAD compound filter
-    :param solid: FreeCAD solid object
-    :param point_search: bool
-    :return: tuple
-    """
-    solid_name_list = []
-    for num, csolid in enumerate(compound_filter.Shape.Solids):
-        if is_compound_filter_solid_in_solid(csolid, solid, point_search=point_search):
-            solid_name_list.append("Solid" + str(num+1))
-    if len(solid_name_list) == 0:
-        raise ValueError("Solids not found")
-    return tuple(solid_name_list)
+    :param faces: list of FreeCAD face objects
+    :param face_index: None or index from :meth:`create_compound_filter_face_index`
+
+    :return: list of tuples containing compound filter names
+    """
+    if face_index is None:
+        face_index = create_compound_filter_face_index(compound_filter)
+    all_found_cface_names = set()
+    cface_names_list = []
+    for face in faces:
+        cface_names = find_compound_filter_boundaries(compound_filter, face,
+                                                      used_compound_face_names=all_found_cface_names,
+                                                      face_index=face_index)
+        all_found_cface_names.update(cface_names)
+        cface_names_list.append(cface_names)
+    return cface_names_list
+
+def find_compound_filter_names(compound_filter, shapes, search_type='solids', point_search=True, processes=None,
+                               face_index=None, cache_file=None):
+    """
+    Finds compound filter names for all shapes with :meth:`find_compound_filter_solids` (search_type 'solids')
+    or :meth:`find_compound_filter_boundaries` (search_type 'boundaries' or 'separate_boundaries').
+
+    If processes is greater than one the shapes are matched in a process pool. The compound filter
+    shape and the shapes are serialized to BREP strings and the compound filter is imported once
+    per worker process. The results are returned in the same order as the shapes.
+    Search type 'separate_boundaries' is always done serially.
+
+    If cache_file is given, the names are stored in it with a fingerprint of the compound filter
+    and the shapes (see :mod:`referencecache`). When the geometry is unchanged the names are
+    read from the cache without matching.
+
+    :param compound_filter: FreeCAD compound filter
+    :param shapes: list of FreeCAD solid or face objects
+    :param search_type: 'solids', 'boundaries' or 'separate_boundaries'
+    :param point_search: bool (only used with solids)
+    :param processes: None or integer (number of worker processes)
+    :param face_index: None or index from :meth:`create_compound_filter_face_index` (serial boundary search)
+    :param cache_file: None or path to reference cache file (e.g. referencecache.get_default_cache_file())
+
+    :return: list of tuples containing compound filter names
+    """
+    if search_type not in ['solids', 'boundaries', 'separate_boundaries']:
+        raise ValueError("Wrong keyword for search_type variable, should be: solids, boundaries or separate_boundaries!")
+    if cache_file is not None:
+        fingerprint = referencecache.create_geometry_fingerprint(compound_filter.Shape, shapes,
+                                                                 [search_type, point_search])
+        names_list = referencecache.load_reference_names(cache_file, fingerprint)
+        if names_list is not None:
+            return names_list
+        names_list = find_compound_filter_names(compound_filter, shapes, search_type, point_search, processes,
+                                                face_index)
+        referencecache.save_reference_names(cache_file, fingerprint, names_list)
+        return names_list
+    if search_type == 'separate_boundaries':
+        return _find_separate_compound_filter_boundaries(compound_filter, shapes, face_index)
+    if processes is None or processes < 2 or len(shapes) < 2:
+        if search_type == 'solids':
+            return [find_compound_filter_solids(compound_filter, shape, point_search) for shape in shapes]
+        if face_index is None:
+            face_index = create_compound_filter_face_index(compound_filter)
+        return [find_compound_filter_boundaries(compound_filter, shape, face_index=face_index) for shape in shapes]
+    compound_brep_string = compound_filter.Shape.exportBrepToString()
+    tasks = [(search_type, shape.exportBrepToString(), point_search) for shape in shapes]
+    try:
+        context = multiprocessing.get_context('fork')  # workers inherit already imported FreeCAD modules
+    except (AttributeError, ValueError):
+        context = multiprocessing
+    pool = context.Pool(processes, initializer=_init_parallel_matching_worker,
+                        initargs=(compound_brep_string, search_type))
+    try:
+        return pool.map(_find_compound_filter_names_worker, tasks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
 
 """ 
 There is no topological naming in FreeCAD. Further, the face numbers are changed in 
@@ -926,6 +1155,7 @@ def add_symmetry_plane_faces_in_entity_list(entity_list, geom_object, plane, mes
     """
     Adds symmetry plane faces using add_geom_obj_list_in_entitylist(entity_list, name, geom_obj_list, mesh_sizes=None)
     """
+    ensure_recomputed([geom_object])
     faces_in_symmetry_plane = faces_with_vertices_in_symmetry_plane(geom_object.Shape.Faces, plane)
     add_geom_obj_list_in_entitylist(entity_list, plane, faces_in_symmetry_plane)
 
@@ -983,6 +1213,7 @@ def pick_faces_from_geometry(geom_object, face_picks, mesh_sizes=None):
     :return: list
     """
     faces = []
+    ensure_recomputed([geom_object])
     face_objects = geom_object.Shape.Faces
     for face_pick in face_picks:
         face_name = face_pick[0]
@@ -1110,29 +1341,36 @@ def find_lines_to_transfinite_mesh_params(compound_filter, entities_dict):
     :param compound_filter: FreeCAD compound filter.
     :param entities_dict: A dictionary containing transfinite_mesh_params.
     """
+    edge_index = None
     for mesh_param_dict in entities_dict['transfinite_mesh_params']:
         for line_param_dict in mesh_param_dict.get('line_params', []):
+            if edge_index is None:
+                edge_index = create_compound_filter_edge_index(compound_filter)
             line_ids = []
             for edge in line_param_dict['edges']:
-                line_ids.append(find_compound_filter_edge(compound_filter, edge))
+                line_ids.append(find_compound_filter_edge(compound_filter, edge, edge_index))
             line_param_dict['lines'] = line_ids
 
-def merge_boundaries(mesh_object, compound_filter, doc, face_entity_dict, compound_face_names, face_name_list,
-                     surface_objs, surface_objs_by_compound_face_names, surface_object=None):
+def merge_boundaries(mesh_object, doc, face_entity_dict, compound_face_names, surface_objs, surface_indices_by_name,
+                     surface_objs_by_compound_face_names, cface_names_by_surface, surface_object=None):
     """
     If face in compound_faces is already added to surface:
         - renames surface if there was only one face in existing
         - removes face from existing surface and creates a new surface for merged face
     Creates new surface object (MeshGroup) for compound_faces if needed and surface_object is not given.
 
+    References of the surface objects are not updated here. Compound face names of each surface object
+    are collected to cface_names_by_surface and set to the References once all faces are handled.
+
     :param mesh_object: FreeCAD mesh object
-    :param compound_filter: FreeCAD compound filter
     :param doc: FreeCAD document.
     :param face_entity_dict: dictionary
     :param compound_face_names: tuple containing compound face names in face
-    :param face_name_list: list containing already handled face names
-    :param surface_objs: list containing created surface objects same order as in face_name_list
+    :param surface_objs: list containing created surface objects
+    :param surface_indices_by_name: dictionary (surface name to sorted list of indices in surface_objs,
+                                    first index is the surface object used for the name)
     :param surface_objs_by_compound_face_names: dictionary (for checking if face needs to be merged)
+    :param cface_names_by_surface: dictionary (surface object Name to list containing compound face names)
     :param surface_object: None or already created surface object
     :return: tuple containing surface object and tuple containing filtered compound names
     """
@@ -1143,30 +1381,32 @@ def merge_boundaries(mesh_object, compound_filter, doc, face_entity_dict, compou
             old_face_name = surf_obj.Label
             new_face_name = '{}_{}'.format(old_face_name, face_entity_dict['name'])
 
-            old_found_cface_names = surf_obj.References[0][1]
+            old_found_cface_names = cface_names_by_surface[surf_obj.Name]
             filtered_old_found_cface_names = [cfname_i for cfname_i in old_found_cface_names if cfname_i != cface_name]
             if len(filtered_old_found_cface_names) == 0:
                 # existing mesh object with new label
                 surf_obj.Label = new_face_name
-                # update face name in face_name_list
-                index_found = face_name_list.index(old_face_name)
-                face_name_list[index_found] = new_face_name
+                # update face name in surface_indices_by_name
+                index_found = surface_indices_by_name[old_face_name].pop(0)
+                if len(surface_indices_by_name[old_face_name]) == 0:
+                    del surface_indices_by_name[old_face_name]
+                bisect.insort(surface_indices_by_name.setdefault(new_face_name, []), index_found)
             else:
-                # update references for existing mesh group
-                surf_obj.References = [(compound_filter, tuple(filtered_old_found_cface_names))]
+                # update compound face names of existing mesh group
+                cface_names_by_surface[surf_obj.Name] = filtered_old_found_cface_names
                 # handle merged boundary
-                if new_face_name in face_name_list:
+                if new_face_name in surface_indices_by_name:
                     # add merged boundary to existing mesh group
-                    surface_index = face_name_list.index(new_face_name)
-                    found_cface_names = surface_objs[surface_index].References[0][1]
-                    surface_objs[surface_index].References = [(compound_filter, found_cface_names+tuple([cface_name]))]
+                    surface_index = surface_indices_by_name[new_face_name][0]
+                    cface_names_by_surface[surface_objs[surface_index].Name].append(cface_name)
                 else:
                     # create new mesh group for merged boundary
-                    surface_objs.append(create_mesh_group_and_set_mesh_size(mesh_object, doc, new_face_name,
-                                                                            face_entity_dict['mesh size']))
-                    surface_objs[-1].References = [(compound_filter, tuple([cface_name]))]
-                    face_name_list.append(new_face_name)
-                    surface_objs_by_compound_face_names[cface_name] = surface_objs[-1]
+                    merged_surface_obj = create_mesh_group_and_set_mesh_size(mesh_object, doc, new_face_name,
+                                                                             face_entity_dict['mesh size'])
+                    surface_objs.append(merged_surface_obj)
+                    surface_indices_by_name[new_face_name] = [len(surface_objs)-1]
+                    cface_names_by_surface[merged_surface_obj.Name] = [cface_name]
+                    surface_objs_by_compound_face_names[cface_name] = merged_surface_obj
         else:
             filtered_compound_faces.append(cface_name)
             # create new mesh group only once if needed
@@ -1177,7 +1417,9 @@ def merge_boundaries(mesh_object, compound_filter, doc, face_entity_dict, compou
 
     return surface_object, tuple(filtered_compound_faces)
 
-def find_boundaries_with_entities_dict(mesh_object, compound_filter, entities_dict, doc, separate_boundaries=False):
+@tracing.trace_stage('find_boundaries_with_entities_dict')
+def find_boundaries_with_entities_dict(mesh_object, compound_filter, entities_dict, doc, separate_boundaries=False,
+                                       processes=None, cache_file=None):
     """
     For all faces in entities_dict, the same face in compound filter is added to a Mesh Group.
     All faces with same name in entities_dict are merged into one Mesh Group with the original name.
@@ -1189,49 +1431,51 @@ def find_boundaries_with_entities_dict(mesh_object, compound_filter, entities_di
     :param entities_dict: entities dictionary
     :param doc: FreeCAD document.
     :param separate_boundaries: Boolean.
+    :param processes: None or integer. Number of processes used for matching faces
+                      (see :meth:`find_compound_filter_names`). Not used with separate_boundaries,
+                      which needs the faces found before.
+    :param cache_file: None or path to reference cache file (see :meth:`find_compound_filter_names`).
     :return: list containing MeshGroup objects with mesh size.
     """
     surface_objs = []
-    face_name_list = []
-    all_found_cface_names = []  # needed only for separate boundaries
+    surface_indices_by_name = {}
     surface_objs_by_cface_names = {}
+    cface_names_by_surface = {}
+    if separate_boundaries:
+        search_type = 'separate_boundaries'
+    else:
+        search_type = 'boundaries'
+    cface_names_list = find_compound_filter_names(compound_filter,
+                                                  [face['geometric object'] for face in entities_dict['faces']],
+                                                  search_type, processes=processes, cache_file=cache_file)
     for num, face in enumerate(entities_dict['faces']):
-        if face['name'] in face_name_list:
+        if face['name'] in surface_indices_by_name:
             # Old name, do not create new MeshGroup
-            index_found = face_name_list.index(face['name'])
-            found_cface_names = surface_objs[index_found].References[0][1]
-            if separate_boundaries:
-                cface_names = find_compound_filter_boundaries(compound_filter, face['geometric object'],
-                                                              used_compound_face_names=all_found_cface_names)
-                all_found_cface_names.extend(cface_names)
-            else:
-                cface_names = find_compound_filter_boundaries(compound_filter, face['geometric object'])
-            surface_obj, filtered_cface_names = merge_boundaries(mesh_object, compound_filter, doc, face,
-                                                                 cface_names, face_name_list, surface_objs,
-                                                                 surface_objs_by_cface_names,
-                                                                 surface_object=surface_objs[index_found])
+            surface_object = surface_objs[surface_indices_by_name[face['name']][0]]
+            found_cface_names = list(cface_names_by_surface[surface_object.Name])
+            surface_obj, filtered_cface_names = merge_boundaries(mesh_object, doc, face, cface_names_list[num],
+                                                                 surface_objs, surface_indices_by_name,
+                                                                 surface_objs_by_cface_names, cface_names_by_surface,
+                                                                 surface_object=surface_object)
             if len(filtered_cface_names) > 0:
-                surface_obj.References = [(compound_filter, found_cface_names+filtered_cface_names)]
+                cface_names_by_surface[surface_obj.Name] = found_cface_names+list(filtered_cface_names)
         else:
             # New name, create new MeshGroup
-            if separate_boundaries:
-                cface_names = find_compound_filter_boundaries(compound_filter, face['geometric object'],
-                                                              used_compound_face_names=all_found_cface_names)
-                all_found_cface_names.extend(cface_names)
-            else:
-                cface_names = find_compound_filter_boundaries(compound_filter, face['geometric object'])
-            if all_found_cface_names is not None:
-                all_found_cface_names.extend(cface_names)
-            surface_obj, filtered_cface_names = merge_boundaries(mesh_object, compound_filter, doc, face,
-                                                                 cface_names, face_name_list, surface_objs,
-                                                                 surface_objs_by_cface_names, surface_object=None)
+            surface_obj, filtered_cface_names = merge_boundaries(mesh_object, doc, face, cface_names_list[num],
+                                                                 surface_objs, surface_indices_by_name,
+                                                                 surface_objs_by_cface_names, cface_names_by_surface,
+                                                                 surface_object=None)
             if len(filtered_cface_names) > 0:  # new surface_obj is already created
-                surface_obj.References = [(compound_filter, filtered_cface_names)]
                 surface_objs.append(surface_obj)
-                face_name_list.append(face['name'])
+                surface_indices_by_name[face['name']] = [len(surface_objs)-1]
+                cface_names_by_surface[surface_obj.Name] = list(filtered_cface_names)
+    for surface_obj in surface_objs:
+        surface_obj.References = [(compound_filter, tuple(cface_names_by_surface[surface_obj.Name]))]
     return surface_objs
 
-def find_bodies_with_entities_dict(mesh_object, compound_filter, entities_dict, doc, point_search=True):
+@tracing.trace_stage('find_bodies_with_entities_dict')
+def find_bodies_with_entities_dict(mesh_object, compound_filter, entities_dict, doc, point_search=True,
+                                   processes=None, cache_file=None):
     """
     For all solids in entities_dict, the same solid in compound filter is added to a Mesh Group.
     All solids with same name in entities_dict are merged into one Mesh Group with the original name.
@@ -1241,27 +1485,119 @@ def find_bodies_with_entities_dict(mesh_object, compound_filter, entities_dict,
     :param entities_dict: entities dictionary
     :param doc: FreeCAD document.
     :param point_search: bool
+    :param processes: None or integer. Number of processes used for matching solids
+                      (see :meth:`find_compound_filter_names`).
+    :param cache_file: None or path to reference cache file (see :meth:`find_compound_filter_names`).
     :return: list containing MeshGroup objects with mesh size.
     """
     solid_objs = []
-    solid_name_list = []
+    csolid_names_by_name = collections.OrderedDict()
+    csolid_names_list = find_compound_filter_names(compound_filter,
+                                                   [solid['geometric object'].Shape for solid in entities_dict['solids']],
+                                                   'solids', point_search, processes, cache_file=cache_file)
     for num, solid in enumerate(entities_dict['solids']):
-        if solid['name'] in solid_name_list:
-            # Old name, do not create new MeshGroup
-            index_found = solid_name_list.index(solid['name'])
-            found_csolid_names = solid_objs[index_found].References[0][1]
-            csolid_names = find_compound_filter_solids(compound_filter, solid['geometric object'].Shape, point_search)
-            found_csolid_names = found_csolid_names + csolid_names
-            solid_objs[index_found].References = [(compound_filter, found_csolid_names)]
-        else:
+        if solid['name'] not in csolid_names_by_name:
             # New name, create new MeshGroup
             solid_objs.append(create_mesh_group_and_set_mesh_size(mesh_object, doc, solid['name'], solid['mesh size']))
-            csolid_names = find_compound_filter_solids(compound_filter, solid['geometric object'].Shape, point_search)
-            solid_objs[-1].References = [(compound_filter, csolid_names)]
-            solid_name_list.append(solid['name'])
+            csolid_names_by_name[solid['name']] = []
+        csolid_names_by_name[solid['name']].extend(csolid_names_list[num])
+    for solid_obj, csolid_names in zip(solid_objs, csolid_names_by_name.values()):
+        solid_obj.References = [(compound_filter, tuple(csolid_names))]
     return solid_objs
 
-def define_mesh_sizes_with_mesh_groups(mesh_object, mesh_group_list, doc, ignore_list=None):
+# Aggregated mesh size fields {mesh object name: {'object': mesh object, 'sizes': {mesh size: [solid names]},
+#                                                 'gradings': [dicts]}}
+_mesh_size_fields = {}
+
+def _get_mesh_size_fields(mesh_object, create=False):
+    """
+    Returns aggregated mesh size fields of mesh object. Fields stored for another object with
+    the same name (e.g. from an earlier document of a sweep) are removed.
+
+    :param mesh_object: FreeCAD mesh object
+    :param create: bool. If True, empty fields are created when not found.
+
+    :return: None or a dictionary.
+    """
+    fields = _mesh_size_fields.get(mesh_object.Name)
+    if fields is not None and fields['object'] is not mesh_object:
+        del _mesh_size_fields[mesh_object.Name]
+        fields = None
+    if fields is None and create:
+        fields = {'object': mesh_object, 'sizes': collections.OrderedDict(), 'gradings': []}
+        _mesh_size_fields[mesh_object.Name] = fields
+    return fields
+
+def add_mesh_size_field(mesh_object, mesh_size, solid_names):
+    """
+    Adds solids to aggregated mesh size fields of mesh object. Solids with the same mesh size
+    are written to one gmsh Constant field (see meshutils.add_size_fields_to_geo_file) instead of
+    creating a MeshRegion object per solid.
+
+    :param mesh_object: FreeCAD mesh object
+    :param mesh_size: A float.
+    :param solid_names: list containing compound filter solid names e.g. ['Solid1', 'Solid3'].
+    """
+    for name in solid_names:
+        if not name.startswith('Solid'):
+            raise ValueError('Mesh size field can be added only to solids, got {}'.format(name))
+    fields = _get_mesh_size_fields(mesh_object, create=True)
+    fields['sizes'].setdefault(float(mesh_size), []).extend(solid_names)
+
+def add_mesh_size_grading(mesh_object, boundary_name, mesh_size, distance_min, distance_max, mesh_size_max=None):
+    """
+    Adds distance based mesh size grading from named boundary (gmsh Distance and Threshold fields).
+    Mesh size is mesh_size closer than distance_min from the boundary and grows linearly
+    to mesh_size_max at distance_max.
+
+    :param mesh_object: FreeCAD mesh object
+    :param boundary_name: A string (name of boundary mesh group).
+    :param mesh_size: A float.
+    :param distance_min: A float.
+    :param distance_max: A float.
+    :param mesh_size_max: None or a float. If None, the largest aggregated mesh size or CharacteristicLengthMax
+                          of mesh object is used.
+    """
+    fields = _get_mesh_size_fields(mesh_object, create=True)
+    fields['gradings'].append({'boundary': boundary_name, 'size': mesh_size, 'distance min': distance_min,
+                               'distance max': distance_max, 'size max': mesh_size_max})
+
+def clear_mesh_size_fields(mesh_object):
+    """
+    Removes aggregated mesh size fields and gradings of mesh object.
+
+    :param mesh_object: FreeCAD mesh object
+    """
+    _mesh_size_fields.pop(mesh_object.Name, None)
+
+def get_mesh_size_field_params(mesh_object, group_elements):
+    """
+    Returns aggregated mesh size fields of mesh object with gmsh entity ids.
+
+    :param mesh_object: FreeCAD mesh object
+    :param group_elements: A dictionary {mesh group label: [element names]} (gmshtools.GmshTools.group_elements).
+
+    :return: None or a dictionary (see meshutils.get_size_field_geo_file_lines).
+    """
+    fields = _get_mesh_size_fields(mesh_object)
+    if not fields or not (fields['sizes'] or fields['gradings']):
+        return None
+    sizes = collections.OrderedDict((size, [name[len('Solid'):] for name in names])
+                                    for size, names in fields['sizes'].items())
+    gradings = []
+    for grading in fields['gradings']:
+        if grading['boundary'] not in group_elements:
+            raise ValueError('Boundary {} not found from mesh groups'.format(grading['boundary']))
+        size_max = grading['size max']
+        if size_max is None:
+            size_max = max(sizes) if sizes else mesh_object.CharacteristicLengthMax.Value
+        gradings.append({'surfaces': [name[len('Face'):] for name in group_elements[grading['boundary']]
+                                      if name.startswith('Face')],
+                         'size': grading['size'], 'distance min': grading['distance min'],
+                         'distance max': grading['distance max'], 'size max': size_max})
+    return {'sizes': sizes, 'gradings': gradings}
+
+def define_mesh_sizes_with_mesh_groups(mesh_object, mesh_group_list, doc, ignore_list=None, aggregate=False):
     """
     Meshregions are needed to have regionwise mesh density parameters.
     The mesh element length is the third parameter given in makeMeshRegion.
@@ -1272,15 +1608,23 @@ def define_mesh_sizes_with_mesh_groups(mesh_object, mesh_group_list, doc, ignore
     :param mesh_group_list: list containing MeshGroups
     :param doc: FreeCAD document.
     :param ignore_list: None or list containing solid names which mesh size is not defined.
+    :param aggregate: bool. If True, solid mesh groups are grouped by mesh size to gmsh size fields
+                      (see :meth:`add_mesh_size_field`) instead of creating MeshRegion objects.
+                      MeshRegion objects are still created for mesh groups of other elements (e.g. faces).
     """
     if ignore_list is None:
         ignore_list = []
     for mesh_group in mesh_group_list:
         if mesh_group.Label not in ignore_list:
+            if aggregate and all(name.startswith('Solid') for name in mesh_group.References[0][1]):
+                add_mesh_size_field(mesh_object, mesh_group.mesh_size, mesh_group.References[0][1])
+                continue
             mesh_region = ObjectsFem.makeMeshRegion(doc, mesh_object, mesh_group.mesh_size, mesh_group.Name+'_region')
             mesh_region.References = [(mesh_group.References[0][0], mesh_group.References[0][1])]
 
-def define_mesh_sizes(mesh_object, compound_filter, entities_dict, doc, point_search=True, ignore_list=None):
+@tracing.trace_stage('define_mesh_sizes')
+def define_mesh_sizes(mesh_object, compound_filter, entities_dict, doc, point_search=True, ignore_list=None,
+                      processes=None, cache_file=None, aggregate=False):
     """
     Meshregions are needed to have regionwise mesh density parameters. 
     The mesh element length is the third parameter given in makeMeshRegion. 
@@ -1291,25 +1635,30 @@ def define_mesh_sizes(mesh_object, compound_filter, entities_dict, doc, point_se
     :param doc: FreeCAD document.
     :param point_search: bool
     :param ignore_list: None or list containing solid names which mesh size is not defined.
+    :param processes: None or integer. Number of processes used for matching solids
+                      (see :meth:`find_compound_filter_names`).
+    :param cache_file: None or path to reference cache file (see :meth:`find_compound_filter_names`).
+    :param aggregate: bool. If True, solids are grouped by mesh size to gmsh size fields
+                      (see :meth:`add_mesh_size_field`) instead of creating MeshRegion objects.
     """
     if ignore_list is None:
         ignore_list = []
     solid_objs = []
-    solid_name_list = []
-    for num, solid in enumerate(entities_dict['solids']):
-        if solid['name'] in ignore_list:
-            continue
-        if solid['name'] in solid_name_list:
-            # Old name, do not create new MeshGroup
-            index_found = solid_name_list.index(solid['name'])
-            found_csolid_names = solid_objs[index_found].References[0][1]
-            csolid_names = find_compound_filter_solids(compound_filter, solid['geometric object'].Shape, point_search)
-            solid_objs[index_found].References = [(compound_filter, found_csolid_names+csolid_names)]
-        else:
-            # New name, create new MeshGroup
+    csolid_names_by_name = collections.OrderedDict()
+    solids = [solid for solid in entities_dict['solids'] if solid['name'] not in ignore_list]
+    csolid_names_list = find_compound_filter_names(compound_filter, [solid['geometric object'].Shape for solid in solids],
+                                                   'solids', point_search, processes, cache_file=cache_file)
+    if aggregate:
+        for num, solid in enumerate(solids):
+            add_mesh_size_field(mesh_object, solid['mesh size'], csolid_names_list[num])
+        return
+    for num, solid in enumerate(solids):
+        if solid['name'] not in csolid_names_by_name:
+            # New name, create new MeshRegion
             solid_objs.append(ObjectsFem.makeMeshRegion(doc, mesh_object, solid['mesh size'], solid['name']+'_region'))
-            csolid_names = find_compound_filter_solids(compound_filter, solid['geometric object'].Shape, point_search)
-            solid_objs[-1].References = [(compound_filter, csolid_names)]
-            solid_name_list.append(solid['name'])
+            csolid_names_by_name[solid['name']] = []
+        csolid_names_by_name[solid['name']].extend(csolid_names_list[num])
+    for solid_obj, csolid_names in zip(solid_objs, csolid_names_by_name.values()):
+        solid_obj.References = [(compound_filter, tuple(csolid_names))]
 
 
@@ -0,0 +1,312 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import os
+
+import numpy
+
+import tracing
+
+# gmsh element type: (Elmer element type, permutation of gmsh node order to Elmer node order)
+gmsh_to_elmer_element_types = {15: (101, None),
+                               1: (202, None),
+                               8: (203, None),
+                               2: (303, None),
+                               9: (306, None),
+                               3: (404, None),
+                               16: (408, None),
+                               10: (409, None),
+                               4: (504, None),
+                               11: (510, [0, 1, 2, 3, 4, 5, 6, 7, 9, 8]),
+                               7: (605, None),
+                               19: (613, [0, 1, 2, 3, 4, 5, 8, 10, 6, 7, 9, 11, 12]),
+                               6: (706, None),
+                               18: (715, [0, 1, 2, 3, 4, 5, 6, 9, 7, 8, 10, 11, 12, 14, 13]),
+                               5: (808, None),
+                               17: (820, [0, 1, 2, 3, 4, 5, 6, 7, 8, 11, 13, 9, 10, 12, 14, 15, 16, 18, 19, 17])}
+
+# Elmer element family: corner node indices of element facets (edges of 2D elements, faces of 3D elements)
+_element_facets = {3: [(0, 1), (1, 2), (2, 0)],
+                   4: [(0, 1), (1, 2), (2, 3), (3, 0)],
+                   5: [(0, 1, 2), (0, 1, 3), (1, 2, 3), (0, 2, 3)],
+                   6: [(0, 1, 2, 3), (0, 1, 4), (1, 2, 4), (2, 3, 4), (3, 0, 4)],
+                   7: [(0, 1, 2), (3, 4, 5), (0, 1, 4, 3), (1, 2, 5, 4), (2, 0, 3, 5)],
+                   8: [(0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6), (3, 0, 4, 7)]}
+
+# Elmer element family: number of corner nodes of boundary element
+_element_corners = {1: 1, 2: 2, 3: 3, 4: 4}
+
+
+def get_elmer_elements(elements):
+    """
+    Converts gmsh elements to Elmer element types and node order.
+
+    :param elements: A dictionary {gmsh element type: (element tags, element node tags)}
+                     (see gmshapi.get_physical_group_elements).
+
+    :return: A list containing tuples (Elmer element type, element node tags) sorted by Elmer element type.
+    """
+    elmer_elements = []
+    for gmsh_type, (_, node_tags) in elements.items():
+        if gmsh_type not in gmsh_to_elmer_element_types:
+            raise ValueError('gmsh element type {} is not supported'.format(gmsh_type))
+        elmer_type, permutation = gmsh_to_elmer_element_types[gmsh_type]
+        if permutation is not None:
+            node_tags = node_tags[:, permutation]
+        elmer_elements.append((elmer_type, node_tags))
+    return sorted(elmer_elements, key=lambda item: item[0])
+
+
+def _get_facet_keys(node_tags, corners):
+    """
+    Returns sorted corner node tags of facets padded with -1 to four columns.
+
+    :param node_tags: A numpy array (elements, nodes per element).
+    :param corners: A list containing tuples of corner node indices (one tuple per facet).
+
+    :return: A numpy array (elements*facets, 4).
+    """
+    keys = -numpy.ones((len(node_tags), len(corners), 4), dtype=numpy.int64)
+    for num, facet in enumerate(corners):
+        keys[:, num, 4-len(facet):] = numpy.sort(node_tags[:, facet], axis=1)
+    return keys.reshape(-1, 4)
+
+
+def _get_row_classes(keys):
+    """
+    Returns class indices of rows, equal rows get the same class index.
+
+    :param keys: A numpy array (rows, 4) containing non-negative integers or -1.
+
+    :return: A numpy array (rows,).
+    """
+    if keys.max() < 2**31 - 1:  # pack two columns to one integer
+        keys = (keys[:, 0::2] + 1) * 2**32 + (keys[:, 1::2] + 1)
+    order = numpy.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+    changes = numpy.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+    classes = numpy.empty(len(keys), dtype=numpy.int64)
+    classes[order] = numpy.concatenate([[0], numpy.cumsum(changes)])
+    return classes
+
+
+def find_boundary_parents(bulk_blocks, boundary_blocks):
+    """
+    Finds parent bulk elements of boundary elements by matching sorted corner nodes of
+    boundary elements to facets of bulk elements.
+
+    :param bulk_blocks: A list containing tuples (Elmer element type, element node tags, first element index).
+    :param boundary_blocks: A list containing tuples (Elmer element type, element node tags).
+
+    :return: A list containing numpy arrays (boundary elements, 2) of parent element indices
+             (0 if parent does not exist), one array per boundary block.
+    """
+    facet_keys, facet_elements = [], []
+    for elmer_type, node_tags, first_index in bulk_blocks:
+        corners = _element_facets.get(elmer_type // 100)
+        if corners is None:
+            continue
+        facet_keys.append(_get_facet_keys(node_tags, corners))
+        indices = numpy.arange(first_index, first_index + len(node_tags), dtype=numpy.int64)
+        facet_elements.append(numpy.repeat(indices, len(corners)))
+    boundary_keys = [_get_facet_keys(node_tags, [tuple(range(_element_corners.get(elmer_type // 100, 4)))])
+                     for elmer_type, node_tags in boundary_blocks]
+    nof_facets = sum(len(keys) for keys in facet_keys)
+    if nof_facets == 0 or not boundary_keys:
+        return [numpy.zeros((len(node_tags), 2), dtype=numpy.int64) for _, node_tags in boundary_blocks]
+    classes = _get_row_classes(numpy.concatenate(facet_keys + boundary_keys))
+    facet_classes = classes[:nof_facets]
+    facet_elements = numpy.concatenate(facet_elements)
+    order = numpy.argsort(facet_classes, kind='stable')
+    sorted_classes = facet_classes[order]
+    sorted_elements = facet_elements[order]
+    parents = []
+    start = nof_facets
+    for keys in boundary_keys:
+        boundary_classes = classes[start:start+len(keys)]
+        start += len(keys)
+        first = numpy.searchsorted(sorted_classes, boundary_classes, side='left')
+        count = numpy.searchsorted(sorted_classes, boundary_classes, side='right') - first
+        block_parents = numpy.zeros((len(keys), 2), dtype=numpy.int64)
+        block_parents[:, 0] = numpy.where(count > 0, sorted_elements[numpy.minimum(first, nof_facets-1)], 0)
+        block_parents[:, 1] = numpy.where(count > 1, sorted_elements[numpy.minimum(first+1, nof_facets-1)], 0)
+        parents.append(block_parents)
+    return parents
+
+
+def _write_rows(f, rows, row_format, chunk_size=100000):
+    """
+    Writes rows of numpy array to file. Rows are formatted in chunks with one format operation.
+
+    :param f: A file object.
+    :param rows: A numpy array (rows, columns).
+    :param row_format: A string e.g. '%d %d %d\n'.
+    :param chunk_size: An integer.
+    """
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start+chunk_size]
+        f.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def _get_int_row_format(columns):
+    """
+    Returns row format for integer columns.
+
+    :param columns: An integer.
+
+    :return: A string.
+    """
+    return ' '.join(['%d'] * columns) + '\n'
+
+
+def _get_mesh_blocks(mesh_data):
+    """
+    Returns bulk and boundary element blocks of mesh data. Groups of the highest dimension are
+    bodies, groups of lower dimension are boundaries. Bodies and boundaries are numbered from
+    one in order of groups.
+
+    :param mesh_data: A dictionary (see gmshapi.get_mesh_data).
+
+    :return: A tuple (body names, boundary names, bulk blocks, boundary blocks). Blocks are lists
+             containing tuples (body or boundary index, Elmer element type, element node tags).
+    """
+    groups = mesh_data['groups']
+    if not groups:
+        raise ValueError('Mesh does not contain physical groups')
+    bulk_dimension = max(group['dimension'] for group in groups.values())
+    body_names, boundary_names, bulk_blocks, boundary_blocks = [], [], [], []
+    for name, group in groups.items():
+        if group['dimension'] == bulk_dimension:
+            names, blocks = body_names, bulk_blocks
+        else:
+            names, blocks = boundary_names, boundary_blocks
+        names.append(name)
+        for elmer_type, node_tags in get_elmer_elements(group['elements']):
+            blocks.append((len(names), elmer_type, node_tags))
+    return body_names, boundary_names, bulk_blocks, boundary_blocks
+
+
+def _write_header(directory, nof_nodes, bulk_blocks, boundary_blocks):
+    """
+    Writes mesh.header file.
+
+    :param directory: A string.
+    :param nof_nodes: An integer.
+    :param bulk_blocks: A list (see function _get_mesh_blocks).
+    :param boundary_blocks: A list (see function _get_mesh_blocks).
+    """
+    type_counts = {}
+    for _, elmer_type, node_tags in bulk_blocks + boundary_blocks:
+        type_counts[elmer_type] = type_counts.get(elmer_type, 0) + len(node_tags)
+    with open(os.path.join(directory, 'mesh.header'), 'w') as f:
+        f.write('{} {} {}\n'.format(nof_nodes, sum(len(block[2]) for block in bulk_blocks),
+                                    sum(len(block[2]) for block in boundary_blocks)))
+        f.write('{}\n'.format(len(type_counts)))
+        for elmer_type in sorted(type_counts, reverse=True):
+            f.write('{} {}\n'.format(elmer_type, type_counts[elmer_type]))
+
+
+def _write_names(directory, body_names, boundary_names):
+    """
+    Writes mesh.names file (same format as ElmerGrid option -names).
+
+    :param directory: A string.
+    :param body_names: A list containing strings.
+    :param boundary_names: A list containing strings.
+    """
+    with open(os.path.join(directory, 'mesh.names'), 'w') as f:
+        f.write('! ----- names for bodies -----\n')
+        for num, name in enumerate(body_names):
+            f.write('$ {} = {}\n'.format(name, num+1))
+        f.write('! ----- names for boundaries -----\n')
+        for num, name in enumerate(boundary_names):
+            f.write('$ {} = {}\n'.format(name, num+1))
+
+
+@tracing.trace_stage('write_elmer_mesh')
+def write_elmer_mesh(mesh_data, directory, chunk_size=100000):
+    """
+    Writes mesh in Elmer mesh format (mesh.header, mesh.nodes, mesh.elements, mesh.boundary and
+    mesh.names) directly from gmsh mesh data without UNV export and ElmerGrid. Output corresponds
+    to 'ElmerGrid 8 2 mesh.unv -autoclean -names'::
+
+        - groups of the highest dimension are bodies, other groups are boundaries
+        - bodies and boundaries are numbered from one in order of groups
+        - only nodes used by elements are written, nodes are numbered from one in order of gmsh node tags
+
+    :param mesh_data: A dictionary (see gmshapi.get_mesh_data, e.g. gmshapi.create_mesh or gmshapi.read_mesh).
+    :param directory: A string (created if it does not exist).
+    :param chunk_size: An integer (number of rows formatted at once).
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    body_names, boundary_names, bulk_blocks, boundary_blocks = _get_mesh_blocks(mesh_data)
+    # renumber used nodes with lookup arrays indexed by gmsh node tag
+    node_tags = numpy.asarray(mesh_data['node tags'], dtype=numpy.int64)
+    positions = -numpy.ones(node_tags.max()+1, dtype=numpy.int64)
+    positions[node_tags] = numpy.arange(len(node_tags))
+    used = numpy.zeros(len(positions), dtype=bool)
+    for block in bulk_blocks + boundary_blocks:
+        if block[2].size and block[2].max() >= len(positions):
+            raise ValueError('Elements refer to nodes that do not exist')
+        used[block[2]] = True
+    used_tags = numpy.flatnonzero(used)
+    if numpy.any(positions[used_tags] < 0):
+        raise ValueError('Elements refer to nodes that do not exist')
+    coordinates = numpy.asarray(mesh_data['coordinates'], dtype=float)[positions[used_tags]]
+    new_numbers = numpy.zeros(len(positions), dtype=numpy.int64)
+    new_numbers[used_tags] = numpy.arange(1, len(used_tags)+1)
+
+    with open(os.path.join(directory, 'mesh.nodes'), 'w') as f:
+        rows = numpy.column_stack([numpy.arange(1, len(used_tags)+1), coordinates])
+        _write_rows(f, rows, '%d -1 %.16g %.16g %.16g\n', chunk_size)
+    renumbered_bulk_blocks = []
+    with open(os.path.join(directory, 'mesh.elements'), 'w') as f:
+        first_index = 1
+        for body, elmer_type, tags in bulk_blocks:
+            nodes = new_numbers[tags]
+            renumbered_bulk_blocks.append((elmer_type, nodes, first_index))
+            indices = numpy.arange(first_index, first_index+len(nodes))
+            rows = numpy.column_stack([indices, numpy.full(len(nodes), body), numpy.full(len(nodes), elmer_type),
+                                       nodes])
+            _write_rows(f, rows, _get_int_row_format(rows.shape[1]), chunk_size)
+            first_index += len(nodes)
+    renumbered_boundary_blocks = [(elmer_type, new_numbers[tags]) for _, elmer_type, tags in boundary_blocks]
+    parents = find_boundary_parents(renumbered_bulk_blocks, renumbered_boundary_blocks)
+    with open(os.path.join(directory, 'mesh.boundary'), 'w') as f:
+        first_index = 1
+        for (boundary, _, _), (elmer_type, nodes), block_parents in zip(boundary_blocks, renumbered_boundary_blocks,
+                                                                        parents):
+            indices = numpy.arange(first_index, first_index+len(nodes))
+            rows = numpy.column_stack([indices, numpy.full(len(nodes), boundary), block_parents,
+                                       numpy.full(len(nodes), elmer_type), nodes])
+            _write_rows(f, rows, _get_int_row_format(rows.shape[1]), chunk_size)
+            first_index += len(nodes)
+    _write_header(directory, len(used_tags), bulk_blocks, boundary_blocks)
+    _write_names(directory, body_names, boundary_names)
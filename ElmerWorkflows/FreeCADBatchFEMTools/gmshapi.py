@@ -0,0 +1,289 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import collections
+
+import gmsh
+import numpy
+
+_entity_dimensions = (('Solid', 3), ('Face', 2), ('Edge', 1), ('Vertex', 0))
+
+
+def get_entity_dim_tag(name):
+    """
+    Returns gmsh dimension and tag of FreeCAD sub-element name. Tags of entities of a merged
+    BREP file are the same as FreeCAD sub-element numbers.
+
+    :param name: A string e.g. 'Face12'.
+
+    :return: A tuple (dimension, tag).
+    """
+    for prefix, dimension in _entity_dimensions:
+        if name.startswith(prefix):
+            return dimension, int(name[len(prefix):])
+    raise ValueError('Unknown sub-element name {}'.format(name))
+
+
+def set_options(options):
+    """
+    Sets gmsh options.
+
+    :param options: A dictionary {option name: number or string} e.g. {'Mesh.Algorithm3D': 2}.
+    """
+    for name, value in options.items():
+        if isinstance(value, str):
+            gmsh.option.setString(name, value)
+        else:
+            gmsh.option.setNumber(name, value)
+
+
+def add_physical_groups(group_elements):
+    """
+    Adds physical groups to gmsh model.
+
+    :param group_elements: A dictionary {group name: [FreeCAD sub-element names]}.
+
+    :return: An ordered dictionary {group name: (dimension, physical tag, [entity tags])}.
+    """
+    physical_groups = collections.OrderedDict()
+    for name, element_names in group_elements.items():
+        dim_tags = [get_entity_dim_tag(element_name) for element_name in element_names]
+        dimensions = set(dimension for dimension, _ in dim_tags)
+        if len(dimensions) != 1:
+            raise ValueError('Mesh group {} must contain elements of one dimension'.format(name))
+        dimension = dimensions.pop()
+        tags = [tag for _, tag in dim_tags]
+        physical_tag = gmsh.model.addPhysicalGroup(dimension, tags)
+        gmsh.model.setPhysicalName(dimension, physical_tag, name)
+        physical_groups[name] = (dimension, physical_tag, tags)
+    return physical_groups
+
+
+def set_point_sizes(point_sizes):
+    """
+    Sets mesh sizes of geometry points (same as 'Characteristic Length' in geo file).
+
+    :param point_sizes: A dictionary {point tag: mesh size}.
+    """
+    points_by_size = {}
+    for tag, size in point_sizes.items():
+        points_by_size.setdefault(size, []).append((0, tag))
+    for size, dim_tags in points_by_size.items():
+        gmsh.model.mesh.setSize(dim_tags, size)
+
+
+def _find_surface_group(surface_name, physical_groups, exact_surface_equality):
+    """
+    Returns name of physical group containing surface (see meshutils._get_transfinite_surface_geo_file_line).
+
+    :param surface_name: A string.
+    :param physical_groups: A dictionary (see function add_physical_groups).
+    :param exact_surface_equality: A boolean.
+
+    :return: A string.
+    """
+    if exact_surface_equality:
+        if surface_name in physical_groups:
+            return surface_name
+    else:
+        for group_name in physical_groups:
+            if surface_name in group_name:  # 'A1_alpha1' in 'A1_alpha1_A2_alpha0'
+                return group_name
+    raise ValueError('Surface {} not found from mesh groups'.format(surface_name))
+
+
+def set_transfinite_constraints(transfinite_param_list, physical_groups, exact_surface_equality=False):
+    """
+    Sets transfinite lines, surfaces and volumes (same as meshutils.add_transfinite_lines_to_geo_file).
+
+    :param transfinite_param_list: A list containing dictionaries {'volume': 'name',
+                                                                   'surface_list': [s_name, s_name2]}.
+    :param physical_groups: A dictionary (see function add_physical_groups).
+    :param exact_surface_equality: A boolean. Default values is False because surfaces can be merged
+                                   (e.g. 'A1_alpha0_A2_alpha1').
+    """
+    for p_dict in transfinite_param_list:
+        for line_p_dict in p_dict.get('line_params', []):
+            for line in line_p_dict['lines']:
+                gmsh.model.mesh.setTransfiniteCurve(int(line), int(line_p_dict['points']), 'Progression',
+                                                    float(line_p_dict['progression']))
+        for surface_name in p_dict['surface_list']:
+            group_name = _find_surface_group(surface_name, physical_groups, exact_surface_equality)
+            arrangement = p_dict.get('{}_direction'.format(surface_name), '') or 'Left'
+            for tag in physical_groups[group_name][2]:
+                gmsh.model.mesh.setTransfiniteSurface(tag, arrangement)
+        for tag in physical_groups[p_dict['volume']][2]:
+            gmsh.model.mesh.setTransfiniteVolume(tag)
+
+
+def set_size_fields(size_field_params):
+    """
+    Sets mesh size fields (same as meshutils.add_size_fields_to_geo_file).
+
+    :param size_field_params: A dictionary (see meshutils.get_size_field_geo_file_lines).
+    """
+    field_tags = []
+    for size, volume_ids in size_field_params.get('sizes', {}).items():
+        field_tag = gmsh.model.mesh.field.add('Constant')
+        gmsh.model.mesh.field.setNumber(field_tag, 'VIn', float(size))
+        gmsh.model.mesh.field.setNumber(field_tag, 'VOut', 1e+22)
+        gmsh.model.mesh.field.setNumbers(field_tag, 'VolumesList', [int(volume_id) for volume_id in volume_ids])
+        field_tags.append(field_tag)
+    for grading in size_field_params.get('gradings', []):
+        distance_tag = gmsh.model.mesh.field.add('Distance')
+        gmsh.model.mesh.field.setNumbers(distance_tag, 'SurfacesList', [int(tag) for tag in grading['surfaces']])
+        field_tag = gmsh.model.mesh.field.add('Threshold')
+        gmsh.model.mesh.field.setNumber(field_tag, 'InField', distance_tag)
+        gmsh.model.mesh.field.setNumber(field_tag, 'SizeMin', float(grading['size']))
+        gmsh.model.mesh.field.setNumber(field_tag, 'SizeMax', float(grading['size max']))
+        gmsh.model.mesh.field.setNumber(field_tag, 'DistMin', float(grading['distance min']))
+        gmsh.model.mesh.field.setNumber(field_tag, 'DistMax', float(grading['distance max']))
+        field_tags.append(field_tag)
+    if field_tags:
+        min_tag = gmsh.model.mesh.field.add('Min')
+        gmsh.model.mesh.field.setNumbers(min_tag, 'FieldsList', field_tags)
+        gmsh.model.mesh.field.setAsBackgroundMesh(min_tag)
+
+
+def get_nodes():
+    """
+    Returns all mesh nodes of gmsh model.
+
+    :return: A tuple (node tags, coordinates) of numpy arrays with shapes (n,) and (n, 3).
+    """
+    node_tags, coordinates, _ = gmsh.model.mesh.getNodes()
+    return numpy.asarray(node_tags, dtype=numpy.int64), numpy.asarray(coordinates, dtype=float).reshape(-1, 3)
+
+
+def get_physical_group_elements(dimension, physical_tag):
+    """
+    Returns mesh elements of physical group.
+
+    :param dimension: An integer.
+    :param physical_tag: An integer.
+
+    :return: A dictionary {gmsh element type: (element tags, element node tags)} of numpy arrays with
+             shapes (m,) and (m, nodes per element).
+    """
+    elements = {}
+    for entity_tag in gmsh.model.getEntitiesForPhysicalGroup(dimension, physical_tag):
+        element_types, element_tags, node_tags = gmsh.model.mesh.getElements(dimension, entity_tag)
+        for element_type, tags, nodes in zip(element_types, element_tags, node_tags):
+            elements.setdefault(element_type, ([], []))
+            elements[element_type][0].append(numpy.asarray(tags, dtype=numpy.int64))
+            elements[element_type][1].append(numpy.asarray(nodes, dtype=numpy.int64).reshape(len(tags), -1))
+    return dict((element_type, (numpy.concatenate(tags), numpy.concatenate(nodes)))
+                for element_type, (tags, nodes) in elements.items())
+
+
+def get_mesh_data(physical_groups):
+    """
+    Returns nodes and physical group elements of current gmsh model.
+
+    :param physical_groups: A dictionary {group name: (dimension, physical tag, ...)}.
+
+    :return: A dictionary {'node tags': array, 'coordinates': array,
+                           'groups': {group name: {'dimension': int, 'tag': int, 'elements': dict}}}
+             (see functions get_nodes and get_physical_group_elements).
+    """
+    node_tags, coordinates = get_nodes()
+    mesh_data = {'node tags': node_tags, 'coordinates': coordinates, 'groups': collections.OrderedDict()}
+    for name, group in physical_groups.items():
+        dimension, physical_tag = group[0], group[1]
+        mesh_data['groups'][name] = {'dimension': dimension, 'tag': physical_tag,
+                                     'elements': get_physical_group_elements(dimension, physical_tag)}
+    return mesh_data
+
+
+def read_mesh(mesh_file):
+    """
+    Reads gmsh mesh file (e.g. binary .msh) with gmsh Python API.
+
+    :param mesh_file: A string.
+
+    :return: A dictionary (see function get_mesh_data).
+    """
+    gmsh.initialize([], False)
+    try:
+        gmsh.option.setNumber('General.Terminal', 0)
+        gmsh.open(mesh_file)
+        physical_groups = collections.OrderedDict()
+        for dimension, physical_tag in gmsh.model.getPhysicalGroups():
+            name = gmsh.model.getPhysicalName(dimension, physical_tag) or str(physical_tag)
+            physical_groups[name] = (dimension, physical_tag)
+        return get_mesh_data(physical_groups)
+    finally:
+        gmsh.finalize()
+
+
+def create_mesh(brep_file, group_elements=None, point_sizes=None, transfinite_param_list=None, options=None,
+                dimension=3, mesh_file=None, log_file=None, exact_surface_equality=False, size_field_params=None):
+    """
+    Creates mesh with gmsh Python API in-process. The BREP file is merged so that gmsh entity tags
+    are the same as FreeCAD sub-element numbers.
+
+    :param brep_file: A string (path to BREP file).
+    :param group_elements: None or a dictionary {group name: [FreeCAD sub-element names]}.
+    :param point_sizes: None or a dictionary {point tag: mesh size}.
+    :param transfinite_param_list: None or a list containing dictionaries {'volume': 'name',
+                                                                           'surface_list': [s_name, s_name2]}.
+    :param options: None or a dictionary {gmsh option name: value}.
+    :param dimension: An integer.
+    :param mesh_file: None or a string. If given, mesh is also written to file (format from file extension).
+    :param log_file: None or path to gmsh log.
+    :param exact_surface_equality: A boolean (see function set_transfinite_constraints).
+    :param size_field_params: None or a dictionary (see meshutils.get_size_field_geo_file_lines).
+
+    :return: A dictionary (see function get_mesh_data).
+    """
+    gmsh.initialize([], False)
+    try:
+        gmsh.option.setNumber('General.Terminal', 0)
+        gmsh.logger.start()
+        if transfinite_param_list:
+            gmsh.option.setNumber('General.ExpertMode', 1)  # Allow all mesh algorithms for transfinite
+        set_options(options or {})
+        gmsh.merge(brep_file)
+        physical_groups = add_physical_groups(group_elements or {})
+        set_point_sizes(point_sizes or {})
+        if transfinite_param_list:
+            set_transfinite_constraints(transfinite_param_list, physical_groups, exact_surface_equality)
+        if size_field_params:
+            set_size_fields(size_field_params)
+        gmsh.model.mesh.generate(dimension)
+        if mesh_file:
+            gmsh.option.setNumber('Mesh.SaveAll', 1)  # Ignore Physical definitions and save all elements
+            gmsh.write(mesh_file)
+        return get_mesh_data(physical_groups)
+    finally:
+        if log_file is not None:
+            with open(log_file, 'w') as f:
+                f.write('\n'.join(gmsh.logger.get()) + '\n')
+        gmsh.logger.stop()
+        gmsh.finalize()
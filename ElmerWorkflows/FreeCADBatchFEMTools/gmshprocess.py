@@ -0,0 +1,189 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import queue
+import re
+import subprocess
+import threading
+import time
+
+_ansi_escape_code_pattern = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+# 'Info    : Meshing 3D...'
+_stage_pattern = re.compile(r'Meshing (\d)D\.\.\.')
+# 'Info    : 18250 nodes 106011 elements' (gmsh 4) or 'Info    : 8562 vertices 44720 elements' (gmsh 3)
+_count_pattern = re.compile(r'(\d+) (?:nodes|vertices) (\d+) elements')
+# 'Info    : It. 1000 - 1000 nodes created - worst tet radius 2.3 (nodes removed 0 0)'
+_created_nodes_pattern = re.compile(r'It\. \d+ - (\d+) nodes created')
+
+
+def remove_ansi_escape_codes(message):
+    """
+    Removes ANSI escape codes (e.g. colors) from message.
+
+    :param message: A string.
+
+    :return: A string.
+    """
+    return _ansi_escape_code_pattern.sub('', message)
+
+
+def _read_lines(stream, name, line_queue):
+    """
+    Puts lines of stream to queue. Puts (name, None) when stream is closed.
+
+    :param stream: A file object.
+    :param name: A string.
+    :param line_queue: A queue.
+    """
+    for line in iter(stream.readline, ''):
+        line_queue.put((name, line))
+    stream.close()
+    line_queue.put((name, None))
+
+
+def update_progress(progress, line):
+    """
+    Updates progress dictionary from gmsh output line.
+
+    :param progress: A dictionary (see function run_gmsh).
+    :param line: A string (ANSI escape codes removed).
+
+    :return: True if stage, node or element count changed.
+    """
+    match = _stage_pattern.search(line)
+    if match:
+        progress['stage'] = '{}D'.format(match.group(1))
+        return True
+    match = _count_pattern.search(line)
+    if match:
+        progress['nodes'], progress['elements'] = int(match.group(1)), int(match.group(2))
+        return True
+    match = _created_nodes_pattern.search(line)
+    if match:
+        progress['nodes'] = int(match.group(1))
+        return True
+    return False
+
+
+def _terminate(process):
+    """
+    Terminates process, kills it if it does not stop in five seconds.
+
+    :param process: A subprocess.Popen object.
+    """
+    process.terminate()
+    for _ in range(50):
+        if process.poll() is not None:
+            return
+        time.sleep(0.1)
+    process.kill()
+    process.wait()
+
+
+def run_gmsh(command, log=None, progress_callback=None, time_limit=None, element_limit=None, abort_patterns=None,
+             node_limit=None):
+    """
+    Runs gmsh and reads stdout and stderr line by line while gmsh is running. Lines are written
+    to log immediately. gmsh is terminated if time, element or node limit is exceeded or if an abort pattern
+    is found given number of times::
+
+        abort_patterns={'Invalid boundary mesh': 3}
+
+    :param command: A list containing strings (e.g. [gmsh_bin, '-', geo_file]).
+    :param log: None or a file object.
+    :param progress_callback: None or a function called with progress dictionary when stage, node or
+                              element count changes: {'stage': str (e.g. '3D'), 'nodes': int, 'elements': int,
+                              'wall time': float}. Node and element counts are reported by gmsh after
+                              each meshing step.
+    :param time_limit: None or wall time limit in seconds.
+    :param element_limit: None or an integer. Element count is reported by gmsh only after each meshing step
+                          (dimension), so a diverging 3D step is not stopped by this limit (use node_limit).
+    :param abort_patterns: None or a dictionary {regular expression: number of matches}.
+    :param node_limit: None or an integer. Node count is updated also during 3D meshing ('nodes created'
+                       lines), so this limit stops a diverging 3D step.
+
+    :return: A dictionary {'returncode': int, 'error': None or str (stderr and abort reason),
+                           'aborted': None or str (abort reason), 'progress': dict}.
+    """
+    compiled_patterns = [(re.compile(pattern), count) for pattern, count in (abort_patterns or {}).items()]
+    pattern_matches = [0] * len(compiled_patterns)
+    progress = {'stage': None, 'nodes': 0, 'elements': 0, 'wall time': 0.}
+    result = {'returncode': None, 'error': None, 'aborted': None, 'progress': progress}
+    errors = []
+    start = time.time()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    line_queue = queue.Queue()
+    readers = [threading.Thread(target=_read_lines, args=(process.stdout, 'stdout', line_queue)),
+               threading.Thread(target=_read_lines, args=(process.stderr, 'stderr', line_queue))]
+    for reader in readers:
+        reader.daemon = True
+        reader.start()
+    open_streams = len(readers)
+    while open_streams > 0:
+        try:
+            name, line = line_queue.get(timeout=1.0)
+        except queue.Empty:
+            name, line = None, None
+        progress['wall time'] = time.time() - start
+        if name is not None and line is None:
+            open_streams -= 1
+        elif line is not None:
+            line = remove_ansi_escape_codes(line)
+            if log is not None:
+                log.write(line)
+                log.flush()
+            if name == 'stderr':
+                errors.append(line)
+            if update_progress(progress, line) and progress_callback is not None:
+                progress_callback(dict(progress))
+            for num, (pattern, count) in enumerate(compiled_patterns):
+                if pattern.search(line):
+                    pattern_matches[num] += 1
+                    if pattern_matches[num] >= count and result['aborted'] is None:
+                        result['aborted'] = "'{}' found {} times".format(pattern.pattern, pattern_matches[num])
+        if result['aborted'] is None and time_limit is not None and progress['wall time'] > time_limit:
+            result['aborted'] = 'Time limit {} s exceeded'.format(time_limit)
+        if result['aborted'] is None and element_limit is not None and progress['elements'] > element_limit:
+            result['aborted'] = 'Element limit {} exceeded ({} elements)'.format(element_limit, progress['elements'])
+        if result['aborted'] is None and node_limit is not None and progress['nodes'] > node_limit:
+            result['aborted'] = 'Node limit {} exceeded ({} nodes)'.format(node_limit, progress['nodes'])
+        if result['aborted'] is not None:
+            if process.poll() is None:
+                _terminate(process)
+            break  # do not wait for streams kept open by child processes of gmsh
+    result['returncode'] = process.wait()
+    progress['wall time'] = time.time() - start
+    if result['aborted'] is not None:
+        errors.append('gmsh aborted: {}\n'.format(result['aborted']))
+        if log is not None:
+            log.write(errors[-1])
+            log.flush()
+    if errors:
+        result['error'] = ''.join(errors)
+    return result
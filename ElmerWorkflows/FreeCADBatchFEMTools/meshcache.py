@@ -0,0 +1,287 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+MESH_CACHE_ENVIRONMENT_VARIABLE = 'FREECADBATCHFEMTOOLS_MESH_CACHE'
+
+# Cache directory, is cache disabled explicitly (environment variable is then ignored),
+# gmsh versions {gmsh_bin: version} and cache keys of meshed objects {object name: key}
+_cache_state = {'directory': None, 'disabled': False, 'gmsh_versions': {}, 'object_keys': {}}
+
+
+def set_mesh_cache_directory(directory):
+    """
+    Enables mesh cache and sets the cache directory. Mesh cache is also enabled if environment
+    variable FREECADBATCHFEMTOOLS_MESH_CACHE contains path to the cache directory and cache
+    has not been disabled with this function.
+
+    :param directory: None (disables cache, also when enabled by environment variable) or
+                      a string (created if it does not exist).
+    """
+    _cache_state['directory'] = directory
+    _cache_state['disabled'] = directory is None
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+
+def get_mesh_cache_directory():
+    """
+    Returns the cache directory or None if mesh cache is not enabled.
+
+    :return: None or a string.
+    """
+    if _cache_state['disabled']:
+        return None
+    if _cache_state['directory'] is None and os.environ.get(MESH_CACHE_ENVIRONMENT_VARIABLE):
+        set_mesh_cache_directory(os.environ[MESH_CACHE_ENVIRONMENT_VARIABLE])
+    return _cache_state['directory']
+
+
+def get_gmsh_version(gmsh_bin='gmsh'):
+    """
+    Returns output of 'gmsh --version'. Version is asked only once per executable.
+
+    :param gmsh_bin: A string.
+
+    :return: A string.
+    """
+    if gmsh_bin not in _cache_state['gmsh_versions']:
+        try:
+            p = subprocess.Popen([gmsh_bin, '--version'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 universal_newlines=True)
+            output, _ = p.communicate()
+            version = output.strip()
+        except OSError:
+            version = 'unknown'
+        _cache_state['gmsh_versions'][gmsh_bin] = version
+    return _cache_state['gmsh_versions'][gmsh_bin]
+
+
+def _update_hash_with_file(file_hash, file_name, block_size=2**20):
+    """
+    Updates hash with file contents.
+
+    :param file_hash: A hashlib object.
+    :param file_name: A string.
+    :param block_size: An integer.
+    """
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            file_hash.update(block)
+
+
+def get_geo_file_key(geo_file, gmsh_bin='gmsh', settings=None):
+    """
+    Returns cache key of geo file. Key is a hash of geo file, merged geometry (BREP) files,
+    gmsh version and settings. Directories of merged and saved files do not affect the key.
+
+    :param geo_file: A string.
+    :param gmsh_bin: A string.
+    :param settings: None or a string (e.g. algorithm settings not written to geo file).
+
+    :return: A string.
+    """
+    key_hash = hashlib.sha256()
+    key_hash.update(get_gmsh_version(gmsh_bin).encode('utf-8'))
+    key_hash.update((settings or '').encode('utf-8'))
+    geo_directory = os.path.dirname(os.path.abspath(geo_file))
+    with open(geo_file, 'r') as f:
+        for line in f:
+            if line.startswith('Merge ') or line.startswith('Save '):
+                file_name = line.split('"')[1]
+                line = line.replace(file_name, os.path.basename(file_name))
+                if line.startswith('Merge '):
+                    _update_hash_with_file(key_hash, os.path.join(geo_directory, file_name))
+            key_hash.update(line.encode('utf-8'))
+    return key_hash.hexdigest()
+
+
+def _get_elmer_mesh_name(elmergrid_options):
+    """
+    Returns name of cached Elmer mesh directory (depends on ElmerGrid options).
+
+    :param elmergrid_options: A string.
+
+    :return: A string.
+    """
+    return 'elmer_' + hashlib.sha256(' '.join(elmergrid_options.split()).encode('utf-8')).hexdigest()[:16]
+
+
+def _link_or_copy(source, destination):
+    """
+    Hard links source file to destination. Copies if hard link is not possible (e.g. different file systems).
+
+    :param source: A string.
+    :param destination: A string.
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except (OSError, AttributeError):
+        shutil.copy2(source, destination)
+
+
+def _link_or_copy_directory(source, destination, copy=False):
+    """
+    Hard links or copies files of source directory to destination directory.
+
+    :param source: A string.
+    :param destination: A string (created if it does not exist).
+    :param copy: A boolean. If True, files are always copied.
+    """
+    if not os.path.isdir(destination):
+        os.makedirs(destination)
+    for file_name in os.listdir(source):
+        if copy:
+            shutil.copy2(os.path.join(source, file_name), os.path.join(destination, file_name))
+        else:
+            _link_or_copy(os.path.join(source, file_name), os.path.join(destination, file_name))
+
+
+def release_mesh(mesh_file=None, elmer_dir=None):
+    """
+    Removes hard linked (restored from cache) files before gmsh or ElmerGrid overwrites them.
+    Otherwise the tools would write over the cached files.
+
+    :param mesh_file: None or a string.
+    :param elmer_dir: None or a string.
+    """
+    file_names = [mesh_file] if mesh_file is not None else []
+    if elmer_dir is not None and os.path.isdir(elmer_dir):
+        file_names.extend(os.path.join(elmer_dir, file_name) for file_name in os.listdir(elmer_dir))
+    for file_name in file_names:
+        if os.path.isfile(file_name) and os.stat(file_name).st_nlink > 1:
+            os.remove(file_name)
+
+
+def restore_mesh(key, mesh_file=None, elmer_dir=None, elmergrid_options='-autoclean -names'):
+    """
+    Restores cached mesh file and/or Elmer mesh directory.
+
+    :param key: A string (see function get_geo_file_key).
+    :param mesh_file: None or a string (destination of mesh file).
+    :param elmer_dir: None or a string (destination of Elmer mesh files).
+    :param elmergrid_options: A string.
+
+    :return: True if all requested files were found from cache.
+    """
+    cache_directory = get_mesh_cache_directory()
+    if cache_directory is None or key is None:
+        return False
+    entry = os.path.join(cache_directory, key)
+    cached_mesh_file = os.path.join(entry, 'mesh')
+    cached_elmer_dir = os.path.join(entry, _get_elmer_mesh_name(elmergrid_options))
+    if mesh_file is not None and not os.path.isfile(cached_mesh_file):
+        return False
+    if elmer_dir is not None and not os.path.isdir(cached_elmer_dir):
+        return False
+    if mesh_file is not None:
+        _link_or_copy(cached_mesh_file, mesh_file)
+    if elmer_dir is not None:
+        _link_or_copy_directory(cached_elmer_dir, elmer_dir)
+    return True
+
+
+def _rename_to_cache(source, destination):
+    """
+    Renames source to destination. Failure is ignored if destination exists (stored by another job).
+
+    :param source: A string.
+    :param destination: A string.
+    """
+    try:
+        os.rename(source, destination)
+    except OSError:
+        if not os.path.exists(destination):
+            raise
+
+
+def store_mesh(key, mesh_file=None, elmer_dir=None, elmergrid_options='-autoclean -names'):
+    """
+    Stores mesh file and/or Elmer mesh directory to cache. Files are copied (restored files are hard
+    links to cached files) first to a temporary location in cache directory and then renamed so that
+    partially written entries are never used. Concurrent jobs may store the same key: if another job
+    has already stored an item, the copy is removed and the cached item is kept.
+
+    :param key: A string (see function get_geo_file_key).
+    :param mesh_file: None or a string.
+    :param elmer_dir: None or a string.
+    :param elmergrid_options: A string.
+    """
+    cache_directory = get_mesh_cache_directory()
+    if cache_directory is None or key is None:
+        return
+    entry = os.path.join(cache_directory, key)
+    os.makedirs(entry, exist_ok=True)
+    items = []
+    if mesh_file is not None and os.path.isfile(mesh_file):
+        items.append((mesh_file, os.path.join(entry, 'mesh')))
+    if elmer_dir is not None and os.path.isdir(elmer_dir):
+        items.append((elmer_dir, os.path.join(entry, _get_elmer_mesh_name(elmergrid_options))))
+    for source, destination in items:
+        if os.path.exists(destination):
+            continue
+        temp_destination = tempfile.mkdtemp(dir=entry)
+        try:
+            if os.path.isdir(source):
+                _link_or_copy_directory(source, temp_destination, copy=True)
+                _rename_to_cache(temp_destination, destination)
+            else:
+                shutil.copy2(source, os.path.join(temp_destination, 'mesh'))
+                _rename_to_cache(os.path.join(temp_destination, 'mesh'), destination)
+        finally:
+            if os.path.isdir(temp_destination):
+                shutil.rmtree(temp_destination)
+
+
+def set_object_key(name, key):
+    """
+    Remembers cache key of meshed object (used when Elmer mesh of the object is created later).
+
+    :param name: A string (e.g. FreeCAD mesh object name).
+    :param key: None or a string.
+    """
+    _cache_state['object_keys'][name] = key
+
+
+def get_object_key(name):
+    """
+    Returns cache key of meshed object.
+
+    :param name: A string.
+
+    :return: None or a string.
+    """
+    return _cache_state['object_keys'].get(name)
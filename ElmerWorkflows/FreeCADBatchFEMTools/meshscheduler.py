@@ -0,0 +1,163 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import concurrent.futures
+import os
+import subprocess
+import time
+
+import gmshprocess
+import meshcache
+import meshutils
+
+
+def create_mesh_scheduler(max_workers=2):
+    """
+    Creates scheduler for mesh jobs. Jobs run gmsh and ElmerGrid as external processes in a bounded
+    pool of worker threads so that the caller (e.g. geometry creation of the next variant) is not blocked.
+
+    :param max_workers: An integer (number of jobs run at the same time).
+
+    :return: A dictionary {'executor': ThreadPoolExecutor, 'futures': [futures of submitted jobs]}.
+    """
+    return {'executor': concurrent.futures.ThreadPoolExecutor(max_workers=max_workers), 'futures': []}
+
+
+def _run_process(command, log):
+    """
+    Runs command and writes its output to log file.
+
+    :param command: A list containing strings.
+    :param log: A file object.
+
+    :return: A tuple (return code, wall time in seconds).
+    """
+    log.write('Running {}\n'.format(' '.join(command)))
+    log.flush()
+    start = time.time()
+    p = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+    p.communicate()
+    return p.returncode, time.time() - start
+
+
+def run_mesh_job(geo_file, out_dir=None, gmsh_threads=1, log_file=None, gmsh_bin='gmsh', elmergrid_bin='ElmerGrid',
+                 elmergrid_options='-autoclean -names', gmsh_run_options=None):
+    """
+    Runs gmsh with geo file and ElmerGrid with the mesh file saved by the geo file. If mesh cache
+    is enabled (see meshcache.py), cached mesh and Elmer mesh are used instead when available.
+
+    :param geo_file: A string (geo file containing line 'Save "mesh.unv";').
+    :param out_dir: None or a string (ElmerGrid output directory). If None, ElmerGrid is not run.
+    :param gmsh_threads: An integer (gmsh option -nt).
+    :param log_file: None or a string. If None, log is written next to geo file ('<geo file name>.log').
+    :param gmsh_bin: A string.
+    :param elmergrid_bin: A string.
+    :param elmergrid_options: A string.
+    :param gmsh_run_options: None or a dictionary containing keyword arguments progress_callback, time_limit,
+                             element_limit, node_limit and abort_patterns of gmshprocess.run_gmsh.
+
+    :return: A dictionary {'geo file': str, 'out dir': str, 'log file': str, 'error': None or str,
+                           'cached': bool, 'gmsh time': float, 'elmergrid time': None or float,
+                           'gmsh progress': None or dict (see gmshprocess.run_gmsh)}.
+    """
+    if log_file is None:
+        log_file = os.path.splitext(geo_file)[0] + '.log'
+    result = {'geo file': geo_file, 'out dir': out_dir, 'log file': log_file, 'error': None, 'cached': False,
+              'gmsh time': None, 'elmergrid time': None, 'gmsh progress': None}
+    mesh_file = meshutils.get_mesh_file_from_geo_file(geo_file)
+    if mesh_file is None:
+        result['error'] = 'Mesh file not saved by {}'.format(geo_file)
+        return result
+    with open(log_file, 'w') as log:
+        try:
+            key = None
+            if meshcache.get_mesh_cache_directory() is not None:
+                key = meshcache.get_geo_file_key(geo_file, gmsh_bin)
+            if meshcache.restore_mesh(key, mesh_file, out_dir, elmergrid_options):
+                log.write('Mesh restored from cache {}\n'.format(key))
+                result['cached'] = True
+                return result
+            meshcache.release_mesh(mesh_file, out_dir)
+            command = [gmsh_bin, '-', geo_file, '-nt', str(gmsh_threads)]
+            log.write('Running {}\n'.format(' '.join(command)))
+            log.flush()
+            gmsh_result = gmshprocess.run_gmsh(command, log, **(gmsh_run_options or {}))
+            result['gmsh time'] = gmsh_result['progress']['wall time']
+            result['gmsh progress'] = gmsh_result['progress']
+            if gmsh_result['aborted'] is not None:
+                result['error'] = 'gmsh aborted: {} (see {})'.format(gmsh_result['aborted'], log_file)
+                return result
+            if gmsh_result['returncode'] != 0:
+                result['error'] = 'gmsh failed with return code {} (see {})'.format(gmsh_result['returncode'],
+                                                                                   log_file)
+                return result
+            if out_dir is not None:
+                command = [elmergrid_bin, '8', '2', mesh_file] + elmergrid_options.split() + ['-out', out_dir]
+                returncode, result['elmergrid time'] = _run_process(command, log)
+                if returncode != 0:
+                    result['error'] = 'ElmerGrid failed with return code {} (see {})'.format(returncode, log_file)
+                    out_dir = None
+            meshcache.store_mesh(key, mesh_file, out_dir, elmergrid_options)
+        except OSError as e:
+            result['error'] = str(e)
+            log.write('{}\n'.format(e))
+    return result
+
+
+def submit_mesh_job(scheduler, geo_file, out_dir=None, gmsh_threads=1, log_file=None, **kwargs):
+    """
+    Queues mesh job to scheduler (see function run_mesh_job). Returns immediately.
+
+    :param scheduler: A dictionary (see function create_mesh_scheduler).
+    :param geo_file: A string.
+    :param out_dir: None or a string.
+    :param gmsh_threads: An integer.
+    :param log_file: None or a string.
+    :param kwargs: Keyword arguments of function run_mesh_job (gmsh_bin, elmergrid_bin, elmergrid_options).
+
+    :return: A future. Method result() returns the dictionary of function run_mesh_job.
+    """
+    future = scheduler['executor'].submit(run_mesh_job, geo_file, out_dir, gmsh_threads, log_file, **kwargs)
+    scheduler['futures'].append(future)
+    return future
+
+
+def wait_mesh_jobs(scheduler, shutdown=True):
+    """
+    Waits until all submitted mesh jobs are finished.
+
+    :param scheduler: A dictionary (see function create_mesh_scheduler).
+    :param shutdown: A boolean. If True, worker threads are stopped and no more jobs can be submitted.
+
+    :return: A list containing job results in submission order (see function run_mesh_job).
+    """
+    results = [future.result() for future in scheduler['futures']]
+    if shutdown:
+        scheduler['executor'].shutdown()
+    return results
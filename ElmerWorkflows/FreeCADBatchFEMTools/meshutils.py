@@ -28,6 +28,7 @@
   Original Date: April 2020
 """
 import os
+import re
 import shutil
 
 
@@ -63,6 +64,21 @@ def collect_geometry_ids_from_geo_file(geo_file_path):
     return geom_id_dict
 
 
+def get_mesh_file_from_geo_file(geo_file_path):
+    """
+    Returns path of mesh file saved by geo file (line 'Save "/tmp/shape2mesh.unv";').
+
+    :param geo_file_path: Path to geo file.
+
+    :return: A string or None if geo file does not save mesh.
+    """
+    with open(geo_file_path, 'r') as geo_file:
+        for line in geo_file:
+            if line.startswith('Save '):
+                return line.split('"')[1]
+    return None
+
+
 def _get_transfinite_line_geo_file_line(line_param_dict):
     """
     Returns transfinite line geo file line 'Transfinite Line {59, 60} = 9 Using Progression 1;'.
@@ -149,3 +165,69 @@ def add_transfinite_lines_to_geo_file(directory, transfinite_param_list, file_na
                 geo_file.write(line)
     os.remove(geo_path_cp)
 
+
+
+def get_size_field_geo_file_lines(size_field_params):
+    """
+    Returns geo file lines defining mesh size fields. Volumes with the same mesh size share one Constant
+    field, distance based gradings from surfaces are Threshold fields and the background field is
+    the minimum of all fields.
+
+    :param size_field_params: A dictionary {'sizes': {mesh size: [volume ids]},
+                                            'gradings': [{'surfaces': [surface ids], 'size': float,
+                                                          'distance min': float, 'distance max': float,
+                                                          'size max': float}]}.
+
+    :return: A list containing strings.
+    """
+    lines = ['// Mesh size fields\n']
+    field_ids = []
+    field_id = 0
+    for size, volume_ids in size_field_params.get('sizes', {}).items():
+        field_id += 1
+        field_ids.append(str(field_id))
+        lines.append('Field[{}] = Constant;\n'.format(field_id))
+        lines.append('Field[{}].VIn = {};\n'.format(field_id, size))
+        lines.append('Field[{}].VOut = 1e+22;\n'.format(field_id))
+        lines.append('Field[{}].VolumesList = {{{}}};\n'.format(field_id, ', '.join(volume_ids)))
+    for grading in size_field_params.get('gradings', []):
+        field_id += 1
+        lines.append('Field[{}] = Distance;\n'.format(field_id))
+        lines.append('Field[{}].SurfacesList = {{{}}};\n'.format(field_id, ', '.join(grading['surfaces'])))
+        field_id += 1
+        field_ids.append(str(field_id))
+        lines.append('Field[{}] = Threshold;\n'.format(field_id))
+        lines.append('Field[{}].InField = {};\n'.format(field_id, field_id-1))
+        lines.append('Field[{}].SizeMin = {};\n'.format(field_id, grading['size']))
+        lines.append('Field[{}].SizeMax = {};\n'.format(field_id, grading['size max']))
+        lines.append('Field[{}].DistMin = {};\n'.format(field_id, grading['distance min']))
+        lines.append('Field[{}].DistMax = {};\n'.format(field_id, grading['distance max']))
+    if not field_ids:
+        return []
+    field_id += 1
+    lines.append('Field[{}] = Min;\n'.format(field_id))
+    lines.append('Field[{}].FieldsList = {{{}}};\n'.format(field_id, ', '.join(field_ids)))
+    lines.append('Background Field = {};\n\n'.format(field_id))
+    return lines
+
+
+def add_size_fields_to_geo_file(directory, size_field_params, file_name='shape2mesh.geo'):
+    """
+    Adds mesh size fields to file file_name before the meshing command.
+
+    :param directory: Gmsh temp file location.
+    :param size_field_params: A dictionary (see function get_size_field_geo_file_lines).
+    :param file_name: A string.
+    """
+    geo_path = os.path.join(directory, file_name)
+    geo_path_cp = os.path.join(directory, 'shape2mesh_cp.geo')
+    shutil.copy(geo_path, geo_path_cp)
+    with open(geo_path, 'w') as geo_file:
+        with open(geo_path_cp, 'r') as original_geo_file_cp:
+            lines_added = False
+            for line in original_geo_file_cp:
+                if not lines_added and re.match(r'Mesh\s+\d\s*;', line):
+                    lines_added = True
+                    geo_file.writelines(get_size_field_geo_file_lines(size_field_params))
+                geo_file.write(line)
+    os.remove(geo_path_cp)
@@ -0,0 +1,454 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import collections
+import itertools
+import math
+
+import numpy
+
+import shapematching
+
+"""
+Pure Python (NumPy) implementation of the geometry protocol of shapematching for
+axis-aligned boxes and planar polygons. Matching and indexing functions can be run and
+benchmarked with these shapes without FreeCAD, for example:
+
+    import numpygeometry
+    import shapematching
+
+    numpygeometry.set_as_geometry_backend()
+    boxes = numpygeometry.make_box_grid(10, 10, 10, size=1.0, gap=0.5)
+    compound_filter = numpygeometry.make_compound_filter(boxes)
+    face_index = shapematching.create_compound_filter_face_index(compound_filter)
+    shapematching.find_compound_filter_boundaries(compound_filter, boxes[0].Faces[0], face_index=face_index)
+
+Only plane geometry is supported: edges are line segments and faces planar polygons.
+"""
+# Stand-in for FreeCAD compound filter (functions only use attribute Shape)
+CompoundFilter = collections.namedtuple('CompoundFilter', ['Shape'])
+
+
+class Vector(object):
+    """
+    Point or direction in 3D space (subset of FreeCAD Vector).
+    """
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0., y=0., z=0.):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    @property
+    def Length(self):
+        return math.sqrt(self.x*self.x + self.y*self.y + self.z*self.z)
+
+    def sub(self, other):
+        return Vector(self.x-other.x, self.y-other.y, self.z-other.z)
+
+    def add(self, other):
+        return Vector(self.x+other.x, self.y+other.y, self.z+other.z)
+
+    def __sub__(self, other):
+        return self.sub(other)
+
+    def __add__(self, other):
+        return self.add(other)
+
+    def __repr__(self):
+        return 'Vector ({}, {}, {})'.format(self.x, self.y, self.z)
+
+
+class BoundBox(object):
+    """
+    Axis-aligned bounding box (subset of FreeCAD BoundBox).
+    """
+
+    def __init__(self, min_point, max_point):
+        self.XMin, self.YMin, self.ZMin = (float(value) for value in min_point)
+        self.XMax, self.YMax, self.ZMax = (float(value) for value in max_point)
+
+    @property
+    def XLength(self):
+        return self.XMax - self.XMin
+
+    @property
+    def YLength(self):
+        return self.YMax - self.YMin
+
+    @property
+    def ZLength(self):
+        return self.ZMax - self.ZMin
+
+    @property
+    def DiagonalLength(self):
+        return math.sqrt(self.XLength**2 + self.YLength**2 + self.ZLength**2)
+
+    @property
+    def Center(self):
+        return Vector((self.XMin+self.XMax)/2., (self.YMin+self.YMax)/2., (self.ZMin+self.ZMax)/2.)
+
+
+def _create_bound_box(points):
+    """
+    Returns bounding box of points.
+
+    :param points: NumPy array with shape (n, 3).
+
+    :return: BoundBox object.
+    """
+    return BoundBox(points.min(axis=0), points.max(axis=0))
+
+
+def _distance_to_segments(point, starts, ends):
+    """
+    Returns smallest distance from point to line segments.
+
+    :param point: NumPy array with shape (3,).
+    :param starts: NumPy array with shape (n, 3).
+    :param ends: NumPy array with shape (n, 3).
+
+    :return: A float.
+    """
+    directions = ends - starts
+    lengths_squared = (directions*directions).sum(axis=1)
+    lengths_squared[lengths_squared == 0.] = 1.
+    t = numpy.clip(((point - starts)*directions).sum(axis=1) / lengths_squared, 0., 1.)
+    closest_points = starts + t[:, numpy.newaxis]*directions
+    return float(numpy.sqrt(((closest_points - point)**2).sum(axis=1)).min())
+
+
+class Vertex(object):
+    """
+    Vertex (subset of FreeCAD Vertex). Attribute Point returns a new vector at each call.
+    """
+
+    def __init__(self, point):
+        self.X, self.Y, self.Z = (float(value) for value in point)
+
+    @property
+    def Point(self):
+        return Vector(self.X, self.Y, self.Z)
+
+    @property
+    def Vertexes(self):
+        return [self]
+
+    @property
+    def BoundBox(self):
+        return BoundBox((self.X, self.Y, self.Z), (self.X, self.Y, self.Z))
+
+    def hashCode(self):
+        return id(self)
+
+
+class Edge(object):
+    """
+    Line segment edge (subset of FreeCAD Edge).
+    """
+
+    def __init__(self, start, end):
+        self.points = numpy.array([start, end], dtype=float)
+        self.Vertexes = [Vertex(point) for point in self.points.tolist()]
+
+    @property
+    def Length(self):
+        return float(numpy.linalg.norm(self.points[1] - self.points[0]))
+
+    @property
+    def CenterOfMass(self):
+        return Vector(*self.points.mean(axis=0))
+
+    @property
+    def BoundBox(self):
+        return _create_bound_box(self.points)
+
+    def hashCode(self):
+        return id(self)
+
+
+class PlanarFace(object):
+    """
+    Planar polygon face (subset of FreeCAD Face). Parameters (u, v) are coordinates in
+    the plane of the face: u axis points from the first vertex to the second vertex.
+    Center of mass can be given if it is known (e.g. faces of boxes).
+    """
+
+    def __init__(self, points, center_of_mass=None):
+        self.points = numpy.array(points, dtype=float)
+        self._vertexes = None
+        self._edges = None
+        self._frame = None
+        self._center_of_mass = center_of_mass
+
+    @property
+    def Vertexes(self):
+        if self._vertexes is None:
+            self._vertexes = [Vertex(point) for point in self.points.tolist()]
+        return self._vertexes
+
+    @property
+    def Edges(self):
+        if self._edges is None:
+            self._edges = [Edge(start, end) for start, end in zip(self.points, numpy.roll(self.points, -1, axis=0))]
+        return self._edges
+
+    @property
+    def BoundBox(self):
+        return _create_bound_box(self.points)
+
+    def _get_frame(self):
+        """
+        Returns local coordinate system of the face plane and vertex coordinates in it.
+
+        :return: A tuple (origin, u axis, v axis, normal, uv coordinates with shape (n, 2)).
+        """
+        if self._frame is None:
+            origin = self.points[0]
+            # Newell's method gives normal also for non-convex polygons
+            normal = numpy.cross(self.points, numpy.roll(self.points, -1, axis=0)).sum(axis=0)
+            normal /= numpy.linalg.norm(normal)
+            u_axis = self.points[1] - origin
+            u_axis /= numpy.linalg.norm(u_axis)
+            v_axis = numpy.cross(normal, u_axis)
+            relative_points = self.points - origin
+            uv = numpy.column_stack((relative_points.dot(u_axis), relative_points.dot(v_axis)))
+            self._frame = (origin, u_axis, v_axis, normal, uv)
+        return self._frame
+
+    @property
+    def Area(self):
+        uv = self._get_frame()[4]
+        u, v = uv[:, 0], uv[:, 1]
+        return 0.5 * abs(float((u*numpy.roll(v, -1) - numpy.roll(u, -1)*v).sum()))
+
+    @property
+    def CenterOfMass(self):
+        if self._center_of_mass is None:
+            origin, u_axis, v_axis, normal, uv = self._get_frame()
+            u, v = uv[:, 0], uv[:, 1]
+            u_next, v_next = numpy.roll(u, -1), numpy.roll(v, -1)
+            cross = u*v_next - u_next*v
+            area = 0.5 * cross.sum()
+            if abs(area) > 0.:
+                u_center = ((u + u_next)*cross).sum() / (6.*area)
+                v_center = ((v + v_next)*cross).sum() / (6.*area)
+                self._center_of_mass = (origin + u_center*u_axis + v_center*v_axis).tolist()
+            else:
+                self._center_of_mass = self.points.mean(axis=0).tolist()
+        return Vector(*self._center_of_mass)
+
+    @property
+    def ParameterRange(self):
+        uv = self._get_frame()[4]
+        u_min, v_min = uv.min(axis=0)
+        u_max, v_max = uv.max(axis=0)
+        return float(u_min), float(u_max), float(v_min), float(v_max)
+
+    def valueAt(self, u, v):
+        origin, u_axis, v_axis = self._get_frame()[:3]
+        return Vector(*(origin + u*u_axis + v*v_axis))
+
+    def isPartOfDomain(self, u, v):
+        uv = self._get_frame()[4]
+        u_1, v_1 = uv[:, 0], uv[:, 1]
+        u_2, v_2 = numpy.roll(u_1, -1), numpy.roll(v_1, -1)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            crossings = ((v_1 > v) != (v_2 > v)) & (u < (u_2 - u_1)*(v - v_1)/(v_2 - v_1) + u_1)
+        return bool(crossings.sum() % 2)
+
+    def isInside(self, point, tolerance, check_face=True):
+        origin, u_axis, v_axis, normal = self._get_frame()[:4]
+        relative_point = numpy.array([point.x, point.y, point.z]) - origin
+        if abs(relative_point.dot(normal)) > tolerance:
+            return False
+        if self.isPartOfDomain(relative_point.dot(u_axis), relative_point.dot(v_axis)):
+            return True
+        point_array = relative_point + origin
+        return _distance_to_segments(point_array, self.points, numpy.roll(self.points, -1, axis=0)) <= tolerance
+
+    def hashCode(self):
+        return id(self)
+
+
+class BoxSolid(object):
+    """
+    Axis-aligned box solid (subset of FreeCAD Solid). Faces are in the same order as in
+    FreeCAD Part::Box: x min, x max, y min, y max, z min, z max.
+    """
+    _face_corners = [(0, 4, 6, 2), (1, 3, 7, 5), (0, 1, 5, 4), (2, 6, 7, 3), (0, 2, 3, 1), (4, 5, 7, 6)]
+    _edge_corners = [(0, 1), (2, 3), (4, 5), (6, 7), (0, 2), (1, 3), (4, 6), (5, 7), (0, 4), (1, 5), (2, 6), (3, 7)]
+
+    def __init__(self, min_point, max_point):
+        self.min_point = numpy.array(min_point, dtype=float)
+        self.max_point = numpy.array(max_point, dtype=float)
+        # corner index bits are x, y and z
+        self.corners = numpy.array([[(self.min_point, self.max_point)[(num >> axis) & 1][axis] for axis in range(3)]
+                                    for num in range(8)])
+        self._faces = None
+        self._edges = None
+
+    @property
+    def Faces(self):
+        if self._faces is None:
+            # center of mass of a rectangle is the mean of its corners
+            self._faces = [PlanarFace(self.corners[list(corners)], self.corners[list(corners)].mean(axis=0).tolist())
+                           for corners in self._face_corners]
+        return self._faces
+
+    @property
+    def Edges(self):
+        if self._edges is None:
+            self._edges = [Edge(self.corners[i], self.corners[j]) for i, j in self._edge_corners]
+        return self._edges
+
+    @property
+    def Vertexes(self):
+        return [Vertex(corner) for corner in self.corners.tolist()]
+
+    @property
+    def Solids(self):
+        return [self]
+
+    @property
+    def CenterOfMass(self):
+        return Vector(*((self.min_point + self.max_point)/2.))
+
+    @property
+    def Volume(self):
+        return float(numpy.prod(self.max_point - self.min_point))
+
+    @property
+    def BoundBox(self):
+        return BoundBox(self.min_point, self.max_point)
+
+    def isInside(self, point, tolerance, include_faces=True):
+        point_array = numpy.array([point.x, point.y, point.z])
+        if numpy.all(point_array > self.min_point + tolerance) and numpy.all(point_array < self.max_point - tolerance):
+            return True
+        return bool(include_faces and numpy.all(point_array >= self.min_point - tolerance) and
+                    numpy.all(point_array <= self.max_point + tolerance))
+
+    def hashCode(self):
+        return id(self)
+
+
+class Compound(object):
+    """
+    Compound of shapes (subset of FreeCAD Compound). Sub-shapes are collected from the
+    shapes in given order, shared sub-shapes are not merged.
+    """
+
+    def __init__(self, shapes):
+        self.shapes = list(shapes)
+
+    @property
+    def Solids(self):
+        return list(itertools.chain.from_iterable(shape.Solids for shape in self.shapes))
+
+    @property
+    def Faces(self):
+        return list(itertools.chain.from_iterable(shape.Faces for shape in self.shapes))
+
+    @property
+    def Edges(self):
+        return list(itertools.chain.from_iterable(shape.Edges for shape in self.shapes))
+
+    @property
+    def Vertexes(self):
+        return list(itertools.chain.from_iterable(shape.Vertexes for shape in self.shapes))
+
+    @property
+    def BoundBox(self):
+        bound_boxes = [shape.BoundBox for shape in self.shapes]
+        return BoundBox((min(bb.XMin for bb in bound_boxes), min(bb.YMin for bb in bound_boxes),
+                         min(bb.ZMin for bb in bound_boxes)),
+                        (max(bb.XMax for bb in bound_boxes), max(bb.YMax for bb in bound_boxes),
+                         max(bb.ZMax for bb in bound_boxes)))
+
+    def hashCode(self):
+        return id(self)
+
+
+def make_compound_filter(shapes):
+    """
+    Returns stand-in for compound filter containing given shapes.
+
+    :param shapes: A list containing shapes.
+
+    :return: CompoundFilter object.
+    """
+    return CompoundFilter(Compound(shapes))
+
+
+def make_box_grid(nx, ny, nz, size=1.0, gap=0.0):
+    """
+    Returns boxes in a regular grid. Boxes are ordered x first.
+
+    :param nx: An integer (number of boxes in x direction).
+    :param ny: An integer.
+    :param nz: An integer.
+    :param size: A float (edge length of boxes).
+    :param gap: A float (distance between boxes).
+
+    :return: A list containing BoxSolid objects.
+    """
+    step = size + gap
+    return [BoxSolid((i*step, j*step, k*step), (i*step+size, j*step+size, k*step+size))
+            for k in range(nz) for j in range(ny) for i in range(nx)]
+
+
+def make_edges_shape(edges):
+    """
+    Returns start and end points of edges (geometry backend function, see shapematching.set_geometry_backend).
+
+    :param edges: A list containing Edge objects.
+
+    :return: A tuple (starts, ends) containing NumPy arrays with shape (n, 3).
+    """
+    points = numpy.array([edge.points for edge in edges])
+    return points[:, 0, :], points[:, 1, :]
+
+
+def point_to_shape_distance(point, edges_shape):
+    """
+    Returns distance from point to edges (geometry backend function, see shapematching.set_geometry_backend).
+
+    :param point: Vector object.
+    :param edges_shape: A tuple from make_edges_shape.
+
+    :return: A float.
+    """
+    return _distance_to_segments(numpy.array([point.x, point.y, point.z]), edges_shape[0], edges_shape[1])
+
+
+def set_as_geometry_backend():
+    """
+    Sets this module as the geometry backend of shapematching.
+    """
+    shapematching.set_geometry_backend('numpy', make_edges_shape, point_to_shape_distance)
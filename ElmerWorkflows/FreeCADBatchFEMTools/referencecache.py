@@ -0,0 +1,173 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_FILE_NAME = 'references_cache.sqlite'
+# Maximum number of fingerprints kept in cache file (least recently used are removed)
+MAX_CACHE_ENTRIES = 1000
+
+
+def get_default_cache_file():
+    """
+    Returns path to the default reference cache file in the current working directory.
+
+    :return: A string.
+    """
+    return os.path.join(os.getcwd(), DEFAULT_CACHE_FILE_NAME)
+
+
+def _format_float(value):
+    """
+    Returns float formatted with 9 significant digits (hides rounding noise of OCC properties).
+
+    :param value: A float.
+
+    :return: A string.
+    """
+    return '{:.9g}'.format(value)
+
+
+def get_shape_fingerprint_values(shape):
+    """
+    Returns list of values describing the shape: shape type, number of sub-shapes,
+    area, volume, bounding box, center of mass and sorted vertex coordinates. Center of mass
+    and vertices distinguish shapes that are rotated, mirrored or moved within the same bounding box.
+
+    :param shape: FreeCAD shape object.
+
+    :return: A list containing strings.
+    """
+    bound_box = shape.BoundBox
+    values = [shape.ShapeType, str(len(shape.Solids)), str(len(shape.Faces)), str(len(shape.Edges)),
+              str(len(shape.Vertexes)), _format_float(shape.Area), _format_float(shape.Volume)]
+    values.extend(_format_float(value) for value in (bound_box.XMin, bound_box.YMin, bound_box.ZMin,
+                                                     bound_box.XMax, bound_box.YMax, bound_box.ZMax))
+    center_of_mass = getattr(shape, 'CenterOfMass', None)
+    if center_of_mass is not None:
+        values.extend(_format_float(value) for value in (center_of_mass.x, center_of_mass.y, center_of_mass.z))
+    for point in sorted((vertex.Point.x, vertex.Point.y, vertex.Point.z) for vertex in shape.Vertexes):
+        values.extend(_format_float(value) for value in point)
+    return values
+
+
+def create_geometry_fingerprint(compound_shape, shapes, params=None):
+    """
+    Creates fingerprint of the compound filter shape and the shapes to be matched. Each solid and
+    face of the compound shape is included separately so that changes in topology change
+    the fingerprint.
+
+    :param compound_shape: FreeCAD shape object (shape of the compound filter).
+    :param shapes: A list containing FreeCAD shape objects.
+    :param params: None or a list containing other values affecting the matching (e.g. search type).
+
+    :return: A string (sha256 hex digest).
+    """
+    fingerprint = hashlib.sha256()
+    for value in params or []:
+        fingerprint.update('{}\n'.format(value).encode('utf-8'))
+    for sub_shapes in (compound_shape.Solids, compound_shape.Faces, shapes):
+        fingerprint.update('{}\n'.format(len(sub_shapes)).encode('utf-8'))
+        for shape in sub_shapes:
+            fingerprint.update(' '.join(get_shape_fingerprint_values(shape)).encode('utf-8'))
+            fingerprint.update(b'\n')
+    return fingerprint.hexdigest()
+
+
+def _connect(cache_file):
+    """
+    Opens connection to the cache database and creates the table if needed. Column last_used
+    is added to tables created by earlier versions.
+
+    :param cache_file: Path to the cache database.
+
+    :return: sqlite3 connection.
+    """
+    connection = sqlite3.connect(cache_file)
+    with connection:
+        connection.execute('CREATE TABLE IF NOT EXISTS reference_names (fingerprint TEXT PRIMARY KEY, names TEXT, '
+                           'last_used REAL DEFAULT 0)')
+        columns = [row[1] for row in connection.execute('PRAGMA table_info(reference_names)')]
+        if 'last_used' not in columns:
+            connection.execute('ALTER TABLE reference_names ADD COLUMN last_used REAL DEFAULT 0')
+    return connection
+
+
+def load_reference_names(cache_file, fingerprint):
+    """
+    Returns cached reference names for the fingerprint. Marks the fingerprint as used.
+
+    :param cache_file: Path to the cache database.
+    :param fingerprint: A string (see function create_geometry_fingerprint).
+
+    :return: None or a list containing tuples of names e.g. [('Face1', 'Face3'), ('Face2',)].
+    """
+    if not os.path.isfile(cache_file):
+        return None
+    connection = _connect(cache_file)
+    try:
+        with connection:
+            row = connection.execute('SELECT names FROM reference_names WHERE fingerprint = ?',
+                                     (fingerprint,)).fetchone()
+            if row is not None:
+                connection.execute('UPDATE reference_names SET last_used = ? WHERE fingerprint = ?',
+                                   (time.time(), fingerprint))
+    finally:
+        connection.close()
+    if row is None:
+        return None
+    return [tuple(str(name) for name in names) for names in json.loads(row[0])]
+
+
+def save_reference_names(cache_file, fingerprint, names_list, max_entries=MAX_CACHE_ENTRIES):
+    """
+    Saves reference names for the fingerprint. Least recently used fingerprints are removed
+    so that at most max_entries fingerprints are kept.
+
+    :param cache_file: Path to the cache database.
+    :param fingerprint: A string (see function create_geometry_fingerprint).
+    :param names_list: A list containing tuples of names.
+    :param max_entries: None (no limit) or an integer.
+    """
+    connection = _connect(cache_file)
+    try:
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO reference_names (fingerprint, names, last_used) '
+                               'VALUES (?, ?, ?)',
+                               (fingerprint, json.dumps([list(names) for names in names_list]), time.time()))
+            if max_entries is not None:
+                connection.execute('DELETE FROM reference_names WHERE fingerprint NOT IN '
+                                   '(SELECT fingerprint FROM reference_names ORDER BY last_used DESC LIMIT ?)',
+                                   (max_entries,))
+    finally:
+        connection.close()
@@ -0,0 +1,229 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import itertools
+import math
+
+
+def get_bound_box_limits(bound_box, enlarge=0.0):
+    """
+    Returns limits of bounding box as a tuple. Bounding box is enlarged with given value.
+
+    :param bound_box: FreeCAD BoundBox (or any object with XMin, YMin, ZMin, XMax, YMax and ZMax).
+    :param enlarge: A float.
+
+    :return: A tuple (x_min, y_min, z_min, x_max, y_max, z_max).
+    """
+    return (bound_box.XMin - enlarge, bound_box.YMin - enlarge, bound_box.ZMin - enlarge,
+            bound_box.XMax + enlarge, bound_box.YMax + enlarge, bound_box.ZMax + enlarge)
+
+
+def bound_box_limits_overlap(limits1, limits2):
+    """
+    Returns True if bounding box limits overlap or touch each other.
+
+    :param limits1: A tuple (see function get_bound_box_limits).
+    :param limits2: A tuple (see function get_bound_box_limits).
+
+    :return: A boolean.
+    """
+    return (limits1[0] <= limits2[3] and limits2[0] <= limits1[3] and
+            limits1[1] <= limits2[4] and limits2[1] <= limits1[4] and
+            limits1[2] <= limits2[5] and limits2[2] <= limits1[5])
+
+
+def _get_default_cell_size(limits_list):
+    """
+    Returns median of the largest bounding box dimensions. Falls back to 1.0 if all
+    bounding boxes are points.
+
+    :param limits_list: A list containing bounding box limits.
+
+    :return: A float.
+    """
+    sizes = sorted(max(limits[3]-limits[0], limits[4]-limits[1], limits[5]-limits[2]) for limits in limits_list)
+    sizes = [size for size in sizes if size > 0]
+    if not sizes:
+        return 1.0
+    return sizes[len(sizes)//2]
+
+
+def _get_cell_ranges(grid, limits):
+    """
+    Returns ranges of grid cell indices covered by bounding box limits.
+
+    :param grid: A dictionary (see function create_bound_box_grid).
+    :param limits: A tuple (see function get_bound_box_limits).
+
+    :return: A list containing three ranges.
+    """
+    cell_size = grid['cell_size']
+    return [range(int(math.floor(limits[i]/cell_size)), int(math.floor(limits[i+3]/cell_size))+1) for i in range(3)]
+
+
+def create_bound_box_grid(limits_list, cell_size=None, max_cells_per_item=512):
+    """
+    Creates uniform grid index for bounding boxes. Each item is added to all grid cells
+    its bounding box touches. Items covering more than max_cells_per_item cells are
+    stored separately and returned as candidates for every query.
+
+    :param limits_list: A list containing bounding box limits (see function get_bound_box_limits).
+    :param cell_size: None or a float. If None, median of the largest bounding box dimensions is used.
+    :param max_cells_per_item: An integer.
+
+    :return: A dictionary {'cell_size': float, 'cells': {(i, j, k): [item indices]},
+                           'large_items': [item indices], 'limits': limits_list}.
+    """
+    if cell_size is None:
+        cell_size = _get_default_cell_size(limits_list)
+    grid = {'cell_size': float(cell_size), 'cells': {}, 'large_items': [], 'limits': limits_list}
+    for num, limits in enumerate(limits_list):
+        i_range, j_range, k_range = _get_cell_ranges(grid, limits)
+        if len(i_range) * len(j_range) * len(k_range) > max_cells_per_item:
+            grid['large_items'].append(num)
+            continue
+        for i in i_range:
+            for j in j_range:
+                for k in k_range:
+                    grid['cells'].setdefault((i, j, k), []).append(num)
+    return grid
+
+
+def find_bound_box_grid_candidates(grid, limits):
+    """
+    Returns indices of items whose bounding box overlaps given bounding box limits.
+
+    :param grid: A dictionary (see function create_bound_box_grid).
+    :param limits: A tuple (see function get_bound_box_limits).
+
+    :return: A sorted list containing item indices.
+    """
+    i_range, j_range, k_range = _get_cell_ranges(grid, limits)
+    if len(i_range) * len(j_range) * len(k_range) > len(grid['cells']):
+        # query covers most of the grid, check all items
+        candidates = range(len(grid['limits']))
+    else:
+        candidates = set(grid['large_items'])
+        cells = grid['cells']
+        for i in i_range:
+            for j in j_range:
+                for k in k_range:
+                    candidates.update(cells.get((i, j, k), ()))
+    item_limits = grid['limits']
+    return sorted(num for num in candidates if bound_box_limits_overlap(item_limits[num], limits))
+
+
+def find_bound_box_clusters(limits_list):
+    """
+    Returns connected components of items whose bounding boxes overlap or touch.
+
+    :param limits_list: A list containing bounding box limits (see function get_bound_box_limits).
+
+    :return: A list containing sorted lists of item indices. Clusters are ordered by their smallest index.
+    """
+    parents = list(range(len(limits_list)))
+
+    def find_root(num):
+        while parents[num] != num:
+            parents[num] = parents[parents[num]]
+            num = parents[num]
+        return num
+
+    grid = create_bound_box_grid(limits_list)
+    for num, limits in enumerate(limits_list):
+        for other_num in find_bound_box_grid_candidates(grid, limits):
+            root, other_root = find_root(num), find_root(other_num)
+            if root != other_root:
+                parents[max(root, other_root)] = min(root, other_root)
+    clusters = {}
+    for num in range(len(limits_list)):
+        clusters.setdefault(find_root(num), []).append(num)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def get_point_key(point, cell_size):
+    """
+    Returns point coordinates quantized to grid with given cell size. Points closer than
+    cell_size to each other are in the same or in the neighbouring cells.
+
+    :param point: FreeCAD Vector (or any object with x, y and z).
+    :param cell_size: A float.
+
+    :return: A tuple (i, j, k).
+    """
+    return (int(math.floor(point.x/cell_size)), int(math.floor(point.y/cell_size)),
+            int(math.floor(point.z/cell_size)))
+
+
+def get_midpoint_key(point1, point2, cell_size):
+    """
+    Returns midpoint of two points quantized to grid with given cell size (see function get_point_key).
+    The key does not depend on the order of the points.
+
+    :param point1: FreeCAD Vector (or any object with x, y and z).
+    :param point2: FreeCAD Vector (or any object with x, y and z).
+    :param cell_size: A float.
+
+    :return: A tuple (i, j, k).
+    """
+    return (int(math.floor(0.5*(point1.x+point2.x)/cell_size)), int(math.floor(0.5*(point1.y+point2.y)/cell_size)),
+            int(math.floor(0.5*(point1.z+point2.z)/cell_size)))
+
+
+def create_signature_index(signatures):
+    """
+    Creates dictionary from signatures to item indices. Signature is a tuple (group, point_key)
+    where group is any hashable value that has to match exactly and point_key is
+    a tuple from function get_point_key.
+
+    :param signatures: A list containing signatures.
+
+    :return: A dictionary {signature: [item indices]}.
+    """
+    index = {}
+    for num, signature in enumerate(signatures):
+        index.setdefault(signature, []).append(num)
+    return index
+
+
+def find_signature_index_candidates(index, signature):
+    """
+    Returns indices of items which have same group and point key in the same or
+    neighbouring cell as the given signature.
+
+    :param index: A dictionary (see function create_signature_index).
+    :param signature: A tuple (group, point_key).
+
+    :return: A sorted list containing item indices.
+    """
+    group, (i, j, k) = signature
+    candidates = []
+    for d_i, d_j, d_k in itertools.product((-1, 0, 1), repeat=3):
+        candidates.extend(index.get((group, (i+d_i, j+d_j, k+d_k)), ()))
+    return sorted(candidates)
@@ -0,0 +1,764 @@
+"""  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import itertools
+import math
+
+import shapeindex
+import tracing
+
+"""
+Geometry protocol
+
+Functions in this module do not depend on FreeCAD. They use only the following attributes
+and methods of the shapes, so they work with FreeCAD shapes and with the pure Python shapes
+in :mod:`numpygeometry`:
+
+    vector: x, y, z, Length, sub(vector)
+    bounding box: XMin, YMin, ZMin, XMax, YMax, ZMax
+    vertex: Point, X, Y, Z
+    edge: Vertexes, BoundBox
+    face: Vertexes, Edges, CenterOfMass, BoundBox, hashCode(), isInside(point, tolerance, check_face),
+          ParameterRange, valueAt(u, v), isPartOfDomain(u, v)
+    solid: Vertexes, Edges, Faces, CenterOfMass, BoundBox, isInside(point, tolerance, include_faces)
+    compound filter: Shape (with Solids, Faces and Edges)
+
+Distance from a point to the edges of a face is computed with the functions of the
+geometry backend (see set_geometry_backend). FreeCADBatchFEMTools sets the FreeCAD backend.
+"""
+# Functions of the geometry backend (see set_geometry_backend)
+_geometry_backend = {'name': None, 'make_edges_shape': None, 'point_to_shape_distance': None}
+
+def set_geometry_backend(name, make_edges_shape, point_to_shape_distance):
+    """
+    Sets the geometry backend functions that can not be expressed with the geometry protocol.
+
+    :param name: A string.
+    :param make_edges_shape: function(list of edges) returning shape given to point_to_shape_distance.
+    :param point_to_shape_distance: function(point, edges_shape) returning distance (float).
+    """
+    _geometry_backend['name'] = name
+    _geometry_backend['make_edges_shape'] = make_edges_shape
+    _geometry_backend['point_to_shape_distance'] = point_to_shape_distance
+
+def get_geometry_backend_name():
+    """
+    Returns name of the current geometry backend.
+
+    :return: None or a string.
+    """
+    return _geometry_backend['name']
+
+def isclose(a, b, rel_tol=1e-4, abs_tol=1e-4):
+    """
+    Returns True if a and b are close to each other (within absolute or relative tolerance).
+
+    :param a: float
+    :param b: float
+    :param rel_tol: float
+    :param abs_tol: float
+    :return: bool
+    """
+    return abs(a-b) <= max(rel_tol * max(abs(a), abs(b)), abs_tol)
+
+def vectors_are_same(vec1,vec2,tol=1e-4):
+    """
+    Compares vectors vec1 and vec2. If they are same within a tolerance returns
+    True if not returns false.
+
+    :param vec1: Vector 1 
+    :param vec2: Vector 2 to be compared with Vector 1
+    :return: Boolean
+    """
+    vec3 = vec1.sub(vec2)
+    return isclose(vec3.Length, 0., abs_tol=tol)
+
+def faces_with_vertices_in_symmetry_plane(face_object_list, plane=None, abs_tol=1e-4):
+    """
+    Returns faces from a list of FreeCAD face objects. The returned faces have to 
+    be in a defined symmetry plane. The face is in symmetry plane if all of its points
+    and the center of mass are in the plane.
+
+    :param face_object_list: list of FreeCAD face objects
+    :param plane: symmetry plane.
+
+    :return: list of FreeCAD face objects that are in the given symmetry plane
+    """
+    if plane is None: return None
+    face_object_list_out = []
+    for face_object in face_object_list:
+        vertices = face_object.Vertexes
+        center_of_mass = face_object.CenterOfMass
+        if plane in ['zx', 'xz']: center_compare_value = center_of_mass.y
+        elif plane in ['xy', 'yx']: center_compare_value = center_of_mass.z
+        elif plane in ['yz', 'zy']: center_compare_value = center_of_mass.x
+        else: raise ValueError("Wrong keyword for plane variable, should be: zx, xy, yz, xz, yx or zy!")
+        for i, vertex in enumerate(vertices):
+            if plane in ['zx', 'xz']: compare_value = vertex.Y
+            elif plane in ['xy', 'yx']: compare_value = vertex.Z
+            elif plane in ['yz', 'zy']: compare_value = vertex.X
+            else: raise ValueError("Wrong keyword for plane variable, should be: zx, xy, yz, xz, yx or zy!")
+            if not isclose(compare_value, 0., abs_tol=abs_tol): break
+        if i==len(vertices)-1 and isclose(center_compare_value, 0., abs_tol=abs_tol): face_object_list_out.append(face_object)
+    return face_object_list_out
+
+def faces_same_center_of_masses(face1, face2, tolerance=0.0001):    
+    """
+    Compare two faces by comparing if they have same centers of mass with the tolerance.
+
+    :param face1: FreeCAD face object
+    :param face2: FreeCAD face object
+    :param tolerance: float
+
+    """
+    return vectors_are_same(face1.CenterOfMass, face2.CenterOfMass, tolerance)
+
+def faces_are_same(face1, face2, tolerance=1e-4):
+    """
+    Return true if face1 is same as face2. The faces are same if they have
+    the same center of masses and same vertices.
+
+    :param face1: FreeCAD face object
+    :param face2: FreeCAD face object
+
+    :return: bool
+    """
+    return faces_same_center_of_masses(face1, face2, tolerance) and faces_have_same_vertices(face1, face2, tolerance)
+
+def get_face_signature(face, tolerance=1e-4):
+    """
+    Returns signature of a face: number of vertices and center of mass quantized with tolerance.
+    Faces that are same according to :meth:`faces_are_same` have the same number of vertices
+    and centers of mass in the same or neighbouring quantization cells.
+
+    :param face: FreeCAD face object
+    :param tolerance: float
+
+    :return: tuple
+    """
+    return len(face.Vertexes), shapeindex.get_point_key(face.CenterOfMass, tolerance)
+
+def get_solid_signature(solid, tolerance=1e-4):
+    """
+    Returns signature of a solid: number of faces and center of mass quantized with ten times
+    the tolerance (center of mass of a solid sums up the differences of its faces).
+    See :meth:`get_face_signature`.
+
+    :param solid: FreeCAD solid object
+    :param tolerance: float
+
+    :return: tuple
+    """
+    return len(solid.Faces), shapeindex.get_point_key(solid.CenterOfMass, 10*tolerance)
+
+def create_face_index(face_object_list, tolerance=1e-4):
+    """
+    Creates signature index for faces. Matching faces can then be found with
+    :meth:`find_faces_in_face_index` without comparing against every face in the list.
+
+    :param face_object_list: list of FreeCAD face objects
+    :param tolerance: float
+
+    :return: dictionary {'faces': face_object_list, 'index': signature index, 'tolerance': tolerance}
+    """
+    signatures = [get_face_signature(face_object, tolerance) for face_object in face_object_list]
+    return {'faces': face_object_list,
+            'index': shapeindex.create_signature_index(signatures),
+            'tolerance': tolerance}
+
+def find_faces_in_face_index(face_index, search_face):
+    """
+    Returns indices of the faces in face index that are same as search_face (see :meth:`faces_are_same`).
+
+    :param face_index: dictionary from :meth:`create_face_index`
+    :param search_face: FreeCAD face object
+
+    :return: sorted list of integers
+    """
+    tolerance = face_index['tolerance']
+    faces = face_index['faces']
+    candidates = shapeindex.find_signature_index_candidates(face_index['index'],
+                                                           get_face_signature(search_face, tolerance))
+    return [num for num in candidates if faces_are_same(search_face, faces[num], tolerance)]
+
+def is_face_in_list(search_face, face_object_list, tolerance=1e-4, face_index=None):
+    """
+    Returns true if search_face is in the face_object_list. Compares faces with 
+    face_compare method. If face_index (see :meth:`create_face_index`) of the
+    face_object_list is given, only faces with matching signature are compared.
+
+    :param search_face: FreeCAD face object
+    :param face_object_list: list of FreeCAD face objects
+    :param tolerance: float
+    :param face_index: None or dictionary from :meth:`create_face_index`
+    """
+    if face_index is not None:
+        return len(find_faces_in_face_index(face_index, search_face)) > 0
+    for face_object in face_object_list:
+        if faces_are_same(search_face, face_object, tolerance): return True
+    return False
+
+def remove_compare_face_from_list(cface, face_object_list, tolerance=1e-4):
+    """
+    Removes the first FreeCAD face object that matches in the FreeCAD face object list. 
+    Uses face_compare to determine if the face is to be removed. 
+
+    :param cface: a FreeCAD face object to be compared
+    :param face_object_list: the list of FreeCAD face objects where the face 
+                             is to be removed in case of a match
+
+    :return: list of FreeCAD face objects that are removed from the original list of 
+             FreeCAD face objects.
+    """
+ 
+    for i, face_object in enumerate(face_object_list):
+        if faces_are_same(cface, face_object): 
+            return face_object_list.pop(i)
+    return None
+
+def remove_compare_faces_from_list(compare_face_object_list, face_object_list):
+    """
+    Removes all the face objects in compare_face_object_list that match to the face objects in 
+    the face_object_list. Uses face_compare to determine if the face is to be removed. 
+    The matching faces are found with a signature index (see :meth:`create_face_index`).
+
+    :param compare_face_object_list: list of FreeCAD face objects to be compared
+    :param face_object_list: original list of FreeCAD face objects
+
+    :return: list of FreeCAD face objects that are removed from the original list of 
+             FreeCAD face objects.
+    """
+    face_index = create_face_index(face_object_list)
+    removed_nums = set()
+    removed = []
+    for face_object in compare_face_object_list:
+        for num in find_faces_in_face_index(face_index, face_object):
+            if num not in removed_nums:
+                removed_nums.add(num)
+                removed.append(face_object_list[num])
+                break
+        else:
+            removed.append(None)
+    face_object_list[:] = [face_object for num, face_object in enumerate(face_object_list) if num not in removed_nums]
+    return removed 
+
+def faces_have_same_vertices(face1, face2, tolerance=0.0001):
+    """
+    Compare two faces by comparing that they have same number of vertices and 
+    the vertices are in identical coordinates with the tolerance. Return 
+    truth value to the faces are the same in this regard.
+
+    :param face1: FreeCAD face object
+    :param face2: FreeCAD face object
+    :return: bool
+    """
+    face1_vertices, face2_vertices = face1.Vertexes, face2.Vertexes
+    if len(face1_vertices) != len(face2_vertices):
+        return False
+    face_vertices_found = []
+    for vertex in face2_vertices:
+        for cvertex in face1_vertices:
+            if vectors_are_same(vertex.Point,cvertex.Point, tolerance):                   
+                face_vertices_found.append(1)
+    return len(face_vertices_found) == len(face2_vertices) and len(face_vertices_found) == len(face1_vertices)
+
+def is_point_inside_face(face, vector, tolerance=0.0001):
+    """
+    Returns True if point is inside face.
+
+    WARNING: This function calls function face.isInside which does NOT respect tolerance
+             https://forum.freecadweb.org/viewtopic.php?t=31524
+
+    :param face: FreeCAD face object
+    :param vector: Vector
+    :param tolerance: float
+
+    :return: bool
+    """
+    tracing.count('isInside')
+    return face.isInside(vector, tolerance, True)
+
+def is_point_inside_solid(solid, vector, tolerance=0.0001, include_faces=True):
+    """
+    Returns True if point is inside solid.
+
+    :param solid: FreeCAD solid object
+    :param vector: Vector
+    :param tolerance: float
+    :param include_faces: bool
+
+    :return: bool
+    """
+    tracing.count('isInside')
+    return solid.isInside(vector, tolerance, include_faces)
+
+def is_point_inside_solid_with_round(solid, vector, tolerance=0.0001, round_digits=6):
+    """
+    Returns True if point is inside solid (faces included) with
+    additional tolerance (8 points checked).
+    Tries upper and lower rounding of coordinates with precision round_digits.
+
+    :param solid: FreeCAD solid object
+    :param vector: Vector
+    :param tolerance: float
+    :param round_digits: integer
+
+    :return: bool
+    """
+    rounding = 10**round_digits
+    x_floor, x_ceil = math.floor(rounding*vector.x)/rounding, math.ceil(rounding*vector.x)/rounding
+    y_floor, y_ceil = math.floor(rounding*vector.y)/rounding, math.ceil(rounding*vector.y)/rounding
+    z_floor, z_ceil = math.floor(rounding*vector.z)/rounding, math.ceil(rounding*vector.z)/rounding
+    for coordinates in itertools.product([x_floor, x_ceil], [y_floor, y_ceil], [z_floor, z_ceil]):
+        vector.x = coordinates[0]
+        vector.y = coordinates[1]
+        vector.z = coordinates[2]
+        if is_point_inside_solid(solid, vector, tolerance):
+            return True
+    return False
+
+def is_same_vertices(vertex1, vertex2, tolerance=0.0001):
+    """
+    Checks if given vertices are same.
+
+    :param vertex1: FreeCAD vertex
+    :param vertex2: FreeCAD vertex
+    :param tolerance: float
+
+    :return: bool
+    """
+    if abs(vertex1.X - vertex2.X) < tolerance:
+        if abs(vertex1.Y - vertex2.Y) < tolerance:
+            if abs(vertex1.Z - vertex2.Z) < tolerance:
+                return True
+    return False
+
+def is_same_edge(edge1, edge2, tolerance=0.0001):
+    """
+    Checks if given edges are in same place by comparing end points.
+
+    :param edge1: FreeCAD edge
+    :param edge2: FreeCAD edge
+    :param tolerance: float
+
+    :return: bool
+    """
+    if is_same_vertices(edge1.Vertexes[0], edge2.Vertexes[0], tolerance):
+        if is_same_vertices(edge1.Vertexes[1], edge2.Vertexes[1], tolerance):
+            return True
+    elif is_same_vertices(edge1.Vertexes[0], edge2.Vertexes[1], tolerance):
+        if is_same_vertices(edge1.Vertexes[1], edge2.Vertexes[0], tolerance):
+            return True
+    return False
+
+def get_edge_signature(edge, tolerance=0.0001):
+    """
+    Returns signature of an edge: number of vertices and the midpoint of the end points
+    quantized with tolerance. The signature does not depend on the direction of the edge.
+    Edges that are same according to :meth:`is_same_edge` have the same number of vertices
+    and midpoints in the same or neighbouring quantization cells.
+
+    :param edge: FreeCAD edge
+    :param tolerance: float
+
+    :return: tuple
+    """
+    vertices = edge.Vertexes
+    return len(vertices), shapeindex.get_midpoint_key(vertices[0].Point, vertices[-1].Point, tolerance)
+
+def is_edge_in_solid(solid, edge, tolerance=0.0001):
+    """
+    Returns True if edge inside solid by comparing is edge vertices inside solid.
+
+    :param solid: FreeCAD solid object
+    :param edge: FreeCAD edge object
+    :param tolerance: float
+
+    :return: bool
+    """
+    for vertex in edge.Vertexes:
+        if not is_point_inside_solid(solid, vertex.Point, tolerance):
+            return False
+    return True
+
+# Points found by get_point_from_face, keys are shape hash codes and values tuples (u, v, (x, y, z))
+_face_point_cache = {}
+
+def clear_face_point_cache():
+    """
+    Clears cached face points (see :meth:`get_point_from_face`).
+    """
+    _face_point_cache.clear()
+
+def is_point_on_face_edges(face, p2, tol=0.0001, edges_shape=None):
+    """
+    Checks if given point is on same edge of given face.
+
+    :param face: FreeCAD face object
+    :param p2: FreeCAD Vector object
+    :param tol: float
+    :param edges_shape: None or compound of face edges (created here if not given)
+
+    :return: bool
+    """
+    if edges_shape is None:
+        edges_shape = _geometry_backend['make_edges_shape'](face.Edges)
+    return _geometry_backend['point_to_shape_distance'](p2, edges_shape) < tol
+
+def _get_uv_from_face_close_to_edge(face):
+    """
+    Returns parameters of the point found by :meth:`get_point_from_face_close_to_edge`.
+
+    :param face: FreeCAD face object.
+
+    :return: None or tuple (u, v).
+    """
+    u_min, u_max, v_min, v_max = face.ParameterRange
+    p1 = face.valueAt(u_min, v_min)
+    u_test, v_test = u_min+1, v_min+1
+    edges_shape = None
+    while u_test < u_max and v_test < v_max:
+        p2 = face.valueAt(u_test, v_test)
+        # Check at least two coordinates moved 1 unit
+        if (abs(p1.x - p2.x) >= 1) + (abs(p1.y - p2.y) >= 1) + (abs(p1.z - p2.z) >= 1) > 1:
+            if edges_shape is None:
+                edges_shape = _geometry_backend['make_edges_shape'](face.Edges)
+            if is_point_on_face_edges(face, p2, edges_shape=edges_shape):
+                v_test += 0.5
+                continue  # go back at the beginning of while
+            if face.isPartOfDomain(u_test, v_test):
+                return u_test, v_test
+            return None
+        u_test, v_test = u_test+1, v_test+1
+    return None
+
+def get_point_from_face_close_to_edge(face):
+    """
+    Increases parameter range minimum values of face by one until at least
+    two of the x, y and z coordinates of the corresponding point has moved at least 1 unit.
+    If point is not found None is returned.
+
+    :param face: FreeCAD face object.
+
+    :return: None or FreeCAD vector object.
+    """
+    uv = _get_uv_from_face_close_to_edge(face)
+    if uv is None:
+        return None
+    return face.valueAt(uv[0], uv[1])
+
+def get_face_uv_sample_points(face, split_count):
+    """
+    Returns parameters of the inner points of a split_count x split_count grid in the
+    parameter range of the face. The points are ordered by their distance to the center
+    of the parameter range, so that the points most likely in the face domain come first.
+
+    :param face: FreeCAD face object.
+    :param split_count: integer
+
+    :return: list of tuples (u, v)
+    """
+    u_min, u_max, v_min, v_max = face.ParameterRange
+    u_split_len, v_split_len = (u_max-u_min)/float(split_count), (v_max-v_min)/float(split_count)
+    center = split_count/2.
+    grid_indices = sorted(itertools.product(range(1, split_count), repeat=2),
+                          key=lambda ij: (ij[0]-center)**2 + (ij[1]-center)**2)
+    return [(u_min + i*u_split_len, v_min + j*v_split_len) for i, j in grid_indices]
+
+def find_face_uv_point_in_domain(face, uv_points):
+    """
+    Returns the first parameter point in uv_points that is part of the face domain.
+
+    :param face: FreeCAD face object.
+    :param uv_points: list of tuples (u, v) (see :meth:`get_face_uv_sample_points`)
+
+    :return: None or tuple (u, v)
+    """
+    for u_test, v_test in uv_points:
+        if face.isPartOfDomain(u_test, v_test):
+            return u_test, v_test
+    return None
+
+def get_point_from_face(face):
+    """
+    Returns point from given face.
+
+    Found points are cached by the shape hash code. The cached parameters are used if they are
+    in the domain of the face, the face still gives the same point with them and the point is
+    inside the face (faces on the same surface, e.g. split fragments, may share the hash code).
+
+    :param face: FreeCAD face object.
+
+    :return: None or FreeCAD vector object
+    """
+    face_hash = face.hashCode()
+    cached = _face_point_cache.get(face_hash)
+    if cached is not None:
+        u_cached, v_cached, cached_coordinates = cached
+        if face.isPartOfDomain(u_cached, v_cached):
+            point = face.valueAt(u_cached, v_cached)
+            if (isclose(math.sqrt((point.x-cached_coordinates[0])**2 + (point.y-cached_coordinates[1])**2 +
+                                  (point.z-cached_coordinates[2])**2), 0.) and
+                    is_point_inside_face(face, point)):
+                return point
+    uv = _get_uv_from_face_close_to_edge(face)
+    if uv is None:
+        # use primes so same points are not checked multiple times
+        for split_count in [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83,
+                            89, 97, 101, 103, 107, 109, 113, 127, 131, 137, 139, 149, 151, 157, 163, 167, 173, 179,
+                            181, 191, 193, 197, 199, 211, 223, 227, 229, 233, 239, 241, 251, 257, 263, 269, 271, 277,
+                            281, 283, 293, 307, 311, 313, 317, 331, 337, 347, 349, 353, 359, 367, 373, 379, 383, 389,
+                            397, 401, 409, 419, 421, 431, 433, 439, 443, 449, 457, 461, 463, 467, 479, 487, 491, 499,
+                            503, 509, 521, 523, 541]:
+            uv = find_face_uv_point_in_domain(face, get_face_uv_sample_points(face, split_count))
+            if uv is not None:
+                break
+        else:
+            return None
+    point = face.valueAt(uv[0], uv[1])
+    _face_point_cache[face_hash] = (uv[0], uv[1], (point.x, point.y, point.z))
+    return point
+
+def is_face_in_face(face1, face2, tolerance=0.0001):
+    """
+    Returns True if all vertices and point in face1 also belongs to face2
+
+    :param face1: FreeCAD face object
+    :param face2: FreeCAD face object
+    :param tolerance: float
+
+    :return: bool
+    """
+    for vertex in face1.Vertexes:
+        if not is_point_inside_face(face2, vertex.Point, tolerance):
+            return False
+    point_in_face1 = get_point_from_face(face1)
+    if point_in_face1 is not None:
+        if not is_point_inside_face(face2, point_in_face1, tolerance):
+            return False
+    else:
+        raise ValueError('Face point not found')
+    return True
+
+def is_face_in_solid(solid, face, tolerance=0.0001, use_round=True):
+    """
+    Checks if all face vertices and one additional point from face are inside solid.
+    If use_round is True calls function meth:`is_point_inside_solid_with_round` to check
+    if point inside solid.
+
+    :param solid: FreeCAD solid object
+    :param face: FreeCAD face object
+    :param tolerance: float
+    :param use_round: bool
+
+    :return: bool
+    """
+    if use_round:
+        is_point_in_solid_func = is_point_inside_solid_with_round
+    else:
+        is_point_in_solid_func = is_point_inside_solid
+    for vertex in face.Vertexes:
+        if not is_point_in_solid_func(solid, vertex.Point, tolerance):
+            return False
+    point_in_face = get_point_from_face(face)
+    if point_in_face is not None:
+        if not is_point_in_solid_func(solid, point_in_face, tolerance):
+            return False
+    else:
+        raise ValueError('Face point not found')
+    return True
+
+def solids_are_the_same(solid1, solid2):
+    """
+    Compare two solids by comparing have they same number of faces and the faces are identical. 
+    Return truth value to the solids are the same in this regard.
+    
+    :param solid1: FreeCAD solid object
+    :param solid2: FreeCAD solid object
+    :return: bool
+    """
+    solid1_faces, solid2_faces = solid1.Faces, solid2.Faces
+    if len(solid1_faces) != len(solid2_faces):
+        return False
+    face_index = create_face_index(solid1_faces)
+    nof_faces_found = 0
+    for face in solid2_faces:
+        nof_faces_found += len(find_faces_in_face_index(face_index, face))
+    return nof_faces_found == len(solid2_faces)
+
+def create_compound_filter_edge_index(compound_filter, tolerance=0.0001):
+    """
+    Creates signature index over the edges of the compound filter (see :meth:`get_edge_signature`).
+    The index should be created once per compound filter and given to :meth:`find_compound_filter_edge`.
+
+    :param compound_filter: FreeCAD compound filter.
+    :param tolerance: float
+
+    :return: dictionary {'edges': list of FreeCAD edges, 'index': signature index, 'tolerance': tolerance}
+    """
+    edges = compound_filter.Shape.Edges
+    signatures = [get_edge_signature(c_edge, tolerance) for c_edge in edges]
+    return {'edges': edges,
+            'index': shapeindex.create_signature_index(signatures),
+            'tolerance': tolerance}
+
+def find_compound_filter_edge(compound_filter, edge, edge_index=None):
+    """
+    Find which edge in the compound filter object is the edge as the one given in second argument.
+    Returns the name of the edge in compound filter.
+
+    :param compound_filter: FreeCAD compound filter.
+    :param edge: FreeCAD edge.
+    :param edge_index: None or index from :meth:`create_compound_filter_edge_index`
+                       (created here if not given).
+
+    :return: A string.
+    """
+    if edge_index is None:
+        edge_index = create_compound_filter_edge_index(compound_filter)
+    edges = edge_index['edges']
+    tolerance = edge_index['tolerance']
+    candidates = shapeindex.find_signature_index_candidates(edge_index['index'], get_edge_signature(edge, tolerance))
+    for num in candidates:
+        if is_same_edge(edges[num], edge, tolerance):
+            return str(num+1)
+    raise ValueError('Edge not found')
+
+def find_compound_filter_boundary(compound_filter, face):
+    """
+    Find which face in the compound filter object is the face as the one given in second argument.
+    Returns the name of the face in compound filter.
+
+    :param compound_filter: FreeCAD compound filter
+    :param face: FreeCAD face object
+    :return: string
+    """
+    faces = compound_filter.Shape.Faces
+    face_found = None
+    for num, cface in enumerate(faces):
+        if faces_have_same_vertices(cface, face):
+            face_found = num
+    if face_found is None: return None
+    string = "Face" + str(face_found+1)
+    return string
+
+def create_compound_filter_solid_index(compound_filter, tolerance=1e-4):
+    """
+    Creates signature index over the solids of the compound filter (see :meth:`get_solid_signature`).
+    The index should be created once per compound filter and given to :meth:`find_compound_filter_solid`.
+
+    :param compound_filter: FreeCAD compound filter
+    :param tolerance: float
+
+    :return: dictionary {'solids': list of FreeCAD solid objects, 'index': signature index, 'tolerance': tolerance}
+    """
+    solids = compound_filter.Shape.Solids
+    signatures = [get_solid_signature(csolid, tolerance) for csolid in solids]
+    return {'solids': solids,
+            'index': shapeindex.create_signature_index(signatures),
+            'tolerance': tolerance}
+
+def find_compound_filter_solid(compound_filter, solid, solid_index=None):
+    """
+    Find which solid in the compound filter object is the solid as the one given in second argument.
+    Returns the name of the solid in compound filter.
+
+    :param compound_filter: FreeCAD compound filter
+    :param solid: FreeCAD solid object
+    :param solid_index: None or index from :meth:`create_compound_filter_solid_index`
+                        (created here if not given).
+    :return: string
+    """
+    if solid_index is None:
+        solid_index = create_compound_filter_solid_index(compound_filter)
+    solids = solid_index['solids']
+    candidates = shapeindex.find_signature_index_candidates(solid_index['index'],
+                                                           get_solid_signature(solid, solid_index['tolerance']))
+    solid_found = None
+    for num in candidates:
+        if solids_are_the_same(solids[num], solid):
+            solid_found = num
+    if solid_found is None: return None
+    string = "Solid" + str(solid_found+1)
+    return string
+
+def create_compound_filter_face_index(compound_filter, tolerance=0.0001):
+    """
+    Creates a bounding box grid index over the faces of the compound filter.
+    The index should be created once per compound filter and given to
+    :meth:`find_compound_filter_boundaries`.
+
+    :param compound_filter: FreeCAD compound filter
+    :param tolerance: float (bounding boxes are enlarged with tolerance)
+
+    :return: dictionary {'faces': list of FreeCAD face objects, 'grid': bounding box grid}
+    """
+    faces = compound_filter.Shape.Faces
+    limits_list = [shapeindex.get_bound_box_limits(cface.BoundBox, tolerance) for cface in faces]
+    return {'faces': faces, 'grid': shapeindex.create_bound_box_grid(limits_list)}
+
+def find_compound_filter_boundaries(compound_filter, face, used_compound_face_names=None, face_index=None):
+    """
+    Finds all faces in the compound filter object which are inside given face.
+    Returns a tuple containing all names of the faces in compound filter.
+    If list used_compound_face_names is given checks that found face is not already used and
+    face is not already found here (relates to argument 'separate_boundaries' in other functions).
+    Only the compound filter faces whose bounding box overlaps the bounding box of the face
+    are checked with :meth:`is_face_in_face`.
+
+    :param compound_filter: FreeCAD compound filter
+    :param face: FreeCAD face object
+    :param used_compound_face_names: None or a list/set.
+    :param face_index: None or index from :meth:`create_compound_filter_face_index`
+                       (created here if not given).
+    :return: tuple
+    """
+    if face_index is None:
+        face_index = create_compound_filter_face_index(compound_filter)
+    cfaces = face_index['faces']
+    face_limits = shapeindex.get_bound_box_limits(face.BoundBox)
+    face_name_list, already_found_cfaces = [], []
+    for num in shapeindex.find_bound_box_grid_candidates(face_index['grid'], face_limits):
+        cface = cfaces[num]
+        if is_face_in_face(cface, face):
+            f_name = "Face" + str(num+1)
+            if used_compound_face_names is not None:
+                if f_name in used_compound_face_names:
+                    continue
+                face_already_found = False
+                for found_cface in already_found_cfaces:
+                    if is_face_in_face(cface, found_cface):
+                        face_already_found = True
+                        break
+                if face_already_found:
+                    continue
+                already_found_cfaces.append(cface)
+            face_name_list.append(f_name)
+    if len(face_name_list) == 0:
+        raise ValueError("Faces not found")
+    return tuple(face_name_list)
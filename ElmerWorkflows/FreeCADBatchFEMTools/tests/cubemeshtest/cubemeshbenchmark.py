@@ -0,0 +1,297 @@
+import argparse
+import collections
+import csv
+import itertools
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import cubemeshtest
+
+sys.path.insert(0, os.path.join(cubemeshtest.directory, '..', '..'))
+import tracing
+
+description = 'Runs cubemeshtest_freecadscript.py with FreeCAD for all combinations of number of cubes, mesh sizes and'
+description += ' point search modes. Writes execution times of stages to JSON and CSV files, fits scaling exponents'
+description += ' (time ~ N^exponent) and compares results with a baseline.'
+
+b_help = 'Baseline JSON file (results of earlier run). Exit code is 1 if regressions are found'
+sb_help = 'Saves results also to given baseline JSON file'
+t_help = 'Relative increase of execution time that is a regression'
+md_help = 'Minimum increase of execution time in seconds that is a regression'
+et_help = 'Increase of scaling exponent that is a regression'
+
+
+def parse_bool(value):
+    """
+    Converts 'true'/'false' string to boolean.
+
+    :param value: A string.
+
+    :return: A boolean.
+    """
+    if value.lower() not in ['true', 'false']:
+        raise argparse.ArgumentTypeError("Boolean value expected (true or false)")
+    return value.lower() == 'true'
+
+
+def read_trace_stages(trace_file):
+    """
+    Reads stage wall times, OCC predicate counts and memory use from trace file (see tracing.py).
+    Times and counters of stages called several times are summed, for memory values the maximum is used.
+
+    :param trace_file: A string.
+
+    :return: A dictionary {stage name: {'wall time': float, 'calls': int, 'counters': dict, 'rss (kB)': int,
+                                        'children peak rss (kB)': int}}.
+    """
+    if not os.path.isfile(trace_file):
+        return {}
+    with open(trace_file) as f:
+        events = json.load(f)['traceEvents']
+    stages = collections.OrderedDict()
+    for event in events:
+        stage = stages.setdefault(event['name'], {'wall time': 0., 'calls': 0, 'counters': {},
+                                                  'rss (kB)': None, 'children peak rss (kB)': None})
+        stage['wall time'] += event['args']['wall time (s)']
+        stage['calls'] += 1
+        for name, value in event['args']['counters'].items():
+            stage['counters'][name] = stage['counters'].get(name, 0) + value
+        for key, event_keys in (('rss (kB)', ('rss start (kB)', 'rss end (kB)')),
+                                ('children peak rss (kB)', ('children peak rss (kB)',))):
+            values = [value for value in [event['args'].get(event_key) for event_key in event_keys] + [stage[key]]
+                      if value is not None]
+            if values:
+                stage[key] = max(values)
+    return stages
+
+
+def run_case(parameters, repeats, freecad_executable, output_directory):
+    """
+    Runs one benchmark case. If repeats is greater than one, the minimum time of each stage is used.
+
+    :param parameters: A dictionary (keyword arguments of cubemeshtest.write_parameters_file).
+    :param repeats: An integer.
+    :param freecad_executable: A string.
+    :param output_directory: A string.
+
+    :return: A dictionary or None if the run failed.
+    """
+    results_file = os.path.join(cubemeshtest.directory, 'cubemeshtestresults.json')
+    trace_file = os.path.join(output_directory, 'trace_n{}_m{}_ps{}.json'.format(
+        parameters['number_of_cubes'], parameters['cube_mesh_size'], parameters['point_search']))
+    record = None
+    for _ in range(repeats):
+        for file_name in [results_file, trace_file]:
+            if os.path.isfile(file_name):
+                os.remove(file_name)
+        cubemeshtest.write_parameters_file(write_results=True, **parameters)
+        env = dict(os.environ)
+        env[tracing.TRACE_ENVIRONMENT_VARIABLE] = trace_file
+        if not cubemeshtest.run_freecad(freecad_executable, env) or not os.path.isfile(results_file):
+            return None
+        with open(results_file) as f:
+            results = json.load(f)
+        results['trace stages'] = read_trace_stages(trace_file)
+        if record is None:
+            record = results
+        else:
+            for name, value in results['stages'].items():
+                record['stages'][name] = min(record['stages'].get(name, value), value)
+    record['repeats'] = repeats
+    return record
+
+
+def fit_scaling_exponent(numbers, times):
+    """
+    Fits exponent p of time = c*N^p with least squares in log-log scale.
+
+    :param numbers: A list containing number of cubes.
+    :param times: A list containing execution times.
+
+    :return: A float or None if less than two points with positive time are given.
+    """
+    points = [(math.log(n), math.log(t)) for n, t in zip(numbers, times) if n > 0 and t > 0]
+    if len(set(x for x, _ in points)) < 2:
+        return None
+    x_mean = sum(x for x, _ in points) / len(points)
+    y_mean = sum(y for _, y in points) / len(points)
+    return (sum((x-x_mean)*(y-y_mean) for x, y in points) /
+            sum((x-x_mean)**2 for x, _ in points))
+
+
+def get_series_key(parameters):
+    """
+    Returns key of a scaling series (all parameters except the number of cubes).
+
+    :param parameters: A dictionary (see cubemeshtest_freecadscript.write_results_file).
+
+    :return: A string.
+    """
+    return 'mesh size {}, point search {}'.format(parameters['cube mesh size'], parameters['point search'])
+
+
+def get_record_key(parameters):
+    """
+    Returns key of a benchmark case.
+
+    :param parameters: A dictionary (see cubemeshtest_freecadscript.write_results_file).
+
+    :return: A string.
+    """
+    return 'n {}, {}'.format(parameters['number of cubes'], get_series_key(parameters))
+
+
+def compute_scaling_exponents(records):
+    """
+    Computes scaling exponents for each stage of each series.
+
+    :param records: A list containing results of run_case.
+
+    :return: A dictionary {series key: {stage name: exponent}}.
+    """
+    series = collections.OrderedDict()
+    for record in records:
+        series_records = series.setdefault(get_series_key(record['parameters']), [])
+        series_records.append(record)
+    exponents = collections.OrderedDict()
+    for series_key, series_records in series.items():
+        exponents[series_key] = collections.OrderedDict()
+        for stage in series_records[0]['stages']:
+            numbers = [record['parameters']['number of cubes'] for record in series_records if stage in record['stages']]
+            times = [record['stages'][stage] for record in series_records if stage in record['stages']]
+            exponents[series_key][stage] = fit_scaling_exponent(numbers, times)
+    return exponents
+
+
+def compare_with_baseline(results, baseline, tolerance, min_difference, exponent_tolerance):
+    """
+    Compares stage execution times and scaling exponents with baseline.
+
+    :param results: A dictionary {'records': list, 'scaling exponents': dict}.
+    :param baseline: A dictionary (same format as results).
+    :param tolerance: A float (relative increase of time).
+    :param min_difference: A float (seconds).
+    :param exponent_tolerance: A float.
+
+    :return: A list containing regression messages.
+    """
+    regressions = []
+    baseline_records = dict((get_record_key(record['parameters']), record) for record in baseline['records'])
+    for record in results['records']:
+        key = get_record_key(record['parameters'])
+        if key not in baseline_records:
+            continue
+        for stage, seconds in record['stages'].items():
+            baseline_seconds = baseline_records[key]['stages'].get(stage)
+            if baseline_seconds is None:
+                continue
+            if seconds > (1.+tolerance)*baseline_seconds and seconds-baseline_seconds > min_difference:
+                regressions.append('{}, {}: {:.1f} s (baseline {:.1f} s)'.format(key, stage, seconds, baseline_seconds))
+    for series_key, exponents in results['scaling exponents'].items():
+        baseline_exponents = baseline['scaling exponents'].get(series_key, {})
+        for stage, exponent in exponents.items():
+            baseline_exponent = baseline_exponents.get(stage)
+            if exponent is None or baseline_exponent is None:
+                continue
+            if exponent > baseline_exponent + exponent_tolerance:
+                regressions.append('{}, {}: scaling exponent {:.2f} (baseline {:.2f})'.format(series_key, stage, exponent,
+                                                                                           baseline_exponent))
+    return regressions
+
+
+def write_csv(file_name, records):
+    """
+    Writes execution times of stages to CSV file (one row per stage).
+
+    :param file_name: A string.
+    :param records: A list containing results of run_case.
+    """
+    with open(file_name, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(['number of cubes', 'cube mesh size', 'point search', 'stage', 'time (s)'])
+        for record in records:
+            parameters = record['parameters']
+            for stage, seconds in record['stages'].items():
+                writer.writerow([parameters['number of cubes'], parameters['cube mesh size'],
+                                 parameters['point search'], stage, '{:.3f}'.format(seconds)])
+
+
+def write_json(file_name, data):
+    """
+    Writes data to JSON file.
+
+    :param file_name: A string.
+    :param data: A dictionary.
+    """
+    with open(file_name, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-n', '--numbers_of_cubes', type=int, nargs='+', default=[1, 16, 64, 256, 1024])
+    parser.add_argument('-m', '--cube_mesh_sizes', type=float, nargs='+', default=[50.0])
+    parser.add_argument('-ps', '--point_search_modes', type=parse_bool, nargs='+', default=[True, False],
+                        help='true and/or false (see cubemeshtest.py)')
+    parser.add_argument('-fb', '--find_boundaries', action='store_true')
+    parser.add_argument('-fs', '--find_solids', action='store_true')
+    parser.add_argument('-ca', '--create_air', action='store_true', help='Is air created around cubes')
+    parser.add_argument('-am', '--air_mesh_size', type=float, help='If not given cube_mesh_size is used')
+    parser.add_argument('-s', '--spheres', action='store_true', help='Use spheres instead of cubes')
+    parser.add_argument('-r', '--repeats', type=int, default=1, help='Number of runs per case (minimum time is used)')
+    parser.add_argument('-o', '--output_directory', type=str,
+                        default=os.path.join(cubemeshtest.directory, 'benchmark_results'))
+    parser.add_argument('-b', '--baseline', type=str, help=b_help)
+    parser.add_argument('-sb', '--save_baseline', type=str, help=sb_help)
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25, help=t_help)
+    parser.add_argument('-md', '--min_difference', type=float, default=1.0, help=md_help)
+    parser.add_argument('-et', '--exponent_tolerance', type=float, default=0.1, help=et_help)
+    parser.add_argument('-fe', '--freecad-executable', type=str, default="FreeCAD", help='give the path to FreeCAD executable')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.output_directory):
+        os.makedirs(args.output_directory)
+    records = []
+    for cube_mesh_size, point_search, number_of_cubes in itertools.product(args.cube_mesh_sizes,
+                                                                            args.point_search_modes,
+                                                                            sorted(args.numbers_of_cubes)):
+        parameters = {'number_of_cubes': number_of_cubes, 'cube_mesh_size': cube_mesh_size,
+                      'find_boundaries': args.find_boundaries, 'find_solids': args.find_solids,
+                      'create_air': args.create_air, 'air_mesh_size': args.air_mesh_size,
+                      'point_search': point_search, 'spheres': args.spheres}
+        print('Running case: {}'.format(parameters))
+        sys.stdout.flush()
+        record = run_case(parameters, args.repeats, args.freecad_executable, args.output_directory)
+        if record is None:
+            print('Case failed: {}'.format(parameters))
+            continue
+        records.append(record)
+
+    results = {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'machine': platform.node(),
+               'platform': platform.platform(), 'records': records,
+               'scaling exponents': compute_scaling_exponents(records)}
+    write_json(os.path.join(args.output_directory, 'cubemeshbenchmark.json'), results)
+    write_csv(os.path.join(args.output_directory, 'cubemeshbenchmark.csv'), records)
+    if args.save_baseline:
+        write_json(args.save_baseline, results)
+    print('\nscaling exponents (time ~ N^exponent):')
+    for series_key, exponents in results['scaling exponents'].items():
+        print(series_key)
+        for stage, exponent in exponents.items():
+            print('  {}: {}'.format(stage, 'n/a' if exponent is None else round(exponent, 2)))
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance, args.min_difference,
+                                            args.exponent_tolerance)
+        if regressions:
+            print('\nregressions compared to baseline {}:'.format(args.baseline))
+            for regression in regressions:
+                print('  ' + regression)
+            sys.exit(1)
+        print('\nno regressions compared to baseline {}'.format(args.baseline))
@@ -1,7 +1,9 @@
 doc = App.newDocument('cube geometry')
 import sys
 import os
+import json
 import time
+import collections
 import math
 import FreeCAD
 
@@ -10,8 +12,7 @@ import FreeCADBatchFEMTools
 
 
 def cut_xy_plane(part, cut_len, cut_width, cut_height):
-    doc.recompute()
-    doc.recompute()
+    FreeCADBatchFEMTools.ensure_recomputed([part])
     reduced_name = part.Name + '_xy'
     tool_box = doc.addObject("Part::Box", "CutBox" + reduced_name + '_obj')
     tool_box.Length = cut_len
@@ -59,11 +60,11 @@ def create_air_geometry(entities_list, length, width, height, shift, mesh_size):
     bounding_box_part.Height = height
     bounding_box_part.Placement = App.Placement(App.Vector(-shift, -shift, 0),
                                                 App.Rotation(App.Vector(0, 0, 1), 0))
-    doc.recompute()
+    FreeCADBatchFEMTools.recompute(doc)
 
     solid_objects = [bounding_box_part] + [solid['main object'] for solid in entities_list]
     air_part = FreeCADBatchFEMTools.create_xor_object(solid_objects, doc)
-    doc.recompute()
+    FreeCADBatchFEMTools.ensure_recomputed([air_part])
     # remove already created faces
     faces_in_symmetry_plane = FreeCADBatchFEMTools.faces_with_vertices_in_symmetry_plane(air_part.Shape.Faces,
                                                                                          plane='xy')
@@ -77,7 +78,6 @@ def create_air_geometry(entities_list, length, width, height, shift, mesh_size):
     solids = []
     FreeCADBatchFEMTools.add_entity_in_list(solids, 'air', air_part, {'mesh size': mesh_size})
     entities_dict = FreeCADBatchFEMTools.create_entities_dict('air', faces, solids, main_object=air_part)
-    doc.recompute()
 
     return entities_dict
 
@@ -106,9 +106,7 @@ def create_sphere_geometry(nof_spheres, mesh_size, diameter, distance):
             sphere.Radius = r
             sphere.Placement = App.Placement(App.Vector(r + i*(diameter+distance), r + j*(diameter+distance), r-shift),
                                              App.Rotation(App.Vector(0, 0, 1), 0))
-            doc.recompute()
             sphere = cut_xy_plane(sphere, bbox_len, bbox_len, diameter)
-            doc.recompute()
             # create entities dict
             face_picks = [('alpha1', 0), ('beta0', 1)]
             faces = FreeCADBatchFEMTools.pick_faces_from_geometry(sphere, face_picks)
@@ -116,7 +114,6 @@ def create_sphere_geometry(nof_spheres, mesh_size, diameter, distance):
             FreeCADBatchFEMTools.add_entity_in_list(solids, sphere_name, sphere, {'mesh size': mesh_size})
             entities_dict = FreeCADBatchFEMTools.create_entities_dict(sphere_name, faces, solids, sphere)
             sphere_entities_dict_list.append(entities_dict)
-            doc.recompute()
             counter += 1
             if counter == nof_spheres:
                 return sphere_entities_dict_list
@@ -146,7 +143,6 @@ def create_cube_geometry(nof_cubes, mesh_size, length, width, height, cube_dista
             cube.Height = height
             cube.Placement = App.Placement(App.Vector(i * (length+cube_distance), j * (width+cube_distance), 0),
                                            App.Rotation(App.Vector(0, 0, 1), 0))
-            doc.recompute()
             # create entities dict
             face_picks = [('alpha0', 5), ('alpha1', 0), ('beta0', 4), ('beta1', 2), ('gamma0', 3), ('gamma1', 1)]
             faces = FreeCADBatchFEMTools.pick_faces_from_geometry(cube, face_picks)
@@ -154,7 +150,6 @@ def create_cube_geometry(nof_cubes, mesh_size, length, width, height, cube_dista
             FreeCADBatchFEMTools.add_entity_in_list(solids, cube_name, cube, {'mesh size': mesh_size})
             entities_dict = FreeCADBatchFEMTools.create_entities_dict(cube_name, faces, solids, cube)
             cube_entities_dict_list.append(entities_dict)
-            doc.recompute()
             counter += 1
             if counter == nof_cubes:
                 return cube_entities_dict_list
@@ -182,29 +177,32 @@ def create_geometry(nof_cubes, mesh_size, find_boundaries_from_entities_dict, fi
     return_time_list = []
     cube_edge_length, cube_distance = 200, 20
     mesh_size_max = max(mesh_size, mesh_size_air)
-    if use_spheres:
-        print_line('Creating sphere geometry...', total_start_time)
-        entities_list.extend(create_sphere_geometry(nof_cubes, mesh_size, cube_edge_length, cube_distance))
-    else:
-        print_line('Creating cube geometry...', total_start_time)
-        entities_list.extend(create_cube_geometry(nof_cubes, mesh_size, cube_edge_length, cube_edge_length,
-                                                  cube_edge_length, cube_distance))
-    if add_air:
-        n = int(math.ceil(math.sqrt(nof_cubes)))
-        air_edge_length = n*(cube_edge_length+cube_distance) + cube_distance
-        air_height = cube_edge_length+2*cube_distance
-        print_line("Creating air geometry...", total_start_time)
-        entities_list.append(create_air_geometry(entities_list, air_edge_length, air_edge_length, air_height,
-                                                 cube_distance, mesh_size_air))
-    entities_list.reverse()  # give air first to get mesh sizes correctly
-    print_line("Merging entities dictionaries...", total_start_time)
-    entities_dict = FreeCADBatchFEMTools.merge_entities_dicts(entities_list, 'All', default_mesh_size=mesh_size_max,
-                                                              add_prefixes={'solids': False, 'faces': True})
-    print_line("Getting solids from entities dictionaries...", total_start_time)
-    solid_objects = FreeCADBatchFEMTools.get_solids_from_entities_dict(entities_dict)
-    print_line("Creating mesh object and compound filter...", total_start_time)
-    mesh_object, compound_filter = FreeCADBatchFEMTools.create_mesh_object_and_compound_filter(solid_objects,
-                                                                                               mesh_size_max, doc)
+    # recompute is deferred until shapes are needed
+    with FreeCADBatchFEMTools.deferred_recompute(doc):
+        if use_spheres:
+            print_line('Creating sphere geometry...', total_start_time)
+            entities_list.extend(create_sphere_geometry(nof_cubes, mesh_size, cube_edge_length, cube_distance))
+        else:
+            print_line('Creating cube geometry...', total_start_time)
+            entities_list.extend(create_cube_geometry(nof_cubes, mesh_size, cube_edge_length, cube_edge_length,
+                                                      cube_edge_length, cube_distance))
+        if add_air:
+            n = int(math.ceil(math.sqrt(nof_cubes)))
+            air_edge_length = n*(cube_edge_length+cube_distance) + cube_distance
+            air_height = cube_edge_length+2*cube_distance
+            print_line("Creating air geometry...", total_start_time)
+            entities_list.append(create_air_geometry(entities_list, air_edge_length, air_edge_length, air_height,
+                                                     cube_distance, mesh_size_air))
+        entities_list.reverse()  # give air first to get mesh sizes correctly
+        print_line("Merging entities dictionaries...", total_start_time)
+        entities_dict = FreeCADBatchFEMTools.merge_entities_dicts(entities_list, 'All', default_mesh_size=mesh_size_max,
+                                                                  add_prefixes={'solids': False, 'faces': True})
+        print_line("Getting solids from entities dictionaries...", total_start_time)
+        solid_objects = FreeCADBatchFEMTools.get_solids_from_entities_dict(entities_dict)
+        print_line("Creating mesh object and compound filter...", total_start_time)
+        mesh_object, compound_filter = FreeCADBatchFEMTools.create_mesh_object_and_compound_filter(solid_objects,
+                                                                                                   mesh_size_max, doc)
+    return_time_list.append(('-Create geometry:', time.time() - total_start_time))
     if find_boundaries_from_entities_dict.lower() == 'true':
         print_line("Finding boundaries...", total_start_time)
         start_time = time.time()
@@ -236,12 +234,27 @@ def create_geometry(nof_cubes, mesh_size, find_boundaries_from_entities_dict, fi
     print_line("Geometry done", total_start_time)
     return return_time_list + [('-Total time:', time.time() - total_start_time)]
 
+def write_results_file(file_name, parameters, elapsed_times):
+    """
+    Writes parameters and execution times of the stages to JSON file.
+
+    :param file_name: A string.
+    :param parameters: A dictionary.
+    :param elapsed_times: A list containing tuples (name, execution time).
+    """
+    stages = collections.OrderedDict()
+    for time_tuple in elapsed_times:
+        stages[time_tuple[0].strip('-:').lower()] = time_tuple[1]
+    with open(file_name, 'w') as f:
+        json.dump({'parameters': parameters, 'stages': stages, 'freecad version': FreeCAD.Version()[:3]}, f,
+                  indent=2)
+
 
 script_directory = os.path.dirname(__file__)
 
 with open(os.path.join(script_directory, 'cubemeshtestparameters.txt')) as f:
     [number_of_cubes, cube_mesh_size, find_boundaries, find_solids, create_air, air_mesh_size,
-     find_with_points, create_spheres, append_file] = f.read().split()
+     find_with_points, create_spheres, append_file, write_results] = f.read().split()
 
 create_air = create_air.lower() == 'true'
 find_with_points = find_with_points.lower() == 'true'
@@ -268,11 +281,21 @@ else:
     for time_tuple in elapsed_times:
         print(time_tuple[0], round(time_tuple[1], 1))
     sys.stdout.flush()
+    if write_results.lower() == 'true':
+        write_results_file(os.path.join(script_directory, 'cubemeshtestresults.json'),
+                           {'number of cubes': int(number_of_cubes), 'cube mesh size': float(cube_mesh_size),
+                            'find boundaries': find_boundaries.lower() == 'true',
+                            'find solids': find_solids.lower() == 'true', 'create air': create_air,
+                            'air mesh size': float(air_mesh_size), 'point search': find_with_points,
+                            'spheres': create_spheres},
+                           elapsed_times)
     if append_file.lower() == 'true':
         with open(os.path.join(script_directory, 'cubemeshtestexecutiontimes.txt'), 'a') as f:
             f.write(info_line + '\n')
             for time_tuple in elapsed_times:
                 f.write('{} {}\n'.format(time_tuple[0], round(time_tuple[1], 1)))
             f.write('\n')
+if FreeCADBatchFEMTools.tracing.is_tracing_enabled():
+  FreeCADBatchFEMTools.tracing.write_trace()  # exit() of FreeCAD may skip atexit handlers
 if not FreeCAD.GuiUp:
   exit()
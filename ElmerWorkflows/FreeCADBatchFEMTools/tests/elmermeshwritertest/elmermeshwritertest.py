@@ -0,0 +1,26 @@
+import argparse
+import os
+import subprocess
+import sys
+
+description = 'Runs script elmermeshwritertest_freecadscript.py with FreeCAD. The script meshes two cubes with'
+description += ' a shared face and writes the Elmer mesh with ElmerGrid (8 2 -autoclean -names) and with'
+description += ' elmermeshwriter.py and compares the files. Requires gmsh Python module and ElmerGrid.'
+
+parser = argparse.ArgumentParser(description=description)
+parser.add_argument('-fe', '--freecad-executable', type=str, default="FreeCAD", help='give the path to FreeCAD executable')
+
+args = parser.parse_args()
+
+directory = os.path.dirname(os.path.realpath(__file__))
+freecadscript_name = os.path.join(directory, 'elmermeshwritertest_freecadscript.py')
+if not os.path.isfile(freecadscript_name):
+    print("elmermeshwritertest_freecadscript.py does not exist, check that you are in correct directory")
+else:
+    try:
+        p = subprocess.Popen([args.freecad_executable, '-c', freecadscript_name])
+        p.communicate()
+    except Exception:
+        print("Running FreeCAD failed!!! Try to give the correct FreeCAD executable as an argument (--freecad-executable, -fe)")
+        sys.exit(1)
+    sys.exit(p.returncode)
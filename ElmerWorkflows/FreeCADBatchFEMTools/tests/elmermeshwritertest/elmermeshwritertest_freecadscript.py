@@ -0,0 +1,162 @@
+doc = App.newDocument('elmer mesh writer test geometry')
+import sys
+import os
+import importlib.util
+import FreeCAD
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import FreeCADBatchFEMTools
+import meshcache
+
+mesh_files = ['mesh.header', 'mesh.names', 'mesh.nodes', 'mesh.elements', 'mesh.boundary']
+
+
+def create_cube_geometry(nof_cubes, mesh_size, edge_length):
+    """
+    Create cubes in a row. Neighbouring cubes share a face.
+
+    :param nof_cubes: Number of cubes.
+    :param mesh_size: Mesh size of cubes.
+    :param edge_length: Edge length of cubes.
+
+    :return: A list containing entities dictionaries.
+    """
+    cube_entities_dict_list = []
+    for i in range(nof_cubes):
+        cube_name = 'cube{:04d}'.format(i + 1)
+        cube = doc.addObject('Part::Box', cube_name + '_obj')
+        cube.Length = edge_length
+        cube.Width = edge_length
+        cube.Height = edge_length
+        cube.Placement = App.Placement(App.Vector(i * edge_length, 0, 0), App.Rotation(App.Vector(0, 0, 1), 0))
+        # create entities dict
+        face_picks = [('alpha0', 5), ('alpha1', 0), ('beta0', 4), ('beta1', 2), ('gamma0', 3), ('gamma1', 1)]
+        faces = FreeCADBatchFEMTools.pick_faces_from_geometry(cube, face_picks)
+        solids = []
+        FreeCADBatchFEMTools.add_entity_in_list(solids, cube_name, cube, {'mesh size': mesh_size})
+        cube_entities_dict_list.append(FreeCADBatchFEMTools.create_entities_dict(cube_name, faces, solids, cube))
+    return cube_entities_dict_list
+
+def create_mesh_object(mesh_size):
+    """
+    Creates geometry, bodies and boundaries of two cubes.
+
+    :param mesh_size: Mesh size of cubes.
+
+    :return: FreeCAD mesh object.
+    """
+    entities_list = create_cube_geometry(2, mesh_size, 200)
+    entities_dict = FreeCADBatchFEMTools.merge_entities_dicts(entities_list, 'All', default_mesh_size=mesh_size,
+                                                              add_prefixes={'solids': False, 'faces': True})
+    solid_objects = FreeCADBatchFEMTools.get_solids_from_entities_dict(entities_dict)
+    mesh_object, compound_filter = FreeCADBatchFEMTools.create_mesh_object_and_compound_filter(solid_objects,
+                                                                                               mesh_size, doc)
+    FreeCADBatchFEMTools.find_boundaries_with_entities_dict(mesh_object, compound_filter, entities_dict, doc)
+    body_mesh_groups = FreeCADBatchFEMTools.find_bodies_with_entities_dict(mesh_object, compound_filter,
+                                                                           entities_dict, doc)
+    FreeCADBatchFEMTools.define_mesh_sizes_with_mesh_groups(mesh_object, body_mesh_groups, doc)
+    return mesh_object
+
+def read_rows(file_name):
+    """
+    Reads non-empty lines of mesh file split to columns.
+
+    :param file_name: A string.
+
+    :return: A list containing lists of strings.
+    """
+    with open(file_name) as f:
+        return [line.split() for line in f if line.strip()]
+
+def rows_are_same(mesh_file, row1, row2, tolerance):
+    """
+    Compares rows of mesh files. Coordinates of mesh.nodes are compared with tolerance, other
+    columns (numbers, body and boundary indices, element types, parents and nodes) must be equal.
+
+    :param mesh_file: A string (file name without directory).
+    :param row1: A list containing strings.
+    :param row2: A list containing strings.
+    :param tolerance: A float.
+
+    :return: A boolean.
+    """
+    if len(row1) != len(row2):
+        return False
+    if mesh_file != 'mesh.nodes':
+        return row1 == row2
+    if row1[:2] != row2[:2]:
+        return False
+    return all(abs(float(c1)-float(c2)) <= tolerance for c1, c2 in zip(row1[2:], row2[2:]))
+
+def compare_mesh_directories(elmergrid_dir, writer_dir, tolerance, max_differences=10):
+    """
+    Compares Elmer mesh files written by ElmerGrid and elmermeshwriter.py row by row.
+
+    :param elmergrid_dir: A string.
+    :param writer_dir: A string.
+    :param tolerance: A float (absolute tolerance of node coordinates).
+    :param max_differences: An integer (number of differing rows printed per file).
+
+    :return: A list containing strings (differences).
+    """
+    differences = []
+    for mesh_file in mesh_files:
+        rows1 = read_rows(os.path.join(elmergrid_dir, mesh_file))
+        rows2 = read_rows(os.path.join(writer_dir, mesh_file))
+        if len(rows1) != len(rows2):
+            differences.append('{}: {} rows (ElmerGrid), {} rows (elmermeshwriter)'.format(mesh_file, len(rows1),
+                                                                                        len(rows2)))
+        file_differences = [num for num, (row1, row2) in enumerate(zip(rows1, rows2))
+                            if not rows_are_same(mesh_file, row1, row2, tolerance)]
+        for num in file_differences[:max_differences]:
+            differences.append('{} row {}:\n  ElmerGrid:       {}\n  elmermeshwriter: {}'.format(
+                mesh_file, num+1, ' '.join(rows1[num]), ' '.join(rows2[num])))
+        if len(file_differences) > max_differences:
+            differences.append('{}: {} differing rows'.format(mesh_file, len(file_differences)))
+    return differences
+
+def run_test(directory, mesh_size=100.):
+    """
+    Meshes geometry once with gmsh Python API. Elmer mesh is written with elmermeshwriter.py
+    from the gmsh mesh and with ElmerGrid from UNV export of the same mesh.
+
+    :param directory: Path to directory of this script.
+    :param mesh_size: Mesh size of cubes.
+
+    :return: A list containing strings (differences).
+    """
+    writer_dir = os.path.join(directory, 'elmermeshwriter')
+    elmergrid_dir = os.path.join(directory, 'elmergrid')
+    meshcache.set_mesh_cache_directory(None)  # ElmerGrid must be run
+    mesh_object = create_mesh_object(mesh_size)
+    error = FreeCADBatchFEMTools.create_mesh(mesh_object, engine='api', elmer_dir=writer_dir, set_fem_mesh=True)
+    if error:
+        return ['Creating mesh failed: {}'.format(error)]
+    FreeCADBatchFEMTools.run_elmergrid(elmergrid_dir + '.unv', mesh_object, elmergrid_dir,
+                                       elmergrid_dir + '_elmergrid.log')
+    return compare_mesh_directories(elmergrid_dir, writer_dir, 1e-9*200)
+
+
+script_directory = os.path.dirname(__file__)
+
+exit_code = 1
+if importlib.util.find_spec('gmsh') is None:
+    print('gmsh Python module is not available')
+else:
+    try:
+        mesh_differences = run_test(script_directory)
+    except Exception:
+        import traceback
+        print(str(traceback.format_exc()))
+    else:
+        for difference in mesh_differences:
+            print(difference)
+        if mesh_differences:
+            print('\nElmer meshes written by ElmerGrid and elmermeshwriter differ')
+        else:
+            print('\nElmer meshes written by ElmerGrid and elmermeshwriter are the same')
+            exit_code = 0
+    sys.stdout.flush()
+
+if not FreeCAD.GuiUp:
+    exit(exit_code)
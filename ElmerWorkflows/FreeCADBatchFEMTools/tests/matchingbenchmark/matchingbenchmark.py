@@ -0,0 +1,98 @@
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..'))
+import numpygeometry
+import shapematching
+
+description = 'Benchmarks matching and indexing functions of shapematching without FreeCAD. Geometry is a grid of'
+description += ' boxes (numpygeometry). Searches are done for a sample of faces, edges and solids.'
+
+
+def run_stage(stages, name, function, *args, **kwargs):
+    """
+    Runs function and stores its execution time.
+
+    :param stages: An ordered dictionary {stage name: execution time}.
+    :param name: A string.
+    :param function: A function.
+
+    :return: Return value of the function.
+    """
+    start_time = time.time()
+    result = function(*args, **kwargs)
+    stages[name] = time.time() - start_time
+    print('{:<45} {:10.4f} s'.format(name, stages[name]))
+    sys.stdout.flush()
+    return result
+
+
+def run_benchmark(nof_faces, nof_searches, gap):
+    """
+    Creates box grid with at least nof_faces faces and runs the matching functions.
+
+    :param nof_faces: An integer.
+    :param nof_searches: An integer (number of searched faces, edges and solids).
+    :param gap: A float (distance between boxes).
+
+    :return: An ordered dictionary {stage name: execution time}.
+    """
+    n = int(math.ceil((nof_faces/6.)**(1./3.)))
+    stages = collections.OrderedDict()
+    boxes = run_stage(stages, 'create geometry ({} boxes)'.format(n**3), numpygeometry.make_box_grid, n, n, n,
+                      1.0, gap)
+    compound_filter = numpygeometry.make_compound_filter(boxes)
+    faces = compound_filter.Shape.Faces
+    step = max(1, len(boxes) // nof_searches)
+    search_boxes = boxes[::step][:nof_searches]
+    search_faces = [box.Faces[num % 6] for num, box in enumerate(search_boxes)]
+    search_edges = [box.Edges[num % 12] for num, box in enumerate(search_boxes)]
+
+    face_index = run_stage(stages, 'create_face_index', shapematching.create_face_index, faces)
+    run_stage(stages, 'find_faces_in_face_index', lambda: [shapematching.find_faces_in_face_index(face_index, face)
+                                                           for face in search_faces])
+    run_stage(stages, 'remove_compare_faces_from_list', shapematching.remove_compare_faces_from_list, search_faces,
+              list(faces))
+    run_stage(stages, 'faces_with_vertices_in_symmetry_plane', shapematching.faces_with_vertices_in_symmetry_plane,
+              faces, 'xy')
+    cface_index = run_stage(stages, 'create_compound_filter_face_index',
+                            shapematching.create_compound_filter_face_index, compound_filter)
+    run_stage(stages, 'find_compound_filter_boundaries',
+              lambda: [shapematching.find_compound_filter_boundaries(compound_filter, face, face_index=cface_index)
+                       for face in search_faces])
+    solid_index = run_stage(stages, 'create_compound_filter_solid_index',
+                            shapematching.create_compound_filter_solid_index, compound_filter)
+    run_stage(stages, 'find_compound_filter_solid',
+              lambda: [shapematching.find_compound_filter_solid(compound_filter, box, solid_index)
+                       for box in search_boxes])
+    edge_index = run_stage(stages, 'create_compound_filter_edge_index',
+                           shapematching.create_compound_filter_edge_index, compound_filter)
+    run_stage(stages, 'find_compound_filter_edge',
+              lambda: [shapematching.find_compound_filter_edge(compound_filter, edge, edge_index)
+                       for edge in search_edges])
+    return stages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-n', '--nof_faces', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('-ns', '--nof_searches', type=int, default=1000)
+    parser.add_argument('-g', '--gap', type=float, default=0.5, help='Distance between boxes (edge length is 1)')
+    parser.add_argument('-o', '--output_file', type=str, help='Writes execution times to JSON file')
+
+    args = parser.parse_args()
+
+    numpygeometry.set_as_geometry_backend()
+    results = []
+    for nof_faces in args.nof_faces:
+        print('\nnumber of faces: {}'.format(nof_faces))
+        results.append({'number of faces': nof_faces, 'number of searches': args.nof_searches,
+                        'stages': run_benchmark(nof_faces, args.nof_searches, args.gap)})
+    if args.output_file:
+        with open(args.output_file, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -373,11 +373,13 @@ def test_all():
     fit_view()
 
     mesh_object, compound_filter = create_mesh_object_and_compound_filter(solid_objects, default_mesh_size, doc)
+    # boundary and body names are reused from the cache when the geometry is unchanged
+    cache_file = os.path.join(PWD, 'references_cache.sqlite')
 
-    find_boundaries_with_entities_dict(mesh_object, compound_filter, entities_dict, doc)
-    find_bodies_with_entities_dict(mesh_object, compound_filter, entities_dict, doc)
+    find_boundaries_with_entities_dict(mesh_object, compound_filter, entities_dict, doc, cache_file=cache_file)
+    find_bodies_with_entities_dict(mesh_object, compound_filter, entities_dict, doc, cache_file=cache_file)
 
-    define_mesh_sizes(mesh_object, compound_filter, entities_dict, doc)
+    define_mesh_sizes(mesh_object, compound_filter, entities_dict, doc, cache_file=cache_file)
     create_mesh(mesh_object)
     export_path=PWD+u"/variable_topology.unv"
     run_elmergrid(export_path, mesh_object)
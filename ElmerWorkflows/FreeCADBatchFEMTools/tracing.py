@@ -0,0 +1,207 @@
+"""
+  FreeCADBatchFEMTools - A library for using FreeCAD for FEM preprocessing in batch mode
+
+  Copyright 1st May 2018 - , Trafotek Oy, Finland
+
+  This library is free software; you can redistribute it and/or
+  modify it under the terms of the GNU Lesser General Public
+  License as published by the Free Software Foundation; either
+  version 2.1 of the License, or (at your option) any later version.
+
+  This library is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+  Lesser General Public License for more details.
+
+  You should have received a copy of the GNU Lesser General Public
+  License along with this library (in file ../LGPL-2.1); if not, write
+  to the Free Software Foundation, Inc., 51 Franklin Street,
+  Fifth Floor, Boston, MA  02110-1301  USA
+
+  Authors: Eelis Takala, Sami Rannikko
+  Emails:  eelis.takala@gmail.com
+  Address: Trafotek Oy
+           Kaarinantie 700
+           20540 Turku
+           Finland
+
+  Original Date: October 2026
+"""
+import atexit
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+TRACE_ENVIRONMENT_VARIABLE = 'FREECADBATCHFEMTOOLS_TRACE'
+
+# Trace events and OCC predicate counters (see trace_stage and count)
+_trace_state = {'enabled': None, 'trace_file': None, 'start_time': None, 'events': [],
+                'counters': collections.Counter(), 'exit_handler': False}
+_trace_lock = threading.Lock()
+
+
+def enable_tracing(trace_file):
+    """
+    Enables tracing and sets the trace file. Tracing is also enabled if environment variable
+    FREECADBATCHFEMTOOLS_TRACE contains path to the trace file. The trace file is written
+    once at exit (or when :meth:`write_trace` is called).
+
+    :param trace_file: Path to Chrome trace file (JSON, open with chrome://tracing or Perfetto).
+    """
+    _trace_state['enabled'] = True
+    _trace_state['trace_file'] = trace_file
+    _trace_state['start_time'] = time.time()
+    del _trace_state['events'][:]
+    _trace_state['counters'].clear()
+    if not _trace_state['exit_handler']:
+        atexit.register(_write_trace_at_exit)
+        _trace_state['exit_handler'] = True
+
+
+def disable_tracing():
+    """
+    Disables tracing. Already written trace file is not removed.
+    """
+    _trace_state['enabled'] = False
+
+
+def is_tracing_enabled():
+    """
+    Returns True if tracing is enabled. Environment variable FREECADBATCHFEMTOOLS_TRACE is
+    checked at the first call.
+
+    :return: A boolean.
+    """
+    if _trace_state['enabled'] is None:
+        trace_file = os.environ.get(TRACE_ENVIRONMENT_VARIABLE)
+        if trace_file:
+            enable_tracing(trace_file)
+        else:
+            _trace_state['enabled'] = False
+    return _trace_state['enabled']
+
+
+def count(name, increment=1):
+    """
+    Increments counter of OCC predicate calls (e.g. 'isInside', 'distToShape', 'common').
+    Calls made in worker processes are not counted.
+
+    :param name: A string.
+    :param increment: An integer.
+    """
+    if _trace_state['enabled']:
+        _trace_state['counters'][name] += increment
+
+
+def get_current_rss():
+    """
+    Returns current resident set size of this process in kilobytes (read from /proc/self/statm).
+
+    :return: An integer or None if /proc is not available (e.g. Windows and macOS).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, IOError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def get_peak_rss():
+    """
+    Returns peak resident set sizes of this process and of the largest waited child process
+    (e.g. gmsh and ElmerGrid) in kilobytes. Values are high-water marks of the whole process
+    lifetime, they never decrease.
+
+    :return: A tuple (self_kb, children_kb). Values are None if resource module is not available.
+    """
+    if resource is None:
+        return None, None
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == 'darwin':  # bytes on macOS
+        return self_rss // 1024, children_rss // 1024
+    return self_rss, children_rss
+
+
+def write_trace(trace_file=None):
+    """
+    Writes trace events to Chrome trace file. The file is replaced atomically.
+
+    :param trace_file: None or path to trace file. If None, the enabled trace file is used.
+    """
+    if trace_file is None:
+        trace_file = _trace_state['trace_file']
+    with _trace_lock:
+        trace = {'traceEvents': list(_trace_state['events']),
+                 'displayTimeUnit': 'ms',
+                 'otherData': {'counters': dict(_trace_state['counters'])}}
+    temp_file = '{}.{}.tmp'.format(trace_file, os.getpid())
+    with open(temp_file, 'w') as f:
+        json.dump(trace, f, indent=1)
+    os.rename(temp_file, trace_file)
+
+
+def _write_trace_at_exit():
+    """
+    Writes trace file at exit if tracing is enabled and stages were recorded.
+    """
+    if _trace_state['enabled'] and _trace_state['events']:
+        write_trace()
+
+
+def trace_stage(name):
+    """
+    Decorator that records wall time, OCC predicate call counts and memory use of a pipeline stage
+    when tracing is enabled (see :meth:`is_tracing_enabled`). Each stage is recorded as a complete
+    event ('ph': 'X'), nested stages are shown nested. Memory values of a stage::
+
+        - 'rss start (kB)', 'rss end (kB)': current RSS of this process at stage entry and exit
+        - 'process peak rss (kB)': peak RSS of this process so far (not only of this stage)
+        - 'children peak rss (kB)': peak RSS of child processes waited during the stage,
+          None if no child waited during the stage used more memory than earlier children
+
+    :param name: A string.
+
+    :return: A decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not is_tracing_enabled():
+                return function(*args, **kwargs)
+            counters_before = collections.Counter(_trace_state['counters'])
+            rss_start = get_current_rss()
+            children_peak_rss_before = get_peak_rss()[1]
+            start_time = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end_time = time.time()
+                counters = _trace_state['counters'] - counters_before
+                peak_rss, children_peak_rss = get_peak_rss()
+                if children_peak_rss is not None and children_peak_rss <= children_peak_rss_before:
+                    children_peak_rss = None
+                event = {'name': name, 'cat': 'stage', 'ph': 'X', 'pid': os.getpid(),
+                         'tid': threading.current_thread().ident,
+                         'ts': int(1e6 * (start_time - _trace_state['start_time'])),
+                         'dur': int(1e6 * (end_time - start_time)),
+                         'args': {'wall time (s)': round(end_time - start_time, 6),
+                                  'counters': dict(counters),
+                                  'rss start (kB)': rss_start,
+                                  'rss end (kB)': get_current_rss(),
+                                  'process peak rss (kB)': peak_rss,
+                                  'children peak rss (kB)': children_peak_rss}}
+                with _trace_lock:
+                    _trace_state['events'].append(event)
+        return wrapper
+    return decorator
@@ -2,10 +2,12 @@
 #==========================================
 #
 # FILE: MeshToShp.py 
-# USAGE : python MeshToShp.py  [-h] -d <inputdir>
+# USAGE : python MeshToShp.py  [-h] [-c] -d <inputdir>
 # DESCRIPTION:  Create shapefiles from elmer mesh
 #
 # BUGS: ---
+#       16/10/2026: Read the mesh files with ../elmermesh.py
+#                   Keep the parsed mesh as .npy files in <inputdir>_npy (-c)
 #
 # AUTHOR:   F. Gillet-Chaulet
 # ORGANIZATION: IGE(CNRS-France)
@@ -19,10 +21,13 @@ import sys, getopt,os
 
 def main(argv):
    import shapefile
+   sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+   import elmermesh
    
    found_d=False
+   cache=False
    try:
-      opts, args = getopt.getopt(argv,"hd:")
+      opts, args = getopt.getopt(argv,"hcd:")
    except getopt.GetoptError:
       usage()
       sys.exit(2)
@@ -30,6 +35,8 @@ def main(argv):
       if opt == '-h':
          usage()
          sys.exit()
+      elif opt in ("-c"):
+         cache=True
       elif opt in ("-d"):
          dir_name= arg
          found_d=True
@@ -39,12 +46,9 @@ def main(argv):
       usage()
       sys.exit()
 
-   nodefile=os.path.join(dir_name, 'mesh.nodes') 
-   vertices = {}
-   with open(nodefile) as fin:
-     for  line in fin:
-         (j,k,x,y,z) = line.split()
-         vertices[int(j)] = [float(x), float(y)]
+   files = elmermesh.mesh_files(dir_name)
+   nodes = elmermesh.read_nodes(files['nodes'], cache=cache)
+   vertices = nodes['coordinates'][:,0:2]
  
    outputdir="{}_shp".format(dir_name)
    try: 
@@ -61,15 +65,13 @@ def main(argv):
    shp.field('etype', 'N')
    shp.field('BCId', 'N')
 
-   boundaryfile = os.path.join(dir_name, 'mesh.boundary')
-   with open(boundaryfile) as fin:
-       for line in fin:
-         l = line.split()
-         enum,bc,etype=int(l[0]),int(l[1]),int(l[4])
-         nv=etype%100
-         evertices = [vertices[int(i)] for i in l[5:5+nv]]
-         shp.line([evertices])
-         shp.record(enum,etype,bc)
+   boundary = elmermesh.read_boundary(files['boundary'], cache=cache)
+   rows = elmermesh.get_node_rows(nodes, boundary['connectivity'])
+   for enum,bc,etype,start in zip(boundary['ids'].tolist(),boundary['tags'].tolist(),boundary['types'].tolist(),boundary['offsets'].tolist()):
+      nv=etype%100
+      evertices = vertices[rows[start:start+nv]].tolist()
+      shp.line([evertices])
+      shp.record(enum,etype,bc)
 
    shp.close()
 
@@ -80,26 +82,24 @@ def main(argv):
    shp.field('etype', 'N')
    shp.field('BodyId', 'N')
 
-   Efile = os.path.join(dir_name, 'mesh.elements')
-   with open(Efile) as fin:
-       for line in fin:
-         l = line.split()
-         enum,bd,etype=int(l[0]),int(l[1]),int(l[2])
-         nv=etype%100
-         evertices = [vertices[int(i)] for i in l[3:3+nv]]
+   elements = elmermesh.read_elements(files['elements'], cache=cache)
+   rows = elmermesh.get_node_rows(nodes, elements['connectivity'])
+   for enum,bd,etype,start in zip(elements['ids'].tolist(),elements['tags'].tolist(),elements['types'].tolist(),elements['offsets'].tolist()):
+      nv=etype%100
+      evertices = vertices[rows[start:start+nv]].tolist()
 
-         # As its elements so no hole
-         # should we check the rotation order?
-         #  seems not
-         # this would be the solution wiyh shapely
-         #polygon = shapely.geometry.Polygon(evertices)
-         #if not polygon.exterior.is_ccw:
-         #  evertices=evertices[::-1]
+      # As its elements so no hole
+      # should we check the rotation order?
+      #  seems not
+      # this would be the solution wiyh shapely
+      #polygon = shapely.geometry.Polygon(evertices)
+      #if not polygon.exterior.is_ccw:
+      #  evertices=evertices[::-1]
 
-         # spyshp autoimatically add lastpt=firstpt
-         # to close polygons
-         shp.poly([evertices])
-         shp.record(enum,etype,bd)
+      # spyshp autoimatically add lastpt=firstpt
+      # to close polygons
+      shp.poly([evertices])
+      shp.record(enum,etype,bd)
 
    shp.close()
 
@@ -109,9 +109,10 @@ def main(argv):
    print("  gdalsrsinfo  -o wkt \"EPSG:XYZW\" > {}/boundaries.prj".format(outputdir))
 
 def usage():
-   print('usage: MeshToShp.py  [-h] -d <inputfile>')
+   print('usage: MeshToShp.py  [-h] [-c] -d <inputfile>')
    print('options:')
    print('   -h [print help]')
+   print('   -c [keep the parsed mesh as .npy files in <mesh dir. name>_npy]')
    print('   -d <mesh dir. name>')
 
 
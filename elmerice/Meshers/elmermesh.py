@@ -0,0 +1,268 @@
+#!/usr/bin/python
+#==========================================
+#
+# FILE:     elmermesh.py
+# USAGE:    import elmermesh
+#           nodes = elmermesh.read_nodes('mesh_dir/mesh.nodes')
+# DESCRIPTION:  Read Elmer mesh files (mesh.header, mesh.nodes, mesh.elements,
+#               mesh.boundary and the part.k.* files of partitioned meshes)
+#               into compact NumPy arrays
+#
+#           Files are parsed in chunks of lines. Node and element numbers are
+#           stored as int32 (int64 if they do not fit), tags and element types
+#           as int32 and coordinates as float64.
+#           The element nodes are stored CSR-style: the nodes of element ii are
+#           connectivity[offsets[ii]:offsets[ii+1]] (elements in file order)
+#           and get_element_groups gives a table of nodes for each element type.
+#
+#           With cache=True the arrays of a parsed file are saved as .npy files
+#           in the directory mesh_dir_npy next to the mesh directory. They are
+#           used (memory-mapped) as long as the size and modification time of
+#           the mesh file do not change.
+#
+# BUGS: ---
+#
+# AUTHOR:   ---
+#
+# VERSION: V1
+# CREATED:  2026-10-16
+# MODIFIED:
+#
+#==========================================
+import json
+import os
+import re
+import numpy as np
+
+# Number of bytes of lines parsed at once
+CHUNK_SIZE = 2**24
+# Version of the .npy cache files
+CACHE_VERSION = 1
+
+def mesh_files(mesh_dir, partition=None):
+    # Returns the header, nodes, elements and boundary files of the mesh
+    # (of partition number partition = 1, 2, ... if given)
+    if partition is None:
+        prefix = os.path.join(mesh_dir, 'mesh')
+    else:
+        prefix = os.path.join(mesh_dir, 'part.%d'%(partition))
+    return {'header': prefix+'.header', 'nodes': prefix+'.nodes',
+            'elements': prefix+'.elements', 'boundary': prefix+'.boundary'}
+
+def _compact(values):
+    # int64 values as int32 if they fit
+    if values.size == 0 or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max):
+        return values.astype(np.int32)
+    return values
+
+def _read_chunks(filename, chunk_size):
+    # Yields the lines of the file in chunks of about chunk_size bytes (empty lines removed)
+    fid = open(filename)
+    while True:
+        lines = fid.readlines(chunk_size)
+        if not lines:
+            break
+        lines = [line for line in lines if line.strip()]
+        if lines:
+            yield lines
+    fid.close()
+
+def read_header(header_file):
+    # Returns a dictionary {'nodes': int, 'elements': int, 'boundary': int,
+    # 'types': array of rows (element type, count), 'extra': list of the remaining rows}.
+    # The remaining rows (e.g. the shared nodes of a partition) are kept as lists of integers
+    fid = open(header_file)
+    rows = [[int(v) for v in line.split()] for line in fid if line.strip()]
+    fid.close()
+    ntypes = rows[1][0]
+    header = {'nodes': rows[0][0], 'elements': rows[0][1], 'boundary': rows[0][2],
+              'types': np.array(rows[2:2+ntypes], dtype=np.int64).reshape(ntypes, 2),
+              'extra': rows[2+ntypes:]}
+    return header
+
+def write_header(header_file, header):
+    # Writes a dictionary returned by read_header to the header file
+    fid = open(header_file, 'w')
+    fid.write('%d %d %d\n'%(header['nodes'], header['elements'], header['boundary']))
+    fid.write('%d\n'%(len(header['types'])))
+    for etype, count in header['types']:
+        fid.write('%d %d\n'%(etype, count))
+    for row in header['extra']:
+        fid.write(' '.join(['%d'%(v) for v in row])+'\n')
+    fid.close()
+
+def get_cache_directory(mesh_file):
+    # Returns the directory of the .npy cache files of a mesh file (mesh_dir_npy next to mesh_dir)
+    return os.path.dirname(os.path.abspath(mesh_file))+'_npy'
+
+def _get_file_stamp(mesh_file):
+    # Size and modification time of the mesh file used to validate the cache
+    stat = os.stat(mesh_file)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _get_cache_files(mesh_file):
+    # Returns the stamp file and the prefix of the array files of a mesh file
+    prefix = os.path.join(get_cache_directory(mesh_file), os.path.basename(mesh_file))
+    return prefix+'.json', prefix+'.'
+
+def _load_cache(mesh_file):
+    # Returns the memory-mapped arrays of a mesh file or None if the cache is missing or out of date
+    stamp_file, prefix = _get_cache_files(mesh_file)
+    try:
+        fid = open(stamp_file)
+        stamp = json.load(fid)
+        fid.close()
+        if stamp['file'] != _get_file_stamp(mesh_file):
+            return None
+        arrays = {}
+        for key in stamp['arrays']:
+            arrays[key] = np.load(prefix+key+'.npy', mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    return arrays
+
+def _save_cache(mesh_file, file_stamp, arrays):
+    # Saves the arrays of a mesh file. Files are written under temporary names and renamed,
+    # the stamp file is written last. Errors (e.g. read-only directory) are ignored
+    stamp_file, prefix = _get_cache_files(mesh_file)
+    tmp = '.%d.tmp'%(os.getpid())
+    try:
+        if not os.path.isdir(os.path.dirname(stamp_file)):
+            os.makedirs(os.path.dirname(stamp_file))
+        for key in arrays:
+            fid = open(prefix+key+tmp, 'wb')
+            np.save(fid, arrays[key])
+            fid.close()
+            os.replace(prefix+key+tmp, prefix+key+'.npy')
+        fid = open(stamp_file+tmp, 'w')
+        json.dump({'file': file_stamp, 'arrays': sorted(arrays)}, fid)
+        fid.close()
+        os.replace(stamp_file+tmp, stamp_file)
+    except OSError:
+        pass
+
+def _read(mesh_file, parse, chunk_size, cache):
+    # Parses the mesh file or, with cache, opens its valid .npy cache (parsed and saved otherwise)
+    if not cache:
+        return parse(mesh_file, chunk_size)
+    arrays = _load_cache(mesh_file)
+    if arrays is None:
+        file_stamp = _get_file_stamp(mesh_file)
+        arrays = parse(mesh_file, chunk_size)
+        _save_cache(mesh_file, file_stamp, arrays)
+    return arrays
+
+def read_nodes(nodes_file, chunk_size=CHUNK_SIZE, cache=False):
+    # Returns a dictionary {'ids': node numbers, 'partitions': partition column,
+    # 'coordinates': array of rows (x, y, z)} in file order
+    return _read(nodes_file, _parse_nodes, chunk_size, cache)
+
+def _parse_nodes(nodes_file, chunk_size):
+    blocks = []
+    for lines in _read_chunks(nodes_file, chunk_size):
+        values = np.fromstring(''.join(lines), dtype=np.float64, sep=' ')
+        if values.size != 5*len(lines):
+            raise ValueError('%s: node lines must have 5 columns'%(nodes_file))
+        blocks.append(values.reshape(len(lines), 5))
+    if blocks:
+        table = np.concatenate(blocks)
+    else:
+        table = np.zeros((0, 5))
+    nodes = {'ids': _compact(table[:,0].astype(np.int64)),
+             'partitions': table[:,1].astype(np.int32),
+             'coordinates': np.ascontiguousarray(table[:,2:5])}
+    return nodes
+
+def _read_element_rows(filename, nlead, chunk_size):
+    # Reads lines of nlead integer columns followed by the element nodes
+    # (element type is the last of the nlead columns, its number of nodes is type%100)
+    # All columns after the nlead columns are kept in connectivity
+    # Returns the leading columns, the offsets and the connectivity
+    # (element numbers written as number/partition in halo elements are read as number)
+    leads = []
+    connectivities = []
+    counts = []
+    for lines in _read_chunks(filename, chunk_size):
+        lengths = np.fromiter((len(line.split()) for line in lines), dtype=np.int64, count=len(lines))
+        text = ''.join(lines)
+        if '/' in text:
+            text = re.sub('/-?[0-9]+', '', text)
+        values = np.fromstring(text, dtype=np.int64, sep=' ')
+        if values.size != lengths.sum():
+            raise ValueError('%s: could not read integer columns'%(filename))
+        starts = np.cumsum(lengths)-lengths
+        lead = values[starts[:,None]+np.arange(nlead)]
+        nv = lengths-nlead
+        keep = np.ones(values.size, dtype=bool)
+        keep[(starts[:,None]+np.arange(nlead)).ravel()] = False
+        leads.append(lead)
+        connectivities.append(values[keep])
+        counts.append(nv)
+    if leads:
+        lead = np.concatenate(leads)
+        connectivity = np.concatenate(connectivities)
+        nv = np.concatenate(counts)
+    else:
+        lead = np.zeros((0, nlead), dtype=np.int64)
+        connectivity = np.zeros(0, dtype=np.int64)
+        nv = np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(len(nv)+1, dtype=np.int64)
+    np.cumsum(nv, out=offsets[1:])
+    return lead, offsets, _compact(connectivity)
+
+def read_elements(elements_file, chunk_size=CHUNK_SIZE, cache=False):
+    # Returns a dictionary {'ids': element numbers, 'tags': body numbers, 'types': element types,
+    # 'offsets': CSR offsets, 'connectivity': node numbers} in file order
+    return _read(elements_file, _parse_elements, chunk_size, cache)
+
+def _parse_elements(elements_file, chunk_size):
+    lead, offsets, connectivity = _read_element_rows(elements_file, 3, chunk_size)
+    elements = {'ids': _compact(lead[:,0]), 'tags': lead[:,1].astype(np.int32),
+                'types': lead[:,2].astype(np.int32), 'offsets': offsets,
+                'connectivity': connectivity}
+    return elements
+
+def read_boundary(boundary_file, chunk_size=CHUNK_SIZE, cache=False):
+    # Returns a dictionary {'ids': element numbers, 'tags': boundary numbers,
+    # 'parents': array of rows (parent1, parent2), 'types': element types,
+    # 'offsets': CSR offsets, 'connectivity': node numbers} in file order
+    return _read(boundary_file, _parse_boundary, chunk_size, cache)
+
+def _parse_boundary(boundary_file, chunk_size):
+    lead, offsets, connectivity = _read_element_rows(boundary_file, 5, chunk_size)
+    boundary = {'ids': _compact(lead[:,0]), 'tags': lead[:,1].astype(np.int32),
+                'parents': _compact(lead[:,2:4]), 'types': lead[:,4].astype(np.int32),
+                'offsets': offsets, 'connectivity': connectivity}
+    return boundary
+
+def get_element_groups(elements):
+    # Groups elements (or boundary elements) by element type
+    # Returns a dictionary {element type: (row indices, array of rows of node numbers)}
+    groups = {}
+    for etype in np.unique(elements['types']):
+        rows = np.flatnonzero(elements['types'] == etype)
+        nv = etype%100
+        columns = elements['offsets'][rows][:,None]+np.arange(nv)
+        groups[int(etype)] = (rows, elements['connectivity'][columns])
+    return groups
+
+def get_node_rows(nodes, node_ids):
+    # Returns the row indices in nodes of the given node numbers
+    ids = nodes['ids']
+    if ids.size > 0 and ids[0] == 1 and ids[-1] == ids.size and np.all(np.diff(ids) == 1):
+        rows = np.asarray(node_ids, dtype=np.int64)-1
+    else:
+        order = np.argsort(ids, kind='stable')
+        rows = order[np.minimum(np.searchsorted(ids, node_ids, sorter=order), ids.size-1)]
+    if np.any(ids[rows] != node_ids):
+        raise ValueError('node numbers not found in nodes')
+    return rows
+
+def read_mesh(mesh_dir, partition=None, chunk_size=CHUNK_SIZE, cache=False):
+    # Reads all files of the mesh (of partition number partition if given)
+    files = mesh_files(mesh_dir, partition)
+    mesh = {'header': read_header(files['header']),
+            'nodes': read_nodes(files['nodes'], chunk_size, cache),
+            'elements': read_elements(files['elements'], chunk_size, cache),
+            'boundary': read_boundary(files['boundary'], chunk_size, cache)}
+    return mesh
@@ -3,6 +3,7 @@
 #
 # FILE:     makemoulin.py
 # USAGE:    python makemoulin.py --meshdir mesh_dir --moulin moulin_file --partition number_of_partition 
+#           [--jobs number_of_processes] [--rewrite] [--cache]
 # DESCRIPTION:  Add Moulins to partition mesh  
 #
 # BUGS: ---
@@ -12,6 +13,12 @@
 #                   This leads to an error 
 #       22/12/2019: Add more info whether the Moulins has distributed or not
 #                    between partitions 
+#       16/10/2026: Process partitions with a pool of processes (--jobs)
+#                   MoulinAssign is resolved in partition order as before 
+#                   Append the 101 elements to the boundary files and only patch
+#                   the header files (--rewrite rewrites the boundary files as before) 
+#                   Read the mesh files with elmermesh.py instead of pandas 
+#                   Keep the parsed node files as .npy files in mesh_dir_npy (--cache) 
 #
 # AUTHOR:   mchekki
 # ORGANIZATION: CNRS 
@@ -25,32 +32,206 @@ import numpy as np
 import sys
 import os
 import getopt
-import pandas as pd
+import multiprocessing
+import elmermesh
+try:
+	from scipy.spatial import cKDTree
+except ImportError:
+	cKDTree = None
 
 def get_opts(options):
 	try:
-		opts, args = getopt.getopt(options,"m:o:p:hv",["meshdir=","moulin=","partition=","help","verbose"])
+		opts, args = getopt.getopt(options,"m:o:p:j:rchv",["meshdir=","moulin=","partition=","jobs=","rewrite","cache","help","verbose"])
 	except getopt.GetoptError as err:
 		print (err)
 		usage()
 		sys.exit(2)
 	nbpartition =1	
+	nbjobs =1
+	rewrite =False
+	cache =False
 	for o, a in opts:
 		if o in ("-m", "--meshdir"):
 			mesh= a
 		elif o in ("-o", "--moulin"):
 			moulin_file= a
 		elif o in ("-p", "--partition"):
-			nbpartition= np.int(a)
+			nbpartition= int(a)
+		elif o in ("-j", "--jobs"):
+			nbjobs= int(a)
+		elif o in ("-r", "--rewrite"):
+			rewrite= True
+		elif o in ("-c", "--cache"):
+			cache= True
 		elif o in ("-h", "--help"):
 			usage()
 			sys.exit(2)
 		else:
 			assert False, "unhandled option"
 	
-	return mesh, moulin_file, nbpartition 
+	return mesh, moulin_file, nbpartition, nbjobs, rewrite, cache 
+def find_moulin_nodes(xy, Moulin, Err):
+	# Returns for each moulin the row indices (in file order) of the nodes
+	# with squared horizontal distance smaller than Err.
+	# All moulins are queried at once with a KD-tree over the node coordinates xy 
+	# (without scipy nodes sorted by x are searched).
+	radius = np.sqrt(Err)*(1.0+1e-9)
+	if cKDTree is not None:
+		candidates = cKDTree(xy).query_ball_point(Moulin[:,0:2], radius)
+	else:
+		order = np.argsort(xy[:,0], kind='stable')
+		xs = xy[order,0]
+		first = np.searchsorted(xs, Moulin[:,0]-radius, side='left')
+		last = np.searchsorted(xs, Moulin[:,0]+radius, side='right')
+		candidates = [order[first[ii]:last[ii]] for ii in np.arange(np.size(Moulin,0))]
+	hits = []
+	for ii in np.arange(np.size(Moulin,0)):
+		rows = np.sort(np.asarray(candidates[ii], dtype=np.int64))
+		d2 = np.abs((Moulin[ii,0]-xy[rows,0])*(Moulin[ii,0]-xy[rows,0]))+np.abs((Moulin[ii,1]-xy[rows,1])*(Moulin[ii,1]-xy[rows,1]))
+		hits.append(rows[d2 < Err])
+	return hits
+
+def partition_files(mesh_dir, nbpartition, kk):
+	# Returns the nodes, elements, boundary and header files of partition kk
+	if nbpartition >1:
+		files=elmermesh.mesh_files(mesh_dir, kk+1)
+	else:
+		files=elmermesh.mesh_files(mesh_dir)
+	return files['nodes'], files['elements'], files['boundary'], files['header']
+
+def scan_column(filename, column):
+	# Streaming scan of an integer column of a mesh file without building the table
+	# Returns the number of lines and the minimum and maximum of the column
+	# (halo element numbers written as number/partition are read as number)
+	nlines=0
+	vmin=None
+	vmax=None
+	f=open(filename)
+	while True:
+		lines=f.readlines(2**24)
+		if not lines:
+			break
+		values=[int(line.split(None,column+1)[column].split('/')[0]) for line in lines if line.strip()]
+		if values:
+			nlines=nlines+len(values)
+			vmin=min(values) if vmin is None else min(vmin,min(values))
+			vmax=max(values) if vmax is None else max(vmax,max(values))
+	f.close()
+	return nlines, vmin, vmax
+
+def count_lines(filename):
+	# Number of non-blank lines of a file
+	nlines=0
+	f=open(filename,'rb')
+	while True:
+		lines=f.readlines(2**24)
+		if not lines:
+			break
+		nlines=nlines+sum(1 for line in lines if line.strip())
+	f.close()
+	return nlines
+
+def strip_file_end(fid):
+	# Removes trailing blank lines and whitespace of a file opened in 'r+b' mode 
+	# and positions the file at its end (after a newline if the file is not empty)
+	fid.seek(0,2)
+	end=fid.tell()
+	while end >0:
+		start=max(end-4096,0)
+		fid.seek(start)
+		block=fid.read(end-start).rstrip()
+		if block:
+			end=start+len(block)
+			break
+		end=start
+	fid.truncate(end)
+	fid.seek(end)
+	if end >0:
+		fid.write(b'\n')
+
+def find_partition_moulins(args):
+	# Worker: reads partition kk and returns the node numbers close to each moulin 
+	# and the minimum element index (None if the partition has already 101 elements)
+	kk, mesh_dir, nbpartition, Moulin, Err, cache = args
+	nodes_file, elements_file, bc_file, header_file = partition_files(mesh_dir, nbpartition, kk)
+	# Read the header file
+	header=elmermesh.read_header(header_file)
+	if len(header['types']) >0 and header['types'][0][0] == 101 :
+		return kk, None, None
+	# Open the mesh.nodes file to find the nodes number
+	nodes=elmermesh.read_nodes(nodes_file, cache=cache)
+	MoulinNodes=find_moulin_nodes(nodes['coordinates'][:,0:2], Moulin, Err)
+	# Minimum element index from a streaming scan of mesh.elements
+	nElements, MinEIndex, MaxEIndex=scan_column(elements_file, 0)
+	return kk, [nodes['ids'][rows] for rows in MoulinNodes], MinEIndex
+
+def append_partition_moulins(args):
+	# Worker: appends the 101 elements of the moulin nodes of partition kk 
+	# to the boundary file and patches the header file
+	kk, mesh_dir, nbpartition, NodeMoulin, MinEIndex, MaxBC = args
+	nodes_file, elements_file, bc_file, header_file = partition_files(mesh_dir, nbpartition, kk)
+	header=elmermesh.read_header(header_file)
+	nBC=count_lines(bc_file)
+	ms=np.size(NodeMoulin,0)
+	ms_partition=np.count_nonzero(NodeMoulin)
+
+	fid1=open(bc_file,'r+b')
+	strip_file_end(fid1)
+	jj=0
+	for ii in np.arange(ms):
+	    if (NodeMoulin[ii] >0):
+	    	jj = jj + 1
+	    	fid1.write(('%d %d %d %d %d %d\n'%(nBC+jj,MaxBC+1+ii,MinEIndex,0,101,NodeMoulin[ii])).encode())
+	fid1.close()
+
+	# Change the header file
+	if nbpartition >1:
+		nadded=ms_partition
+	else:
+		nadded=ms
+	header['boundary']=header['boundary']+nadded
+	header['types']=np.vstack(([[101,nadded]],header['types']))
+	elmermesh.write_header(header_file, header)
+	return kk
+
+def write_partition_moulins(args):
+	# Worker: adds the 101 elements of the moulin nodes of partition kk 
+	# to the boundary and header files (boundary file is rewritten)
+	kk, mesh_dir, nbpartition, NodeMoulin, MinEIndex, MaxBC = args
+	nodes_file, elements_file, bc_file, header_file = partition_files(mesh_dir, nbpartition, kk)
+	# Read the BC file
+	bc=elmermesh.read_boundary(bc_file)
+	header=elmermesh.read_header(header_file)
+	nBC=np.size(bc['ids'],0)
+	ms=np.size(NodeMoulin,0)
+	ms_partition=np.count_nonzero(NodeMoulin)
+	
+	# Rewrite the file and add the 101 elements
+	fid1=open(bc_file,'w');
+	for ii in np.arange(nBC):
+	    boundline = [bc['ids'][ii],bc['tags'][ii],bc['parents'][ii,0],bc['parents'][ii,1],bc['types'][ii]]
+	    boundline.extend(bc['connectivity'][bc['offsets'][ii]:bc['offsets'][ii+1]])
+	    fid1.write(" ".join(["%d"%(v) for v in boundline]))
+	    fid1.write("\n")
+	jj=0
+	for ii in np.arange(ms):
+	    if (NodeMoulin[ii] >0):
+	    	jj = jj + 1
+	    	fid1.write('%d %d %d %d %d %d\n'%(nBC+jj,MaxBC+1+ii,MinEIndex,0,101,NodeMoulin[ii]))
+	fid1.close()
+	
+	# Change the header file
+	if nbpartition >1:
+		nadded=ms_partition
+	else:
+		nadded=ms
+	header['boundary']=header['boundary']+nadded
+	header['types']=np.vstack(([[101,nadded]],header['types']))
+	elmermesh.write_header(header_file, header)
+	return kk
+
 def usage():
-        print ('USAGE : python makempoulin.py --meshdir mesh_dir --moulin moulin_file --partition number_of_partition')
+        print ('USAGE : python makempoulin.py --meshdir mesh_dir --moulin moulin_file --partition number_of_partition [--jobs number_of_processes] [--rewrite] [--cache]')
 
 
 def exit_error(message):
@@ -72,12 +253,12 @@ def file_donot_exists(filename):
 if __name__=='__main__':
 
 	options=sys.argv[1:]
-	mesh, moulin_file, nbpartition = get_opts(options)
+	mesh, moulin_file, nbpartition, nbjobs, rewrite, cache = get_opts(options)
 
 	Err = 0.01 
 	# Define the mesh directory 
 	if nbpartition >1:
-		mesh_dir = '%s/partitioning.%s'%(mesh,np.str(nbpartition))
+		mesh_dir = '%s/partitioning.%s'%(mesh,str(nbpartition))
 		if file_donot_exists(mesh_dir):
 			exit_error("Directory %s does not exit: Please use the  ElmerGrid command for mesh partitionning"%(mesh_dir))
 	else:
@@ -87,71 +268,49 @@ if __name__=='__main__':
 	if file_donot_exists(moulin_file):
 		exit_error("Moulin file %s does not exit"%(moulin_file))
 
-	# Read global node file and get the number of all nodes
-	# Depending on the mesh, columns do not have the same size
-	# In order to fix this , fill columns with -999999 value
-
-	nodeAll=pd.read_table('%s/mesh.nodes'%(mesh), dtype=float , header=None, sep='\s+').fillna(-999999).values
-	NnodeAll=np.size(nodeAll,0)
+	# Get the number of all nodes from the global header file
+	NnodeAll=elmermesh.read_header('%s/mesh.header'%(mesh))['nodes']
 	MoulinAssign=np.zeros(NnodeAll)
 	# Read the moulin coordinates
-	Moulin=pd.read_table(moulin_file, dtype=float , header=None, sep='\s+').fillna(-999999).values
+	Moulin=np.loadtxt(moulin_file, dtype=float, ndmin=2)
 	if Moulin.size == 2:
 	    Moulin=Moulin.reshape(1,2)	
 	ms=np.size(Moulin,0)
 	NodeMoulin=np.zeros(ms) 
 	gbc_file='%s/mesh.boundary'%(mesh)
-	gbc=pd.read_table(gbc_file, dtype=float , header=None, sep='\s+').fillna(-999999).values
-	MaxBC = np.max(gbc[:,1]) 
-
-	for kk in np.arange(nbpartition): 
-		if nbpartition >1:
-			nodes_file='%s/part.%s.nodes'%(mesh_dir,np.str(kk+1))
-			elements_file='%s/part.%s.elements'%(mesh_dir,np.str(kk+1))
-			bc_file='%s/part.%s.boundary'%(mesh_dir,np.str(kk+1))
-			header_file='%s/part.%s.header'%(mesh_dir,np.str(kk+1))
-		else:
-			nodes_file='%s/mesh.nodes'%(mesh_dir)
-			elements_file='%s/mesh.elements'%(mesh_dir)
-			bc_file='%s/mesh.boundary'%(mesh_dir)
-			header_file='%s/mesh.header'%(mesh_dir)
-		# Open the mesh.nodes file to find the nodes number
-		nodes=pd.read_table(nodes_file, dtype=float , header=None, sep='\s+').fillna(-999999).values
-		# Open the mesh.elements
-		elements=pd.read_table(elements_file, dtype=float , header=None, sep='\s+').fillna(-999999).values
-		# Read the BC file
-		bc=pd.read_table(bc_file, dtype=float , header=None, sep='\s+').fillna(-999999).values
-		# Read the header file
-		head=open(header_file)
-		header=[]
-		for row in head:
-		   header.append(np.fromstring(row, sep=' '))
-
-		if np.int(header[2][0]) == 101 :
-			exit_error("Found 101 elements in the mesh header. No need to proceed...")
-		
-		Nnode=np.size(nodes,0)
-		nBC=np.size(bc,0)
-		nheader=np.size(header,0)
+	# Maximum boundary index from a streaming scan of mesh.boundary
+	nGBC, MinBC, MaxBC = scan_column(gbc_file, 1) 
+
+	# Partitions are read and searched for moulin nodes concurrently, 
+	# the ownership of shared nodes (MoulinAssign) is then resolved in 
+	# partition order as in the serial run and the files are written concurrently
+	if nbjobs >1:
+		pool = multiprocessing.Pool(min(nbjobs, nbpartition))
+		map_function = pool.imap
+	else:
+		pool = None
+		map_function = map
+	tasks = [(kk, mesh_dir, nbpartition, Moulin, Err, cache) for kk in np.arange(nbpartition)]
+	write_tasks = []
+	header101 = False
+	for kk, PartitionMoulinNodes, MinEIndex in map_function(find_partition_moulins, tasks):
+		if PartitionMoulinNodes is None:
+			header101 = True
+			break
 
 		NodeMoulinFound=0
 		NodeMoulin=np.zeros(ms) 
 		for ii in np.arange(ms):
-			xm = Moulin[ii,0] 
-			ym = Moulin[ii,1]
-			for jj in  np.arange(Nnode):
-				xn = nodes[jj,2] 
-				yn = nodes[jj,3] 
-				if (np.abs((xm-xn)*(xm-xn))+np.abs((ym-yn)*(ym-yn))) < Err:
-					idx = np.int(nodes[jj,0]-1)
-					if MoulinAssign[idx] == 0:
-						# Save Moulin nodes 
-						if NodeMoulin[ii] == 0:
-							NodeMoulin[ii] = nodes[jj,0] 
-						NodeMoulinFound=NodeMoulinFound+1
-						MoulinAssign[idx] = kk+1 
-					else:
-						print('WARNING part.%d: Remove Moulin node %d already assigned to partition %d '%(kk+1,idx+1,MoulinAssign[idx]))
+			for node in PartitionMoulinNodes[ii]:
+				idx = int(node-1)
+				if MoulinAssign[idx] == 0:
+					# Save Moulin nodes 
+					if NodeMoulin[ii] == 0:
+						NodeMoulin[ii] = node 
+					NodeMoulinFound=NodeMoulinFound+1
+					MoulinAssign[idx] = kk+1 
+				else:
+					print('WARNING part.%d: Remove Moulin node %d already assigned to partition %d '%(kk+1,idx+1,MoulinAssign[idx]))
 			 # Test if each Moulin has been associated a mesh node
 		if np.count_nonzero(NodeMoulin)==0:
 			print('WARNING: No moulin nodes found on partition: %d'%(kk+1))
@@ -159,40 +318,18 @@ if __name__=='__main__':
 			
 			ms_partition=np.count_nonzero(NodeMoulin)
 			print('%d moulin nodes found on partition %d'%(ms_partition, kk+1))
-			
 			# Write the 101 BC at the end of the mesh.boundary file
-			# get the minimum element index to add for 101 BC
-			MinEIndex= np.min(elements[:,0])
-			
-			# Rewrite the file and add the 101 elements
-			fid1=open(bc_file,'w');
-			for ii in np.arange(nBC):
-			    boundline = bc[ii,:]
-			    # Remove columns with -999999 before writing
-			    indexes = np.where( boundline != -999999)
-			    fid1.write(" ".join(["%g"%(v) for v in boundline[indexes]]))
-			    fid1.write("\n")
-			jj=0
-			for ii in np.arange(ms):
-			    if (NodeMoulin[ii] >0):
-			    	jj = jj + 1
-			    	fid1.write('%g %g %g %g %g %g \n'%(nBC+jj,MaxBC+1+ii,MinEIndex,0,101,NodeMoulin[ii]))
-			fid1.close()
-			
-			# Change the header file
-			fid1=open(header_file,'w')
-			if nbpartition >1:
-				fid1.write('%g %g %g \n'%(header[0][0],header[0][1],header[0][2]+ms_partition))
-			else:
-				fid1.write('%g %g %g \n'%(header[0][0],header[0][1],header[0][2]+ms))
-			fid1.write('%g \n'%(header[1][0]+1))
-			if nbpartition >1:
-				fid1.write('%g %g \n'%(101,ms_partition))
-			else:
-				fid1.write('%g %g \n'%(101,ms))
-			for ii in np.arange(2,nheader):
-			    fid1.write('%g %g \n'%(header[ii][0],header[ii][1]))
-			
-			fid1.close()
+			write_tasks.append((kk, mesh_dir, nbpartition, NodeMoulin, MinEIndex, MaxBC))
+	if rewrite:
+		write_function = write_partition_moulins
+	else:
+		write_function = append_partition_moulins
+	for kk in map_function(write_function, write_tasks):
+		pass
+	if pool is not None:
+		pool.close()
+		pool.join()
+	if header101:
+		exit_error("Found 101 elements in the mesh header. No need to proceed...")
 	if NodeMoulinFound == 0:
 		exit_error(' ERROR: No moulin node found on all partitions ')